@@ -1,44 +1,141 @@
+import argparse
+import pickle
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
 import glob
 import numpy as np
-import ast
 import math
-import path_logic
+import results_store
 
-def load_and_combine_data(data_directory="experiment_data"):
+FILE_CACHE = ".cache_analisi.pkl"
+VERSIONE_CACHE = 2
+
+def _file_risultati(data_directory):
+    """Restituisce, in ordine, i file di risultati (CSV e blocchi binari) presenti nella directory."""
+    return sorted(glob.glob(os.path.join(data_directory, "*.csv"))) + results_store.file_archivio(data_directory)
+
+def _leggi_file_risultati(filename):
+    """Legge un file di risultati (CSV, anche nel vecchio formato, o blocco binario) nello schema tipizzato."""
+    if filename.endswith(".csv"):
+        return results_store.normalizza_risultati(pd.read_csv(filename))
+    return results_store.leggi_blocco(filename)
+
+def load_and_combine_data(data_directory="experiment_data", usa_cache=False):
     """
-    Carica tutti i file CSV dalla directory dei dati, li unisce in un unico
+    Carica tutti i file di risultati dalla directory dei dati (blocchi binari
+    dell'archivio e file CSV, anche nel vecchio formato con le tuple come stringhe),
+    li porta allo schema tipizzato di results_store, li unisce in un unico
     DataFrame pandas e lo restituisce.
+    Con 'usa_cache' il DataFrame unito viene salvato nella directory dei dati e alle
+    esecuzioni successive vengono letti solo i file nuovi o modificati.
     """
-    csv_files = glob.glob(os.path.join(data_directory, "*.csv"))
-    if not csv_files:
-        print(f"Nessun file CSV trovato nella cartella '{data_directory}'.")
+    files = _file_risultati(data_directory)
+    if not files:
+        print(f"Nessun file di risultati trovato nella cartella '{data_directory}'.")
         return None
-    print(f"Trovati {len(csv_files)} file di risultati. Unificazione in corso...")
-    df_list = [pd.read_csv(file) for file in csv_files]
-    full_df = pd.concat(df_list, ignore_index=True)
+    if usa_cache:
+        return _carica_incrementale(data_directory, files)
+    print(f"Trovati {len(files)} file di risultati. Unificazione in corso...")
+    full_df = results_store.unisci_risultati([_leggi_file_risultati(file) for file in files])
     print("Unificazione completata.")
     return full_df
 
-def analyze_and_plot(df):
+def _leggi_cache(cache_path):
+    """
+    Restituisce (firme dei file, colonne di ogni file, DataFrame) salvati nella cache,
+    oppure ({}, {}, None) se assente o non valida.
+    """
+    if not os.path.exists(cache_path):
+        return {}, {}, None
+    try:
+        cache = pd.read_pickle(cache_path)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+        print(f"Cache di analisi non leggibile ({e}): verrà ricostruita.")
+        return {}, {}, None
+    if not isinstance(cache, dict) or cache.get("version") != VERSIONE_CACHE:
+        return {}, {}, None
+    return cache["firme"], cache["colonne"], cache["df"]
+
+def _carica_incrementale(data_directory, files):
+    """
+    Caricamento incrementale: ogni riga del DataFrame in cache ricorda il file da cui
+    proviene (colonna '_sorgente') e ogni file è identificato da (mtime, dimensione).
+    Le righe dei file invariati vengono riusate, quelle dei file modificati o rimossi
+    scartate e solo i file nuovi o modificati vengono letti dal disco.
+    La cache ricorda anche le colonne di ogni file, così le righe riusate mantengono
+    esattamente le colonne dei loro file, anche quelle interamente vuote.
+    """
+    cache_path = os.path.join(data_directory, FILE_CACHE)
+    firme_cache, colonne_cache, df_cache = _leggi_cache(cache_path)
+
+    firme = {}
+    for file in files:
+        info = os.stat(file)
+        firme[os.path.basename(file)] = (info.st_mtime_ns, info.st_size)
+    invariati = [nome for nome, firma in firme.items() if firme_cache.get(nome) == firma]
+    da_leggere = [file for file in files if os.path.basename(file) not in invariati]
+
+    if not da_leggere and len(invariati) == len(firme_cache):
+        print(f"Nessun file di risultati nuovo o modificato: uso la cache ({len(df_cache)} righe).")
+        return df_cache.drop(columns="_sorgente")
+
+    print(f"Trovati {len(files)} file di risultati, {len(da_leggere)} nuovi o modificati. Unificazione in corso...")
+    parti = []
+    colonne = {nome: colonne_cache[nome] for nome in invariati}
+    if invariati:
+        # Solo le colonne dei file invariati: le altre provenivano dai file modificati o rimossi
+        colonne_invariati = list(dict.fromkeys(col for nome in invariati for col in colonne[nome]))
+        parti.append(df_cache.loc[df_cache["_sorgente"].isin(invariati), colonne_invariati + ["_sorgente"]])
+    for file in da_leggere:
+        parte = _leggi_file_risultati(file)
+        colonne[os.path.basename(file)] = list(parte.columns)
+        parte["_sorgente"] = os.path.basename(file)
+        parti.append(parte)
+    full_df = results_store.unisci_risultati(parti)
+    full_df["_sorgente"] = full_df["_sorgente"].astype("category")
+
+    cache_temporanea = cache_path + ".tmp"
+    pd.to_pickle({"version": VERSIONE_CACHE, "firme": firme, "colonne": colonne, "df": full_df}, cache_temporanea)
+    os.replace(cache_temporanea, cache_path)
+    print("Unificazione completata.")
+    return full_df.drop(columns="_sorgente")
+
+def aggiungi_colonne_derivate(df):
+    """
+    Aggiunge al DataFrame le colonne derivate, calcolate con NumPy su tutte le righe insieme:
+        - 'dlib': distanza libera tra origine e destinazione (vedi path_logic.calcola_distanza_libera),
+          infinita se la coppia (O, D) manca.
+    """
+    if all(col in df.columns for col in ('origin_r', 'origin_c', 'destination_r', 'destination_c')):
+        origin_r, origin_c = df['origin_r'].to_numpy(), df['origin_c'].to_numpy()
+        destination_r, destination_c = df['destination_r'].to_numpy(), df['destination_c'].to_numpy()
+        delta_r = np.abs(origin_r - destination_r)
+        delta_c = np.abs(origin_c - destination_c)
+        delta_min, delta_max = np.minimum(delta_r, delta_c), np.maximum(delta_r, delta_c)
+        dlib = math.sqrt(2) * delta_min + (delta_max - delta_min)
+        df['dlib'] = np.where((origin_r < 0) | (destination_r < 0), np.inf, dlib)
+    return df
+
+def _salva_figura(filename, mostra):
+    """Salva la figura corrente, la mostra solo in modalità interattiva e poi la chiude."""
+    plt.savefig(filename)
+    if mostra:
+        plt.show()
+    plt.close('all')
+
+def analyze_and_plot(df, analysis_output_dir="analysis_results", mostra=True):
     """
     Prende il DataFrame completo, genera i grafici per l'analisi e
     salva le tabelle riassuntive su file CSV.
+    Con mostra=False i grafici vengono solo salvati su file, senza finestre.
     """
     if df is None:
         return
 
-    analysis_output_dir = "analysis_results"
     os.makedirs(analysis_output_dir, exist_ok=True)
 
-    if 'origin' in df.columns:
-        df['origin'] = df['origin'].apply(lambda x: ast.literal_eval(str(x)))
-    if 'destination' in df.columns:
-        df['destination'] = df['destination'].apply(lambda x: ast.literal_eval(str(x)))
-    if 'origin' in df.columns and 'destination' in df.columns:
-        df['dlib'] = df.apply(lambda row: path_logic.calcola_distanza_libera(row['origin'], row['destination']), axis=1)
+    aggiungi_colonne_derivate(df)
 
     if 'correttezza_superata' in df.columns:
         num_inconsistent = len(df[df['correttezza_superata'] == False])
@@ -46,6 +143,13 @@ def analyze_and_plot(df):
             print(f"\nATTENZIONE: Trovati {num_inconsistent} run con risultati non consistenti!")
         else:
             print("\nVerifica di coerenza superata: Tutti i run sono consistenti.")
+
+    if 'concorda_astar' in df.columns:
+        num_discordanti = len(df[df['concorda_astar'] == False])
+        if num_discordanti > 0:
+            print(f"ATTENZIONE: Trovati {num_discordanti} run in cui CAMMINOMIN e A* non concordano!")
+        else:
+            print("Confronto con A* superato: CAMMINOMIN e A* concordano su tutti i run verificati.")
     
     df_dimensione = df[df['id_scenario'].str.startswith('dimensione', na=False)].copy()
     if not df_dimensione.empty:
@@ -53,6 +157,8 @@ def analyze_and_plot(df):
             'execution_time_OD', 'recursive_calls_OD', 'cache_hits_OD', 
             'total_unique_frontiers_OD', 'pruning_successes_OD', 'max_recursion_depth_OD'
         ]
+        if 'execution_time_astar' in df_dimensione.columns:
+            colonne_da_mediare.append('execution_time_astar')
         avg_dimensione = df_dimensione.groupby('rows')[colonne_da_mediare].mean().reset_index()
 
         print("\n--- Dati Medi per Test di Dimensione ---")
@@ -62,10 +168,10 @@ def analyze_and_plot(df):
         avg_dimensione.to_csv(table_filename_dim, index=False, float_format='%.4f')
         print(f"Tabella di analisi sulla dimensione salvata in: {table_filename_dim}")
 
-        plt.figure(figsize=(10, 6)); plt.plot(avg_dimensione['rows'], avg_dimensione['execution_time_OD'], marker='o'); plt.title('Tempo Medio di Esecuzione vs. Dimensione Griglia'); plt.xlabel('Dimensione (N)'); plt.ylabel('Tempo (secondi)'); plt.grid(True); plt.savefig(os.path.join(analysis_output_dir, "grafico_1_tempo_vs_dimensione.png")); plt.show()
-        fig, ax1 = plt.subplots(figsize=(10, 6)); ax1.plot(avg_dimensione['rows'], avg_dimensione['recursive_calls_OD'], marker='s', color='tab:blue', label='Chiamate Ricorsive'); ax1.set_xlabel('Dimensione (N)'); ax1.set_ylabel('Numero Medio Chiamate Ricorsive', color='tab:blue'); ax2 = ax1.twinx(); ax2.plot(avg_dimensione['rows'], avg_dimensione['cache_hits_OD'], marker='^', color='tab:green', linestyle='--', label='Cache Hits'); ax2.set_ylabel('Numero Medio Cache Hits', color='tab:green'); plt.title('Lavoro Algoritmo e Efficacia Cache vs. Dimensione'); fig.legend(loc="upper left", bbox_to_anchor=(0.1,0.9)); plt.savefig(os.path.join(analysis_output_dir, "grafico_2_lavoro_vs_dimensione.png")); plt.show()
+        plt.figure(figsize=(10, 6)); plt.plot(avg_dimensione['rows'], avg_dimensione['execution_time_OD'], marker='o'); plt.title('Tempo Medio di Esecuzione vs. Dimensione Griglia'); plt.xlabel('Dimensione (N)'); plt.ylabel('Tempo (secondi)'); plt.grid(True); _salva_figura(os.path.join(analysis_output_dir, "grafico_1_tempo_vs_dimensione.png"), mostra)
+        fig, ax1 = plt.subplots(figsize=(10, 6)); ax1.plot(avg_dimensione['rows'], avg_dimensione['recursive_calls_OD'], marker='s', color='tab:blue', label='Chiamate Ricorsive'); ax1.set_xlabel('Dimensione (N)'); ax1.set_ylabel('Numero Medio Chiamate Ricorsive', color='tab:blue'); ax2 = ax1.twinx(); ax2.plot(avg_dimensione['rows'], avg_dimensione['cache_hits_OD'], marker='^', color='tab:green', linestyle='--', label='Cache Hits'); ax2.set_ylabel('Numero Medio Cache Hits', color='tab:green'); plt.title('Lavoro Algoritmo e Efficacia Cache vs. Dimensione'); fig.legend(loc="upper left", bbox_to_anchor=(0.1,0.9)); _salva_figura(os.path.join(analysis_output_dir, "grafico_2_lavoro_vs_dimensione.png"), mostra)
         if 'dlib' in df_dimensione.columns:
-            plt.figure(figsize=(10, 6)); plt.scatter(df_dimensione['dlib'], df_dimensione['execution_time_OD'], alpha=0.5); plt.title('Correlazione tra Distanza Libera e Tempo di Esecuzione'); plt.xlabel('Distanza Libera (dlib)'); plt.ylabel('Tempo di Esecuzione (secondi)'); plt.grid(True); plt.savefig(os.path.join(analysis_output_dir, "grafico_3_correlazione_distanza_tempo.png")); plt.show()
+            plt.figure(figsize=(10, 6)); plt.scatter(df_dimensione['dlib'], df_dimensione['execution_time_OD'], alpha=0.5); plt.title('Correlazione tra Distanza Libera e Tempo di Esecuzione'); plt.xlabel('Distanza Libera (dlib)'); plt.ylabel('Tempo di Esecuzione (secondi)'); plt.grid(True); _salva_figura(os.path.join(analysis_output_dir, "grafico_3_correlazione_distanza_tempo.png"), mostra)
 
     df_ostacoli = df[df['id_scenario'].str.startswith('ostacoli', na=False)].copy()
     if not df_ostacoli.empty:
@@ -80,13 +186,19 @@ def analyze_and_plot(df):
         avg_ostacoli.to_csv(table_filename_obs, index=False, float_format='%.4f')
         print(f"Tabella di analisi sugli ostacoli salvata in: {table_filename_obs}")
         
-        plt.figure(figsize=(10, 6)); plt.plot(avg_ostacoli['obstacle_ratio'] * 100, avg_ostacoli['execution_time_OD'], marker='o', color='red'); plt.title('Tempo Medio di Esecuzione vs. Densità Ostacoli (15x15)'); plt.xlabel('Percentuale di Ostacoli (%)'); plt.ylabel('Tempo Medio (secondi)'); plt.grid(True); plt.savefig(os.path.join(analysis_output_dir, "grafico_4_tempo_vs_ostacoli.png")); plt.show()
-        plt.figure(figsize=(10, 6)); plt.plot(avg_ostacoli['obstacle_ratio'] * 100, avg_ostacoli['success'] * 100, marker='o', color='teal'); plt.title('Probabilità di Successo vs. Densità Ostacoli (15x15)'); plt.xlabel('Percentuale di Ostacoli (%)'); plt.ylabel('Percentuale di Run con Soluzione (%)'); plt.grid(True); plt.ylim(0, 105); plt.savefig(os.path.join(analysis_output_dir, "grafico_5_successo_vs_ostacoli.png")); plt.show()
-        plt.figure(figsize=(10, 6)); plt.plot(avg_ostacoli['obstacle_ratio'] * 100, avg_ostacoli['max_recursion_depth_OD'], marker='D', color='purple'); plt.title('Profondità Media della Ricerca vs. Densità Ostacoli (15x15)'); plt.xlabel('Percentuale di Ostacoli (%)'); plt.ylabel('Profondità Massima Media'); plt.grid(True); plt.savefig(os.path.join(analysis_output_dir, "grafico_6_profondita_vs_ostacoli.png")); plt.show()
+        plt.figure(figsize=(10, 6)); plt.plot(avg_ostacoli['obstacle_ratio'] * 100, avg_ostacoli['execution_time_OD'], marker='o', color='red'); plt.title('Tempo Medio di Esecuzione vs. Densità Ostacoli (15x15)'); plt.xlabel('Percentuale di Ostacoli (%)'); plt.ylabel('Tempo Medio (secondi)'); plt.grid(True); _salva_figura(os.path.join(analysis_output_dir, "grafico_4_tempo_vs_ostacoli.png"), mostra)
+        plt.figure(figsize=(10, 6)); plt.plot(avg_ostacoli['obstacle_ratio'] * 100, avg_ostacoli['success'] * 100, marker='o', color='teal'); plt.title('Probabilità di Successo vs. Densità Ostacoli (15x15)'); plt.xlabel('Percentuale di Ostacoli (%)'); plt.ylabel('Percentuale di Run con Soluzione (%)'); plt.grid(True); plt.ylim(0, 105); _salva_figura(os.path.join(analysis_output_dir, "grafico_5_successo_vs_ostacoli.png"), mostra)
+        plt.figure(figsize=(10, 6)); plt.plot(avg_ostacoli['obstacle_ratio'] * 100, avg_ostacoli['max_recursion_depth_OD'], marker='D', color='purple'); plt.title('Profondità Media della Ricerca vs. Densità Ostacoli (15x15)'); plt.xlabel('Percentuale di Ostacoli (%)'); plt.ylabel('Profondità Massima Media'); plt.grid(True); _salva_figura(os.path.join(analysis_output_dir, "grafico_6_profondita_vs_ostacoli.png"), mostra)
 
     df_confronto = df[df['id_scenario'].str.startswith('confronto', na=False)].copy()
     if not df_confronto.empty:
-        avg_confronto_series = df_confronto.groupby(['rows', 'type'])['execution_time'].mean()
+        # I file più vecchi usano 'execution_time', quelli nuovi il suffisso '_OD'
+        if 'execution_time_OD' in df_confronto.columns:
+            if 'execution_time' in df_confronto.columns:
+                df_confronto['execution_time'] = df_confronto['execution_time_OD'].fillna(df_confronto['execution_time'])
+            else:
+                df_confronto['execution_time'] = df_confronto['execution_time_OD']
+        avg_confronto_series = df_confronto.groupby(['rows', 'type'], observed=True)['execution_time'].mean()
         avg_confronto_df = avg_confronto_series.unstack()
 
         print("\n--- Dati Medi per Test di Confronto ---")
@@ -95,10 +207,20 @@ def analyze_and_plot(df):
         table_filename_comp = os.path.join(analysis_output_dir, "tabella_analisi_confronto.csv")
         avg_confronto_df.to_csv(table_filename_comp, float_format='%.6f') 
         print(f"Tabella di analisi sul confronto salvata in: {table_filename_comp}")
+
+        colonne_pruning = ['pruning_successes_local_OD', 'pruning_successes_global_OD']
+        if all(col in df_confronto.columns for col in colonne_pruning):
+            avg_pruning = df_confronto.dropna(subset=colonne_pruning).groupby(['rows', 'type'], observed=True)[colonne_pruning].mean().reset_index()
+            print("\n--- Potature Medie (Locali/Globali) per Test di Confronto ---")
+            print(avg_pruning)
+            table_filename_pruning = os.path.join(analysis_output_dir, "tabella_analisi_pruning.csv")
+            avg_pruning.to_csv(table_filename_pruning, index=False, float_format='%.4f')
+            print(f"Tabella di analisi sul pruning salvata in: {table_filename_pruning}")
         
         colori = {
             'naive': '#C70039',
-            'ottimizzato': '#1E8449'
+            'ottimizzato': '#1E8449',
+            'branch_and_bound': '#2874A6'
         }
         
         avg_confronto_df.plot(
@@ -118,10 +240,79 @@ def analyze_and_plot(df):
         plt.grid(axis='y', linestyle='--', alpha=0.7)
         plt.legend(title='Versione Algoritmo', fontsize=11)
         plt.tight_layout()
-        plt.savefig(os.path.join(analysis_output_dir, "grafico_7_confronto_versioni.png"))
-        plt.show()
+        _salva_figura(os.path.join(analysis_output_dir, "grafico_7_confronto_versioni.png"), mostra)
+
+    # Profilo per fase, presente solo nei run eseguiti con experiment.py --profile
+    fasi = ['cache_lookup', 'closure', 'frontier', 'sort', 'upper_bound', 'overhead']
+    colonne_fasi = [f'time_{fase}_OD' for fase in fasi]
+    if all(col in df.columns for col in colonne_fasi):
+        df_fasi = df.dropna(subset=colonne_fasi).copy()
+        # Solo i run di confronto hanno una 'type': per gli altri la variante è vuota
+        df_fasi['type'] = df_fasi['type'].astype(object).fillna('') if 'type' in df_fasi.columns else ''
+        colonne_dimensioni = [col for col in df_fasi.columns
+                              if col.endswith('_size_mean_OD') or col.endswith('_size_max_OD')]
+        avg_fasi = df_fasi.groupby(['id_scenario', 'type'], observed=True)[colonne_fasi + colonne_dimensioni].mean()
+        if not avg_fasi.empty:
+            totale = avg_fasi[colonne_fasi].sum(axis=1)
+            for fase, col in zip(fasi, colonne_fasi):
+                avg_fasi[f'quota_{fase}'] = avg_fasi[col] / totale
+            avg_fasi = avg_fasi.reset_index()
+
+            print("\n--- Tempo Medio per Fase (run con profilo) ---")
+            print(avg_fasi)
+
+            table_filename_fasi = os.path.join(analysis_output_dir, "tabella_analisi_fasi.csv")
+            avg_fasi.to_csv(table_filename_fasi, index=False, float_format='%.6f')
+            print(f"Tabella di analisi per fase salvata in: {table_filename_fasi}")
+
+            quote = avg_fasi.set_index(avg_fasi['id_scenario'].astype(str) + avg_fasi['type'].map(lambda t: f" ({t})" if t else ""))
+            quote = quote[[f'quota_{fase}' for fase in fasi]] * 100
+            quote.columns = ['Ricerca in cache', 'Chiusura', 'Frontiera', 'Ordinamento', 'Limite superiore (A*)', 'Ricorsione e altro']
+            quote.plot(kind='bar', stacked=True, figsize=(12, 7), edgecolor='black', linewidth=0.5)
+            plt.title('Ripartizione del Tempo di Esecuzione per Fase')
+            plt.xlabel('Scenario'); plt.ylabel('Quota del Tempo (%)'); plt.ylim(0, 100)
+            plt.legend(title='Fase', fontsize=9); plt.tight_layout()
+            _salva_figura(os.path.join(analysis_output_dir, "grafico_9_fasi.png"), mostra)
+
+    df_aggiornamenti = df[df['id_scenario'].str.startswith('aggiornamenti', na=False)].copy()
+    if not df_aggiornamenti.empty:
+        if 'concorda_cold' in df_aggiornamenti.columns:
+            num_discordanti = len(df_aggiornamenti[df_aggiornamenti['concorda_cold'] == False])
+            if num_discordanti > 0:
+                print(f"ATTENZIONE: Trovate {num_discordanti} modifiche in cui la risoluzione calda e quella a freddo non concordano!")
+        colonne_aggiornamenti = ['execution_time_warm', 'execution_time_cold', 'invalidation_time',
+                                 'invalidated_closures', 'invalidated_subproblems', 'cached_closures', 'cached_subproblems']
+        avg_aggiornamenti = df_aggiornamenti.groupby(['rows', 'type'], observed=True)[colonne_aggiornamenti].mean()
+        # Speedup sui tempi medi (peso maggiore alle modifiche costose) e mediana degli speedup delle singole modifiche
+        avg_aggiornamenti['speedup_medio'] = avg_aggiornamenti['execution_time_cold'] / avg_aggiornamenti['execution_time_warm']
+        avg_aggiornamenti['speedup_mediano'] = df_aggiornamenti.groupby(['rows', 'type'], observed=True)['speedup'].median()
+        avg_aggiornamenti = avg_aggiornamenti.reset_index()
+
+        print("\n--- Dati Medi per Test di Aggiornamento Incrementale ---")
+        print(avg_aggiornamenti)
+
+        table_filename_agg = os.path.join(analysis_output_dir, "tabella_analisi_aggiornamenti.csv")
+        avg_aggiornamenti.to_csv(table_filename_agg, index=False, float_format='%.6f')
+        print(f"Tabella di analisi sugli aggiornamenti salvata in: {table_filename_agg}")
+
+        tempi = df_aggiornamenti.groupby('rows')[['execution_time_cold', 'execution_time_warm']].mean()
+        tempi.columns = ['A freddo (nuova sessione)', 'Calda (cache invalidate)']
+        tempi.plot(kind='bar', figsize=(10, 6), logy=True, color=['#C70039', '#1E8449'], edgecolor='black', linewidth=0.7)
+        plt.title('Risoluzione dopo una Modifica: Calda vs. a Freddo (Scala Logaritmica)')
+        plt.xlabel('Dimensione Griglia (NxN)'); plt.ylabel('Tempo Medio (secondi)'); plt.xticks(rotation=0)
+        plt.grid(axis='y', linestyle='--', alpha=0.7); plt.tight_layout()
+        _salva_figura(os.path.join(analysis_output_dir, "grafico_8_aggiornamenti.png"), mostra)
 
 
 if __name__ == "__main__":
-    full_dataframe = load_and_combine_data()
-    analyze_and_plot(full_dataframe)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Analisi dei risultati degli esperimenti su CAMMINOMIN.")
+    parser.add_argument("--data_directory", default="experiment_data", help="Cartella con i file di risultati.")
+    parser.add_argument("--output_directory", default="analysis_results", help="Cartella in cui salvare tabelle e grafici.")
+    parser.add_argument("--batch", action="store_true",
+                        help="Modalità non interattiva: grafici generati fuori schermo (backend Agg) e caricamento incrementale dei risultati.")
+    args = parser.parse_args()
+
+    if args.batch:
+        plt.switch_backend("Agg")
+    full_dataframe = load_and_combine_data(args.data_directory, usa_cache=args.batch)
+    analyze_and_plot(full_dataframe, args.output_directory, mostra=not args.batch)
\ No newline at end of file
@@ -0,0 +1,8 @@
+"""
+Suite di benchmark di CAMMINOMIN: microbenchmark delle funzioni critiche e risoluzioni
+complete su mappe generate con semi fissi, con salvataggio dei risultati come baseline
+JSON e confronto con una baseline per individuare le regressioni.
+Si esegue dalla cartella del progetto con:
+    python -m benchmarks --save benchmarks/baseline.json
+    python -m benchmarks --compare benchmarks/baseline.json --threshold 0.10
+"""
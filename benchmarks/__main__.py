@@ -0,0 +1,60 @@
+import argparse
+import re
+import sys
+from benchmarks import casi
+from benchmarks.misura import METRICHE, carica_baseline, confronta, misura, salva_baseline
+
+def _formatta_tempo(secondi):
+    if secondi is None:
+        return "-"
+    for unita, scala in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if secondi >= scala:
+            return f"{secondi / scala:.3f} {unita}"
+    return f"{secondi / 1e-9:.1f} ns"
+
+def main(args):
+    """Esegue i benchmark selezionati, poi salva la baseline e/o confronta con una baseline esistente."""
+    tutti = casi.tutti_i_casi()
+    selezionati = {nome: f for nome, f in tutti.items() if re.search(args.filter, nome)} if args.filter else tutti
+    if not selezionati:
+        print(f"Nessun benchmark corrisponde al filtro '{args.filter}'.")
+        return 2
+
+    risultati = {}
+    for nome, funzione in selezionati.items():
+        risultati[nome] = misura(funzione, repeat=args.repeat, warmup=args.warmup, tempo_minimo=args.min_time)
+        r = risultati[nome]
+        print(f"{nome:<45} min {_formatta_tempo(r['min']):>12}  mediana {_formatta_tempo(r['median']):>12}  "
+              f"(± {_formatta_tempo(r['stdev'])}, {r['repeat']}x{r['number']})")
+
+    if args.save:
+        salva_baseline(risultati, args.save)
+        print(f"\nBaseline salvata in: {args.save}")
+
+    if args.compare:
+        baseline = carica_baseline(args.compare)
+        if args.filter:
+            baseline = {nome: r for nome, r in baseline.items() if re.search(args.filter, nome)}
+        righe = confronta(risultati, baseline, args.threshold, args.metric)
+        print(f"\n--- Confronto con {args.compare} (metrica: {args.metric}, soglia: {args.threshold:.0%}) ---")
+        for nome, vecchio, nuovo, rapporto, esito in righe:
+            rapporto_str = f"{rapporto:.2f}x" if rapporto is not None else "-"
+            print(f"{nome:<45} {_formatta_tempo(vecchio):>12} -> {_formatta_tempo(nuovo):>12}  {rapporto_str:>7}  {esito}")
+        regressioni = [riga for riga in righe if riga[4] == "regressione"]
+        if regressioni:
+            print(f"\nATTENZIONE: {len(regressioni)} benchmark in regressione oltre la soglia del {args.threshold:.0%}.")
+            return 1
+        print("\nNessuna regressione oltre la soglia.")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark di CAMMINOMIN con baseline e rilevamento delle regressioni.")
+    parser.add_argument("--filter", help="Espressione regolare: esegue solo i benchmark il cui nome la contiene.")
+    parser.add_argument("--repeat", type=int, default=5, help="Numero di campioni per benchmark (default: 5).")
+    parser.add_argument("--warmup", type=int, default=1, help="Chiamate a vuoto prima della misura (default: 1).")
+    parser.add_argument("--min_time", type=float, default=0.1, help="Durata minima in secondi di un campione (default: 0.1).")
+    parser.add_argument("--save", help="Salva i risultati come baseline JSON nel file indicato.")
+    parser.add_argument("--compare", help="Confronta i risultati con la baseline JSON indicata; esce con codice 1 se ci sono regressioni.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Rallentamento relativo oltre il quale un benchmark è una regressione (default: 0.10).")
+    parser.add_argument("--metric", choices=METRICHE, default="min", help="Statistica confrontata con la baseline (default: min).")
+    sys.exit(main(parser.parse_args()))
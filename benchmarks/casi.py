@@ -0,0 +1,68 @@
+import grid_generator
+import closure_logic
+import path_logic
+from data_structures import Grid
+from solver import PathfindingSolver
+
+SEME = 12345
+DIMENSIONI_MICRO = (15, 30, 60)
+DENSITA = (0.10, 0.20, 0.30)
+DIMENSIONI_SOLVE = (8, 10, 12)
+COMBINAZIONI_SOLVE = (
+    ("cache+pruning", {"use_cache": True, "use_pruning": True}),
+    ("cache", {"use_cache": True, "use_pruning": False}),
+    ("pruning", {"use_cache": False, "use_pruning": True}),
+    ("naive", {"use_cache": False, "use_pruning": False}),
+)
+
+def mappa(n, densita):
+    """Mappa n x n con la densità di ostacoli indicata, sempre la stessa per la stessa coppia (n, densità)."""
+    return grid_generator.generate_grid_map(rows=n, cols=n, obstacle_ratio=densita, seed=SEME + 1000 * n + int(densita * 100))
+
+def coppia_od(grid: Grid):
+    """Coppia (O, D) deterministica: la prima e l'ultima cella libera in ordine di riga."""
+    libere = sorted(grid.adj.keys())
+    return libere[0], libere[-1]
+
+def _microbenchmark():
+    """Restituisce {nome: funzione senza argomenti} dei microbenchmark, con gli input già preparati."""
+    casi = {}
+    for n in DIMENSIONI_MICRO:
+        for densita in DENSITA:
+            matrice = mappa(n, densita)
+            grid = Grid.from_matrix(matrice)
+            origin, destination = coppia_od(grid)
+            suffisso = f"{n}x{n}/{int(densita * 100)}%"
+            casi[f"from_matrix/{suffisso}"] = lambda matrice=matrice: Grid.from_matrix(matrice)
+            casi[f"from_matrix_compact/{suffisso}"] = lambda matrice=matrice: Grid.from_matrix(matrice, compact=True)
+            for backend, funzione in closure_logic.BACKEND_CHIUSURA.items():
+                casi[f"chiusura_{backend}/{suffisso}"] = lambda funzione=funzione, grid=grid, origin=origin: funzione(grid, origin, 0)
+            chiusura = closure_logic.calcola_contesto_e_complemento_sweep(grid, origin, 0)
+            casi[f"frontiera/{suffisso}"] = (lambda grid=grid, chiusura=chiusura:
+                                            closure_logic.calcola_frontiera(grid, chiusura, 0))
+        coppie = [((i % n, (3 * i) % n), ((7 * i) % n, (5 * i + 1) % n)) for i in range(200)]
+        casi[f"generate_path_coordinates/{n}x{n}"] = lambda coppie=coppie: [
+            path_logic.generate_path_coordinates(o, d, tipo) for o, d in coppie for tipo in (True, False)
+        ]
+        # 'grid' è l'ultima mappa della dimensione; la tabella delle sequenze libere è già calcolata
+        grid.get_free_runs()
+        casi[f"free_path_type/{n}x{n}"] = lambda grid=grid, coppie=coppie: [
+            grid.free_path_type(o, d, 0) for o, d in coppie
+        ]
+    return casi
+
+def _solve():
+    """Restituisce {nome: funzione senza argomenti} delle risoluzioni complete, una per combinazione cache/pruning."""
+    casi = {}
+    for n in DIMENSIONI_SOLVE:
+        grid = Grid.from_matrix(mappa(n, 0.20))
+        origin, destination = coppia_od(grid)
+        for nome, opzioni in COMBINAZIONI_SOLVE:
+            def risolvi(grid=grid, origin=origin, destination=destination, opzioni=opzioni):
+                PathfindingSolver(grid, origin, destination).solve(debug=False, **opzioni)
+            casi[f"solve_{nome}/{n}x{n}/20%"] = risolvi
+    return casi
+
+def tutti_i_casi():
+    """Tutti i benchmark della suite, come {nome: funzione senza argomenti}, in ordine di esecuzione."""
+    return {**_microbenchmark(), **_solve()}
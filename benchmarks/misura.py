@@ -0,0 +1,104 @@
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+
+VERSIONE_BASELINE = 1
+METRICHE = ("min", "median", "mean")
+
+def misura(funzione, repeat=5, warmup=1, tempo_minimo=0.1):
+    """
+    Misura il tempo di una chiamata di 'funzione'. Dopo 'warmup' chiamate a vuoto, il
+    numero di chiamate per campione viene scelto in modo che un campione duri almeno
+    'tempo_minimo' secondi, poi vengono raccolti 'repeat' campioni. Come timeit, durante
+    la misura il garbage collector è disattivato.
+        Returns
+            - dict: min, median, mean e stdev del tempo per chiamata (secondi), repeat e number.
+    """
+    for _ in range(warmup):
+        funzione()
+    gc_attivo = gc.isenabled()
+    gc.disable()
+    try:
+        campioni, number = _campioni(funzione, repeat, tempo_minimo)
+    finally:
+        if gc_attivo:
+            gc.enable()
+    return {
+        "min": min(campioni),
+        "median": statistics.median(campioni),
+        "mean": statistics.fmean(campioni),
+        "stdev": statistics.stdev(campioni) if len(campioni) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+def _campioni(funzione, repeat, tempo_minimo):
+    """Calibra il numero di chiamate per campione e restituisce (tempi per chiamata, chiamate per campione)."""
+    number = 1
+    while True:
+        inizio = time.perf_counter()
+        for _ in range(number):
+            funzione()
+        durata = time.perf_counter() - inizio
+        if durata >= tempo_minimo:
+            break
+        number *= 2 if durata == 0 else max(2, min(10, int(tempo_minimo / durata) + 1))
+    campioni = [durata / number]
+    for _ in range(repeat - 1):
+        inizio = time.perf_counter()
+        for _ in range(number):
+            funzione()
+        campioni.append((time.perf_counter() - inizio) / number)
+    return campioni, number
+
+def salva_baseline(risultati, path):
+    """Salva i risultati come baseline JSON, con le informazioni sulla macchina che li ha prodotti."""
+    with open(path, "w") as f:
+        json.dump({
+            "version": VERSIONE_BASELINE,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "results": risultati,
+        }, f, indent=2)
+
+def carica_baseline(path):
+    """Carica una baseline salvata con salva_baseline e ne restituisce i risultati."""
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get("version") != VERSIONE_BASELINE:
+        raise ValueError(f"Versione della baseline '{baseline.get('version')}' non supportata (attesa {VERSIONE_BASELINE}).")
+    return baseline["results"]
+
+def confronta(risultati, baseline, threshold=0.10, metrica="min"):
+    """
+    Confronta i risultati con la baseline sulla metrica indicata. Un benchmark è una
+    regressione se il rapporto nuovo/baseline supera 1 + threshold, un miglioramento se
+    scende sotto 1 / (1 + threshold).
+        Returns
+            - list[tuple]: (nome, tempo baseline, tempo nuovo, rapporto, esito) per ogni benchmark,
+              con esito "regressione", "miglioramento", "ok", "nuovo" o "mancante".
+    """
+    if metrica not in METRICHE:
+        raise ValueError(f"Metrica '{metrica}' non valida. Metriche disponibili: {list(METRICHE)}")
+    righe = []
+    for nome in list(risultati) + [n for n in baseline if n not in risultati]:
+        if nome not in baseline:
+            righe.append((nome, None, risultati[nome][metrica], None, "nuovo"))
+            continue
+        if nome not in risultati:
+            righe.append((nome, baseline[nome][metrica], None, None, "mancante"))
+            continue
+        vecchio, nuovo = baseline[nome][metrica], risultati[nome][metrica]
+        rapporto = nuovo / vecchio if vecchio > 0 else float('inf')
+        if rapporto > 1 + threshold:
+            esito = "regressione"
+        elif rapporto < 1 / (1 + threshold):
+            esito = "miglioramento"
+        else:
+            esito = "ok"
+        righe.append((nome, vecchio, nuovo, rapporto, esito))
+    return righe
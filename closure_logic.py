@@ -1,39 +1,287 @@
-import path_logic
-from data_structures import Grid
+import numpy as np
+from data_structures import Grid, calcola_free_runs
+
+# Valori della matrice Chiusura.tipi
+FUORI, CONTESTO, COMPLEMENTO, ORIGINE = range(4)
+
+# Memoria per cella di una Chiusura (liste, tuple e i tre insiemi), usata da Chiusura.stima_byte
+BYTE_PER_CELLA_CHIUSURA = 128
+
+class Chiusura:
+    """
+    Chiusura di 'origin' restituita dai backend di BACKEND_CHIUSURA: contesto e complemento
+    come liste (si spacchetta come la coppia (contesto, complemento)), come maschere e come
+    insiemi.
+    Tutte le rappresentazioni derivano dalla matrice 'tipi' (FUORI, CONTESTO, COMPLEMENTO,
+    ORIGINE per ogni cella), costruita una sola volta alla prima richiesta, oppure fornita
+    dal backend se la calcola già; gli insiemi vengono costruiti solo se richiesti.
+    L'oggetto resta nella cache delle chiusure, quindi sottoproblemi con la stessa
+    (origine, ostacoli proibiti) ne riusano maschere e insiemi.
+    """
+    __slots__ = ("origin", "contesto", "complemento", "shape", "_tipi",
+                 "_set_contesto", "_set_complemento", "_set_chiusura")
+
+    def __init__(self, origin, contesto, complemento, shape, tipi=None):
+        self.origin = origin
+        self.contesto = contesto
+        self.complemento = complemento
+        self.shape = shape
+        self._tipi = tipi
+        self._set_contesto = None
+        self._set_complemento = None
+        self._set_chiusura = None
+
+    def __iter__(self):
+        return iter((self.contesto, self.complemento))
+
+    @property
+    def tipi(self):
+        """Matrice uint8 (rows x cols) con il ruolo di ogni cella nella chiusura."""
+        if self._tipi is None:
+            tipi = np.zeros(self.shape, dtype=np.uint8)
+            for valore, celle in ((CONTESTO, self.contesto), (COMPLEMENTO, self.complemento)):
+                if celle:
+                    rows_idx, cols_idx = zip(*celle)
+                    tipi[list(rows_idx), list(cols_idx)] = valore
+            tipi[self.origin] = ORIGINE
+            self._tipi = tipi
+        return self._tipi
+
+    def stima_byte(self):
+        """
+        Stima per eccesso della memoria occupata dalla chiusura una volta costruite tutte le
+        rappresentazioni: la matrice 'tipi' e, per ogni cella, liste, tuple e insiemi.
+        """
+        return self.shape[0] * self.shape[1] + BYTE_PER_CELLA_CHIUSURA * (len(self.contesto) + len(self.complemento)) + 256
+
+    def tipo(self, cella):
+        """Ruolo di una cella nella chiusura (FUORI, CONTESTO, COMPLEMENTO o ORIGINE)."""
+        return int(self.tipi[cella])
+
+    @property
+    def mask_contesto(self):
+        return self.tipi == CONTESTO
+
+    @property
+    def mask_complemento(self):
+        return self.tipi == COMPLEMENTO
+
+    @property
+    def mask(self):
+        """Maschera dell'intera chiusura: contesto, complemento e origine."""
+        return self.tipi != FUORI
+
+    @property
+    def set_contesto(self):
+        if self._set_contesto is None:
+            self._set_contesto = set(self.contesto)
+        return self._set_contesto
+
+    @property
+    def set_complemento(self):
+        if self._set_complemento is None:
+            self._set_complemento = set(self.complemento)
+        return self._set_complemento
+
+    @property
+    def set_chiusura(self):
+        if self._set_chiusura is None:
+            self._set_chiusura = {self.origin, *self.contesto, *self.complemento}
+        return self._set_chiusura
 
 def calcola_contesto_e_complemento(grid: Grid, origin, forbidden_obstacles=frozenset()):
     """
-    Calcola Contesto e Complemento usando la nuova Grid e gestendo gli ostacoli proibiti.
+    Calcola Contesto e Complemento usando la nuova Grid e gestendo gli ostacoli proibiti:
+    per ogni cella libera controlla con Grid.free_path_type quale dei due cammini liberi
+    (se uno dei due) la raggiunge.
     """
     contesto, complemento = [], []
+    for destination in grid.adj.keys():
+        tipo = grid.free_path_type(origin, destination, forbidden_obstacles)
+        if tipo == 1:
+            contesto.append(destination)
+        elif tipo == 2:
+            complemento.append(destination)
+    return Chiusura(origin, contesto, complemento, (grid.rows, grid.cols))
+
+def _maschera_bloccata(grid: Grid, forbidden_obstacles=frozenset()):
+    """
+    Costruisce la maschera booleana delle celle non attraversabili: ostacoli
+    originali più ostacoli proibiti.
+    """
+    bloccate = ~grid.get_free_mask()
+    if isinstance(forbidden_obstacles, int):
+        if forbidden_obstacles:
+            bloccate |= grid.mask_from_bitset(forbidden_obstacles)
+    elif forbidden_obstacles:
+        rows_idx, cols_idx = zip(*forbidden_obstacles)
+        bloccate[list(rows_idx), list(cols_idx)] = True
+    return bloccate
+
+def _celle_da_maschera(mask):
+    """Converte una maschera booleana nella lista (in ordine di riga) delle sue celle."""
+    return [tuple(cell) for cell in np.argwhere(mask).tolist()]
+
+def calcola_contesto_e_complemento_numpy(grid: Grid, origin, forbidden_obstacles=frozenset()):
+    """
+    Versione vettorizzata di calcola_contesto_e_complemento.
+    Un percorso di tipo 1 (o 2) è un tratto diagonale seguito da un tratto rettilineo
+    (o viceversa): è libero se entrambi i tratti sono più corti della sequenza di celle
+    libere consecutive nella loro direzione. Calcolate queste sequenze una volta per
+    tutta la griglia, la verifica avviene per tutte le destinazioni con operazioni su array.
+    Ritorna le stesse liste, nello stesso ordine, della versione originale.
+    """
+    rows, cols = grid.rows, grid.cols
+    if forbidden_obstacles:
+        runs = calcola_free_runs(_maschera_bloccata(grid, forbidden_obstacles))
+    else:
+        runs = grid.get_free_runs()
+    r0, c0 = origin
+
+    delta_r = np.broadcast_to(np.arange(rows)[:, None] - r0, (rows, cols))
+    delta_c = np.broadcast_to(np.arange(cols)[None, :] - c0, (rows, cols))
+    abs_r, abs_c = np.abs(delta_r), np.abs(delta_c)
+    step_r, step_c = np.sign(delta_r), np.sign(delta_c)
+    num_diag = np.minimum(abs_r, abs_c)
+    num_rect = np.abs(abs_r - abs_c)
+    rect_step_r = np.where(abs_r > abs_c, step_r, 0)
+    rect_step_c = np.where(abs_r > abs_c, 0, step_c)
+
+    # Tipo 1: prima il tratto diagonale da O, poi quello rettilineo dal punto di svolta
+    diag_da_origine = num_diag <= runs[step_r + 1, step_c + 1, r0, c0]
+    svolta_r, svolta_c = r0 + step_r * num_diag, c0 + step_c * num_diag
+    rect_da_svolta = num_rect <= runs[rect_step_r + 1, rect_step_c + 1, svolta_r, svolta_c]
+    tipo1_libero = diag_da_origine & rect_da_svolta
+
+    # Tipo 2: prima il tratto rettilineo da O, poi quello diagonale
+    rect_da_origine = num_rect <= runs[rect_step_r + 1, rect_step_c + 1, r0, c0]
+    svolta_r, svolta_c = r0 + rect_step_r * num_rect, c0 + rect_step_c * num_rect
+    diag_da_svolta = num_diag <= runs[step_r + 1, step_c + 1, svolta_r, svolta_c]
+    tipo2_libero = rect_da_origine & diag_da_svolta
+
+    non_origine = (abs_r + abs_c) > 0
+    contesto = tipo1_libero & non_origine
+    complemento = ~tipo1_libero & tipo2_libero & (num_diag > 0) & (num_rect > 0)
+    tipi = np.where(contesto, CONTESTO, np.where(complemento, COMPLEMENTO, FUORI)).astype(np.uint8)
+    tipi[origin] = ORIGINE
+    return Chiusura(origin, _celle_da_maschera(contesto), _celle_da_maschera(complemento), (rows, cols), tipi)
+
+def _ordine_dal_centro(n, centro):
+    """Indici da 0 a n-1 ordinati per distanza crescente da 'centro'."""
+    return sorted(range(n), key=lambda i: abs(i - centro))
+
+def calcola_contesto_e_complemento_sweep(grid: Grid, origin, forbidden_obstacles=frozenset()):
+    """
+    Calcola Contesto e Complemento con una sola scansione della griglia, in tempo
+    lineare nel numero di celle.
+    Un percorso di tipo 1 verso X è un tratto diagonale seguito da uno rettilineo: se
+    il tratto rettilineo non è vuoto, il percorso verso X è quello verso la cella che
+    precede X sul tratto rettilineo più X stesso, altrimenti quello verso la cella
+    precedente sulla diagonale. Per il tipo 2 vale lo stesso scambiando i due tratti.
+    Scandendo le celle dall'origine verso l'esterno (in ciascun ottante il predecessore
+    è più vicino a O), ogni cella si decide guardando un solo vicino già classificato.
+    Ritorna le stesse liste, nello stesso ordine, della versione originale.
+    """
+    rows, cols = grid.rows, grid.cols
+    r0, c0 = origin
+
+    if isinstance(forbidden_obstacles, int):
+        libere = bytearray((~_maschera_bloccata(grid, forbidden_obstacles)).tobytes())
+    else:
+        libere = bytearray(grid.get_free_mask().tobytes())
+        for r, c in forbidden_obstacles:
+            libere[r * cols + c] = 0
+
+    tipo1 = bytearray(rows * cols)
+    tipo2 = bytearray(rows * cols)
+    tipo1[r0 * cols + c0] = tipo2[r0 * cols + c0] = 1
+    ordine_colonne = _ordine_dal_centro(cols, c0)
+
+    for r in _ordine_dal_centro(rows, r0):
+        abs_r = abs(r - r0)
+        step_r = (r > r0) - (r < r0)
+        for c in ordine_colonne:
+            idx = r * cols + c
+            if not libere[idx] or idx == r0 * cols + c0:
+                continue
+            abs_c = abs(c - c0)
+            step_c = (c > c0) - (c < c0)
+            prec_diag = idx - step_r * cols - step_c
+            if abs_r > abs_c:
+                prec_rect = idx - step_r * cols
+            else:
+                prec_rect = idx - step_c
+            tipo1[idx] = tipo1[prec_rect if abs_r != abs_c else prec_diag]
+            tipo2[idx] = tipo2[prec_diag if abs_r and abs_c else prec_rect]
+
+    contesto, complemento = [], []
+    tipi = bytearray(rows * cols)
+    tipi[r0 * cols + c0] = ORIGINE
     for destination in grid.adj.keys():
         if destination == origin:
             continue
-        path_t1 = path_logic.generate_path_coordinates(origin, destination, True)
-        if path_logic.is_path_free(grid, path_t1, forbidden_obstacles):
+        r, c = destination
+        idx = r * cols + c
+        if tipo1[idx]:
             contesto.append(destination)
-        else:
-            path_t2 = path_logic.generate_path_coordinates(origin, destination, False)
-            if path_logic.is_path_free(grid, path_t2, forbidden_obstacles) and path_t1 != path_t2:
-                complemento.append(destination)
-    return contesto, complemento
-
-def calcola_frontiera(grid: Grid, origin, contesto, complemento, forbidden_obstacles=frozenset()):
-    """
-    Calcola la frontiera escludendo esplicitamente l'origine del sottoproblema
-    dall'essere una cella di frontiera.
-    """
-    chiusura = set(contesto) | set(complemento) | {origin}
-    contesto_set = set(contesto)
-    frontiera_con_tipo = []
-    
-    candidate_frontiera = set(contesto) | set(complemento)
-    
-    for cella_candidata in candidate_frontiera:
-        for neighbor_pos in grid.get_neighbors(cella_candidata):
-            if neighbor_pos not in chiusura and grid.is_traversable(neighbor_pos, forbidden_obstacles):
-                tipo = 1 if cella_candidata in contesto_set else 2
-                frontiera_con_tipo.append((cella_candidata, tipo))
-                break 
-                
-    return frontiera_con_tipo
\ No newline at end of file
+            tipi[idx] = CONTESTO
+        elif tipo2[idx] and r != r0 and c != c0 and abs(r - r0) != abs(c - c0):
+            complemento.append(destination)
+            tipi[idx] = COMPLEMENTO
+    tipi = np.frombuffer(tipi, dtype=np.uint8).reshape(rows, cols)
+    return Chiusura(origin, contesto, complemento, (rows, cols), tipi)
+
+BACKEND_CHIUSURA = {
+    "naive": calcola_contesto_e_complemento,
+    "numpy": calcola_contesto_e_complemento_numpy,
+    "sweep": calcola_contesto_e_complemento_sweep,
+}
+
+def _dilata(mask):
+    """
+    Dilatazione 3x3 di una maschera booleana: vale True sulle celle che sono True o hanno
+    un vicino (anche diagonale) True. Sulla maschera bordata di False il quadrato 3x3 si
+    separa in una passata per righe e una per colonne.
+    """
+    rows, cols = mask.shape
+    bordata = np.zeros((rows + 2, cols + 2), dtype=bool)
+    bordata[1:-1, 1:-1] = mask
+    verticale = bordata[:-2] | bordata[1:-1] | bordata[2:]
+    return verticale[:, :-2] | verticale[:, 1:-1] | verticale[:, 2:]
+
+# Sotto questo numero di celle nella chiusura il costo fisso delle operazioni su array
+# supera quello del controllo diretto dei vicini (vedi calcola_frontiera)
+SOGLIA_FRONTIERA_MASCHERE = 24
+
+def calcola_frontiera(grid: Grid, chiusura: Chiusura, forbidden_obstacles=frozenset()):
+    """
+    Calcola la frontiera della chiusura: le celle di contesto e complemento (l'origine è
+    esclusa) con almeno un vicino attraversabile fuori dalla chiusura, cioè
+        chiusura ∧ dilata(libere ∧ ¬chiusura ∧ ¬proibite).
+    Le chiusure più piccole di SOGLIA_FRONTIERA_MASCHERE vengono invece trattate
+    controllando i vicini di ogni cella con gli insiemi della chiusura.
+    Ritorna la lista (in ordine di riga) di coppie (cella, tipo), con tipo 1 per il
+    contesto e 2 per il complemento.
+    """
+    if len(chiusura.contesto) + len(chiusura.complemento) < SOGLIA_FRONTIERA_MASCHERE:
+        return _calcola_frontiera_vicini(grid, chiusura, forbidden_obstacles)
+    tipi = chiusura.tipi
+    nella_chiusura = tipi != FUORI
+    frontiera = _dilata(~(_maschera_bloccata(grid, forbidden_obstacles) | nella_chiusura))
+    frontiera &= nella_chiusura
+    frontiera[chiusura.origin] = False
+    rows_idx, cols_idx = np.nonzero(frontiera)
+    return list(zip(zip(rows_idx.tolist(), cols_idx.tolist()), tipi[frontiera].tolist()))
+
+def _calcola_frontiera_vicini(grid: Grid, chiusura: Chiusura, forbidden_obstacles):
+    """Frontiera di una chiusura piccola, con lo stesso risultato di calcola_frontiera."""
+    nella_chiusura = chiusura.set_chiusura
+    frontiera = []
+    for tipo, celle in ((CONTESTO, chiusura.contesto), (COMPLEMENTO, chiusura.complemento)):
+        for cella in celle:
+            for vicino in grid.get_neighbors(cella):
+                if vicino not in nella_chiusura and grid.is_traversable(vicino, forbidden_obstacles):
+                    frontiera.append((cella, tipo))
+                    break
+    frontiera.sort()
+    return frontiera
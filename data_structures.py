@@ -1,4 +1,80 @@
 import math
+from collections import OrderedDict
+from collections.abc import Mapping
+import numpy as np
+
+# Bit complessivi dei "pettini" di _tratto_proibito tenuti in cache da ogni Grid (16 MiB):
+# oltre questo limite vengono scartati quelli usati meno di recente
+MAX_BIT_PETTINI = 1 << 27
+
+def _bit_attivo(bitset, idx):
+    """
+    Controlla il bit 'idx' di un bitset intero senza copiarlo tutto: gli interi Python
+    non hanno un accesso O(1) al singolo bit, e sia (bitset >> idx) sia 1 << idx
+    costano quanto i bit che producono. Se idx supera il bit più alto la risposta è
+    immediata, altrimenti si sceglie la strada più corta, quindi il costo è al più
+    quello di metà del bitset.
+    """
+    lunghezza = bitset.bit_length()
+    if idx >= lunghezza:
+        return False
+    if 2 * idx >= lunghezza:
+        return bool((bitset >> idx) & 1)
+    return bool(bitset & (1 << idx))
+
+def _run_verso_il_basso(bloccate):
+    """
+    Per ogni cella conta le celle libere consecutive che si incontrano scendendo
+    lungo la colonna (esclusa la cella di partenza).
+    """
+    rows = bloccate.shape[0]
+    indici_righe = np.arange(rows)[:, None]
+    posizioni = np.where(bloccate, indici_righe, rows)
+    prossimo_ostacolo = np.minimum.accumulate(posizioni[::-1], axis=0)[::-1]
+    dopo = np.full_like(prossimo_ostacolo, rows)
+    dopo[:-1] = prossimo_ostacolo[1:]
+    return dopo - indici_righe - 1
+
+def _run_direzione(bloccate, dr, dc):
+    """
+    Calcola, per ogni cella, il numero di celle libere consecutive incontrate
+    muovendosi nella direzione (dr, dc). Le direzioni vengono ricondotte a
+    "basso", "destra" o "diagonale basso-destra" ribaltando la matrice; la
+    diagonale viene trattata inclinando la matrice in modo che diventi una colonna.
+    """
+    b = bloccate
+    if dr < 0: b = b[::-1, :]
+    if dc < 0: b = b[:, ::-1]
+
+    if dr == 0:
+        run = _run_verso_il_basso(b.T).T
+    elif dc == 0:
+        run = _run_verso_il_basso(b)
+    else:
+        rows, cols = b.shape
+        r_idx = np.arange(rows)[:, None]
+        j_idx = np.arange(cols)[None, :] - r_idx + rows - 1
+        inclinata = np.ones((rows, rows + cols - 1), dtype=bool)
+        inclinata[r_idx, j_idx] = b
+        run = _run_verso_il_basso(inclinata)[r_idx, j_idx]
+
+    if dr < 0: run = run[::-1, :]
+    if dc < 0: run = run[:, ::-1]
+    return run
+
+def calcola_free_runs(bloccate, dtype=np.int64):
+    """
+    Ritorna un array (3, 3, rows, cols) indicizzato con (dr + 1, dc + 1) che contiene
+    le celle libere consecutive in ognuna delle 8 direzioni. La "direzione" (0, 0)
+    vale rows + cols, così un tratto di lunghezza nulla risulta sempre libero.
+    """
+    rows, cols = bloccate.shape
+    runs = np.full((3, 3, rows, cols), rows + cols, dtype=dtype)
+    for dr in (-1, 0, 1):
+        for dc in (-1, 0, 1):
+            if dr or dc:
+                runs[dr + 1, dc + 1] = _run_direzione(bloccate, dr, dc)
+    return runs
 
 class Grid:
     """
@@ -9,13 +85,21 @@ class Grid:
         self.rows = rows
         self.cols = cols
         self.adj = {} # La nostra lista di adiacenze
+        self._free_mask = None # Maschera numpy delle celle libere, calcolata su richiesta
+        self._free_runs = None # Tabella delle celle libere consecutive, calcolata su richiesta
+        self._pettini = OrderedDict() # Pettini di _tratto_proibito, in ordine di ultimo uso
+        self._bit_pettini = 0
 
     @classmethod
-    def from_matrix(cls, grid_data):
+    def from_matrix(cls, grid_data, compact=False):
         """
         Metodo factory per creare e popolare la Grid (con la sua lista di adiacenze)
         a partire da una matrice numerica di ostacoli.
+        Con compact=True restituisce invece una CompactGrid, che non materializza
+        la lista di adiacenze.
         """
+        if compact:
+            return CompactGrid.from_matrix(grid_data)
         rows = len(grid_data)
         cols = len(grid_data[0]) if rows > 0 else 0
         
@@ -53,13 +137,226 @@ class Grid:
         """
         Controlla se una cella è nel grafo (quindi non è un ostacolo originale)
         E non è un ostacolo temporaneo (proibito).
+        Gli ostacoli proibiti possono essere un insieme di coordinate oppure un
+        bitset intero indicizzato con cell_id.
+        """
+        if coords not in self.adj:
+            return False
+        if isinstance(forbidden_obstacles, int):
+            return not _bit_attivo(forbidden_obstacles, coords[0] * self.cols + coords[1])
+        return coords not in forbidden_obstacles
+
+    def cell_id(self, coords):
+        """Restituisce l'indice della cella in ordine di riga, usato nei bitset."""
+        return coords[0] * self.cols + coords[1]
+
+    def bitset_from_cells(self, cells):
+        """Costruisce il bitset intero (bit cell_id a 1) di un insieme di celle."""
+        buffer = bytearray((self.rows * self.cols + 7) // 8)
+        cols = self.cols
+        for r, c in cells:
+            idx = r * cols + c
+            buffer[idx >> 3] |= 1 << (idx & 7)
+        return int.from_bytes(buffer, "little")
+
+    def bitset_from_mask(self, mask):
+        """Costruisce il bitset intero di una maschera booleana (rows x cols)."""
+        packed = np.packbits(np.asarray(mask, dtype=bool).reshape(-1), bitorder="little")
+        return int.from_bytes(packed.tobytes(), "little")
+
+    def mask_from_bitset(self, bits):
+        """Converte un bitset intero nella corrispondente maschera booleana (rows x cols)."""
+        n = self.rows * self.cols
+        packed = np.frombuffer(bits.to_bytes((n + 7) // 8, "little"), dtype=np.uint8)
+        return np.unpackbits(packed, count=n, bitorder="little").astype(bool).reshape(self.rows, self.cols)
+
+    def cells_from_bitset(self, bits):
+        """Restituisce la lista (in ordine di riga) delle celle presenti nel bitset."""
+        return [tuple(cell) for cell in np.argwhere(self.mask_from_bitset(bits)).tolist()]
+
+    def get_free_mask(self):
+        """
+        Restituisce una maschera booleana numpy (rows x cols) che vale True sulle
+        celle attraversabili. Viene calcolata una sola volta e poi riutilizzata.
         """
-        return coords in self.adj and coords not in forbidden_obstacles
+        if self._free_mask is None:
+            mask = np.zeros((self.rows, self.cols), dtype=bool)
+            if self.adj:
+                rows_idx, cols_idx = zip(*self.adj.keys())
+                mask[list(rows_idx), list(cols_idx)] = True
+            self._free_mask = mask
+        return self._free_mask
 
     def get_neighbors(self, coords):
         """Restituisce i vicini di una cella dalla lista di adiacenze."""
         return self.adj.get(coords, {})
 
+    def get_free_runs(self):
+        """
+        Restituisce la tabella (3, 3, rows, cols) delle celle libere consecutive che si
+        incontrano partendo da ogni cella (esclusa) in ognuna delle 8 direzioni, indicizzata
+        con (dr + 1, dc + 1, r, c) come calcola_free_runs. Viene calcolata una sola volta e
+        poi aggiornata localmente da set_obstacle e clear_obstacle.
+        """
+        if self._free_runs is None:
+            self._free_runs = calcola_free_runs(~self.get_free_mask(), dtype=np.int32)
+        return self._free_runs
+
+    def _aggiorna_free_runs(self, coords):
+        """
+        Aggiorna la tabella delle celle libere consecutive dopo la modifica di 'coords':
+        cambiano solo le celle che la precedono in una delle 8 direzioni, e lungo ogni
+        direzione ci si ferma alla prima cella il cui valore non cambia.
+        """
+        if self._free_runs is None:
+            return
+        libere = self.get_free_mask()
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if not (dr or dc):
+                    continue
+                runs = self._free_runs[dr + 1, dc + 1]
+                r, c = coords[0] - dr, coords[1] - dc
+                while 0 <= r < self.rows and 0 <= c < self.cols:
+                    valore = runs[r + dr, c + dc] + 1 if libere[r + dr, c + dc] else 0
+                    if runs[r, c] == valore:
+                        break
+                    runs[r, c] = valore
+                    r, c = r - dr, c - dc
+
+    def _tratto_proibito(self, forbidden_obstacles, r, c, dr, dc, n):
+        """
+        Controlla se una delle n celle che seguono (r, c) nella direzione (dr, dc) è
+        tra gli ostacoli proibiti. Con un bitset le celle del tratto hanno cell_id in
+        progressione aritmetica, quindi basta un AND con un "pettine" di n bit distanti
+        quanto il passo (calcolato una volta per passo e lunghezza e tenuto in una cache
+        LRU di al massimo MAX_BIT_PETTINI bit). Come in _bit_attivo il pettine viene
+        allineato spostando la parte più corta tra il bitset sopra il tratto e il tratto
+        stesso, e un tratto oltre il bit più alto non costa nulla.
+        """
+        if not isinstance(forbidden_obstacles, int):
+            return any((r + k * dr, c + k * dc) in forbidden_obstacles for k in range(1, n + 1))
+        passo = dr * self.cols + dc
+        primo = (r + dr) * self.cols + c + dc
+        if passo < 0:
+            primo += (n - 1) * passo
+            passo = -passo
+        chiave = (passo, n)
+        pettine = self._pettini.get(chiave)
+        if pettine is None:
+            pettine = self._aggiungi_pettine(chiave)
+        else:
+            self._pettini.move_to_end(chiave)
+        lunghezza = forbidden_obstacles.bit_length()
+        if primo >= lunghezza:
+            return False
+        if 2 * primo >= lunghezza:
+            return bool((forbidden_obstacles >> primo) & pettine)
+        return bool(forbidden_obstacles & (pettine << primo))
+
+    def _aggiungi_pettine(self, chiave):
+        """Calcola il pettine (passo, n) e lo mette in cache, scartando i meno usati se si supera MAX_BIT_PETTINI."""
+        passo, n = chiave
+        pettine = ((1 << passo * n) - 1) // ((1 << passo) - 1)
+        bit = passo * n
+        if bit > MAX_BIT_PETTINI:
+            return pettine
+        while self._bit_pettini + bit > MAX_BIT_PETTINI:
+            (vecchio_passo, vecchio_n), _ = self._pettini.popitem(last=False)
+            self._bit_pettini -= vecchio_passo * vecchio_n
+        self._pettini[chiave] = pettine
+        self._bit_pettini += bit
+        return pettine
+
+    def is_free_path(self, origin, destination, diagonal_first, forbidden_obstacles=frozenset()):
+        """
+        Controlla se è libero il cammino da origin a destination che fa prima le mosse
+        diagonali (diagonal_first=True, tipo 1) o prima quelle rettilinee (tipo 2), come
+        path_logic.is_path_free sulle coordinate di path_logic.generate_path_coordinates
+        (l'origine non viene controllata). Ogni tratto si verifica con una lettura della
+        tabella di get_free_runs più, se ci sono ostacoli proibiti, il controllo del tratto.
+        """
+        r, c = origin
+        delta_r, delta_c = destination[0] - r, destination[1] - c
+        abs_r, abs_c = abs(delta_r), abs(delta_c)
+        step_r, step_c = (delta_r > 0) - (delta_r < 0), (delta_c > 0) - (delta_c < 0)
+        tratti = [(step_r, step_c, min(abs_r, abs_c))]
+        if abs_r > abs_c:
+            tratti.append((step_r, 0, abs_r - abs_c))
+        else:
+            tratti.append((0, step_c, abs_c - abs_r))
+        if not diagonal_first:
+            tratti.reverse()
+
+        runs = self.get_free_runs()
+        for dr, dc, n in tratti:
+            if n == 0:
+                continue
+            if runs[dr + 1, dc + 1, r, c] < n:
+                return False
+            if forbidden_obstacles and self._tratto_proibito(forbidden_obstacles, r, c, dr, dc, n):
+                return False
+            r, c = r + n * dr, c + n * dc
+        return True
+
+    def free_path_type(self, origin, destination, forbidden_obstacles=frozenset()):
+        """
+        Raggiungibilità diretta di destination da origin, con la stessa definizione di
+        contesto e complemento (vedi closure_logic): 1 se è libero il cammino di tipo 1,
+        2 se è libero solo quello di tipo 2 ed è diverso dal tipo 1, 0 altrimenti
+        (anche se origin == destination).
+        """
+        if origin == destination:
+            return 0
+        if self.is_free_path(origin, destination, True, forbidden_obstacles):
+            return 1
+        delta_r, delta_c = abs(destination[0] - origin[0]), abs(destination[1] - origin[1])
+        if delta_r and delta_c and delta_r != delta_c and self.is_free_path(origin, destination, False, forbidden_obstacles):
+            return 2
+        return 0
+
+    def _verifica_cella(self, coords):
+        if not self.is_within_bounds(coords):
+            raise ValueError(f"Cella {coords} fuori dalla griglia {self.rows}x{self.cols}.")
+
+    def set_obstacle(self, coords):
+        """
+        Trasforma la cella in un ostacolo, togliendola dalla lista di adiacenze insieme
+        agli archi dei suoi (al più 8) vicini: costo O(1).
+        Ritorna False se la cella era già un ostacolo.
+        """
+        self._verifica_cella(coords)
+        if coords not in self.adj:
+            return False
+        for vicino in self.adj.pop(coords):
+            del self.adj[vicino][coords]
+        if self._free_mask is not None:
+            self._free_mask[coords] = False
+        self._aggiorna_free_runs(coords)
+        return True
+
+    def clear_obstacle(self, coords):
+        """
+        Libera la cella, aggiungendola alla lista di adiacenze con gli archi verso i suoi
+        vicini liberi (in entrambe le direzioni): costo O(1).
+        Ritorna False se la cella era già libera.
+        """
+        self._verifica_cella(coords)
+        if coords in self.adj:
+            return False
+        r, c = coords
+        vicini = {}
+        for dr, dc, cost in MOSSE_8:
+            vicino = (r + dr, c + dc)
+            if vicino in self.adj:
+                vicini[vicino] = cost
+                self.adj[vicino][coords] = cost
+        self.adj[coords] = vicini
+        if self._free_mask is not None:
+            self._free_mask[coords] = True
+        self._aggiorna_free_runs(coords)
+        return True
+
     def is_within_bounds(self, coords):
         """Controlla se una coordinata è dentro i limiti della griglia."""
         r, c = coords
@@ -87,3 +384,158 @@ class Grid:
                     matrix[r][c] = value
                     
         return matrix
+
+
+MOSSE_8 = [
+    (-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+    (-1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (1, 1, math.sqrt(2))
+]
+
+class _AdiacenzeCompatte(Mapping):
+    """
+    Vista di sola lettura che espone una CompactGrid con la stessa interfaccia del
+    dizionario di adiacenze di Grid ({coord: {neighbor_coord: cost}}). I vicini
+    vengono calcolati al momento dalla maschera degli ostacoli.
+    """
+    def __init__(self, grid):
+        self._grid = grid
+
+    def __getitem__(self, coords):
+        if not self._grid.is_traversable(coords):
+            raise KeyError(coords)
+        return self._grid.get_neighbors(coords)
+
+    def __contains__(self, coords):
+        return self._grid.is_traversable(coords)
+
+    def __iter__(self):
+        cols = self._grid.cols
+        for idx in np.flatnonzero(self._grid.obstacles == 0).tolist():
+            yield divmod(idx, cols)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._grid.obstacles == 0))
+
+class CompactGrid(Grid):
+    """
+    Variante compatta di Grid: la griglia è memorizzata come maschera piatta di
+    ostacoli (un uint8 per cella, 1 = ostacolo) e i vicini sono ricavati dagli
+    8 spostamenti possibili invece che da una lista di adiacenze.
+    'adj' resta disponibile come vista in sola lettura, quindi il resto del codice
+    può usare indifferentemente Grid o CompactGrid.
+    """
+    def __init__(self, rows, cols, obstacles=None):
+        """
+        :param obstacles: maschera degli ostacoli di rows * cols elementi (array numpy,
+                          bytearray o altro buffer). Se è già un buffer di uint8 contiguo
+                          viene usata senza copie.
+        """
+        self.rows = rows
+        self.cols = cols
+        if obstacles is None:
+            obstacles = np.zeros(rows * cols, dtype=np.uint8)
+        elif not isinstance(obstacles, np.ndarray):
+            obstacles = np.frombuffer(obstacles, dtype=np.uint8)
+        self.obstacles = obstacles.reshape(-1)
+        self._celle = memoryview(self.obstacles)
+        self.adj = _AdiacenzeCompatte(self)
+        self._free_mask = None
+        self._free_runs = None
+        self._pettini = OrderedDict()
+        self._bit_pettini = 0
+
+    @classmethod
+    def from_matrix(cls, grid_data, compact=True):
+        """
+        Crea una CompactGrid da una matrice di ostacoli (0 = libero, 1 = ostacolo).
+        Un array numpy contiguo di tipo uint8, int8 o bool viene condiviso senza copie.
+        """
+        if isinstance(grid_data, np.ndarray) and grid_data.ndim == 2:
+            rows, cols = grid_data.shape
+            if grid_data.dtype in (np.uint8, np.int8, np.bool_) and grid_data.flags.c_contiguous:
+                obstacles = grid_data.view(np.uint8)
+            else:
+                obstacles = (grid_data == 1).astype(np.uint8)
+        else:
+            rows = len(grid_data)
+            cols = len(grid_data[0]) if rows > 0 else 0
+            obstacles = (np.asarray(grid_data, dtype=np.uint8).reshape(rows, cols) == 1).astype(np.uint8)
+        return cls(rows, cols, obstacles)
+
+    def is_traversable(self, coords, forbidden_obstacles=frozenset()):
+        """
+        Controlla se una cella è dentro la griglia, non è un ostacolo originale
+        e non è un ostacolo temporaneo (proibito).
+        """
+        r, c = coords
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            return False
+        idx = r * self.cols + c
+        if self._celle[idx]:
+            return False
+        if isinstance(forbidden_obstacles, int):
+            return not _bit_attivo(forbidden_obstacles, idx)
+        return coords not in forbidden_obstacles
+
+    def get_neighbors(self, coords):
+        """Restituisce i vicini attraversabili di una cella con il relativo costo."""
+        r, c = coords
+        if not self.is_traversable(coords):
+            return {}
+        neighbors = {}
+        for dr, dc, cost in MOSSE_8:
+            vicino = (r + dr, c + dc)
+            if self.is_traversable(vicino):
+                neighbors[vicino] = cost
+        return neighbors
+
+    def _imposta_cella(self, coords, valore):
+        """
+        Scrive 'valore' (1 = ostacolo) nella maschera della cella. Se la maschera è in sola
+        lettura (ad esempio una vista di un corpus) viene prima copiata.
+        Ritorna False se la cella aveva già quel valore.
+        """
+        self._verifica_cella(coords)
+        idx = coords[0] * self.cols + coords[1]
+        if self._celle[idx] == valore:
+            return False
+        if not self.obstacles.flags.writeable:
+            self.obstacles = self.obstacles.copy()
+            self._celle = memoryview(self.obstacles)
+        self.obstacles[idx] = valore
+        if self._free_mask is not None:
+            self._free_mask[coords] = not valore
+        self._aggiorna_free_runs(coords)
+        return True
+
+    def set_obstacle(self, coords):
+        """
+        Trasforma la cella in un ostacolo: i vicini sono ricavati dalla maschera, quindi
+        basta aggiornarne un elemento. Una maschera condivisa senza copie (vedi from_matrix)
+        viene modificata anche per chi la condivide.
+        Ritorna False se la cella era già un ostacolo.
+        """
+        return self._imposta_cella(coords, 1)
+
+    def clear_obstacle(self, coords):
+        """Libera la cella aggiornando la maschera. Ritorna False se la cella era già libera."""
+        return self._imposta_cella(coords, 0)
+
+    def get_free_mask(self):
+        """Restituisce la maschera booleana (rows x cols) delle celle attraversabili."""
+        if self._free_mask is None:
+            self._free_mask = self.obstacles.reshape(self.rows, self.cols) == 0
+        return self._free_mask
+
+    def to_matrix(self, custom_values=None, default_obstacle_val=1, default_free_val=0):
+        """
+        Converte la maschera degli ostacoli in una matrice numerica (lista di liste),
+        con gli stessi parametri di Grid.to_matrix.
+        """
+        matrix = np.where(self.obstacles.reshape(self.rows, self.cols) != 0,
+                          default_obstacle_val, default_free_val).tolist()
+        if custom_values:
+            for (r, c), value in custom_values.items():
+                if 0 <= r < self.rows and 0 <= c < self.cols:
+                    matrix[r][c] = value
+        return matrix
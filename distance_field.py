@@ -0,0 +1,306 @@
+import math
+import time
+import numpy as np
+from data_structures import Grid
+import closure_logic
+import graph_search
+import path_logic
+
+class _NodoCampo:
+    """
+    Sottoproblema CAMMINOMIN(origin, *) con un dato insieme di ostacoli proibiti, risolto
+    per molte destinazioni insieme. La frontiera viene calcolata dalla chiusura solo la
+    prima volta che una destinazione cade fuori dalla chiusura.
+    I risultati sono memorizzati solo per le celle richieste al nodo, in array paralleli
+    ordinati per indice di cella ('celle'):
+        - distanze: miglior lunghezza trovata da origin (inf se nessuna);
+        - scelta: indice nella frontiera della cella attraverso cui passa il cammino (-1 se nessuna);
+        - costo_calcolo: costo accumulato dalla radice con cui la cella è stata risolta
+          (inf se mai risolta, -inf se risolta senza pruning globale).
+    Il tipo di una cella (1 contesto, 2 complemento, 0 fuori) si legge dalla chiusura.
+    """
+    __slots__ = ("origin", "forbidden_obstacles", "chiusura", "frontiera", "new_forbidden_obstacles",
+                 "celle", "distanze", "scelta", "costo_calcolo")
+
+    def __init__(self, origin, forbidden_obstacles):
+        self.origin = origin
+        self.forbidden_obstacles = forbidden_obstacles
+        self.chiusura = None
+        self.frontiera = None
+        self.new_forbidden_obstacles = forbidden_obstacles
+        self.celle = np.zeros(0, dtype=np.int64)
+        self.distanze = np.zeros(0)
+        self.scelta = np.zeros(0, dtype=np.int32)
+        self.costo_calcolo = np.zeros(0)
+
+    def tipo(self, celle):
+        """Tipo (1 contesto, 2 complemento, 0 fuori) delle celle di indice 'celle'; l'origine vale 1."""
+        tipo = self.chiusura.tipi.reshape(-1)[celle]
+        return np.where(tipo == closure_logic.ORIGINE, closure_logic.CONTESTO, tipo)
+
+    def posizioni(self, celle):
+        """
+        Posizioni di 'celle' negli array del nodo, aggiungendo quelle non ancora presenti.
+        Gli array possono essere sostituiti: vanno letti dopo la chiamata.
+        """
+        posizioni = np.searchsorted(self.celle, celle)
+        if self.celle.size:
+            presenti = self.celle[np.minimum(posizioni, self.celle.size - 1)] == celle
+            if np.all(presenti):
+                return posizioni
+            nuove = np.unique(celle[~presenti])
+        else:
+            nuove = np.unique(celle)
+        ordine = np.argsort(np.concatenate((self.celle, nuove)), kind="stable")
+        self.celle = np.concatenate((self.celle, nuove))[ordine]
+        self.distanze = np.concatenate((self.distanze, np.full(nuove.size, np.inf)))[ordine]
+        self.scelta = np.concatenate((self.scelta, np.full(nuove.size, -1, dtype=np.int32)))[ordine]
+        self.costo_calcolo = np.concatenate((self.costo_calcolo, np.full(nuove.size, np.inf)))[ordine]
+        return np.searchsorted(self.celle, celle)
+
+class DistanceFieldSolver:
+    """
+    Calcola con CAMMINOMIN le lunghezze minime da un'origine verso tutte le celle libere
+    in un'unica visita, invece di un PathfindingSolver per ogni destinazione.
+    Chiusura e frontiera di ogni sottoproblema (origine, ostacoli proibiti) non dipendono
+    dalla destinazione, quindi vengono calcolate una sola volta e ogni sottoproblema
+    risolve insieme, con operazioni NumPy, tutte le destinazioni che lo attraversano.
+    Pruning locale e globale sono quelli di PathfindingSolver applicati cella per cella:
+    una cella di frontiera F viene esplorata solo per le destinazioni che potrebbe migliorare.
+    """
+    def __init__(self, grid_data, origin, closure_backend="naive", compact_grid=False, closure_cache=None):
+        """
+        I parametri hanno lo stesso significato di quelli di PathfindingSolver;
+        'closure_cache' può essere condivisa con i solver di una session.GridSession.
+        """
+        if closure_backend not in closure_logic.BACKEND_CHIUSURA:
+            raise ValueError(f"Backend di chiusura '{closure_backend}' non valido. "
+                             f"Backend disponibili: {list(closure_logic.BACKEND_CHIUSURA.keys())}")
+        if isinstance(grid_data, Grid):
+            self.grid = grid_data
+        else:
+            self.grid = Grid.from_matrix(grid_data, compact=compact_grid)
+        self.origin = origin
+        self.closure_backend = closure_backend
+        self._calcola_contesto_e_complemento = closure_logic.BACKEND_CHIUSURA[closure_backend]
+        self.closure_cache = closure_cache
+
+        num_celle = self.grid.rows * self.grid.cols
+        self._righe, self._colonne = np.divmod(np.arange(num_celle), self.grid.cols)
+        self._nodi = {}
+        self._radice = None
+        self._ripiego = None
+        self._celle_ripiego = np.zeros(num_celle, dtype=bool)
+        self._incumbent = np.full(num_celle, np.inf)
+        self._use_pruning = True
+        self._use_branch_and_bound = True
+
+        self.stats = {
+            "execution_time": 0.0,
+            "recursive_calls": 0,
+            "cache_hits": 0,
+            "pruning_successes": 0,
+            "pruning_successes_local": 0,
+            "pruning_successes_global": 0,
+            "max_recursion_depth": 0,
+            "seed_fallbacks": 0
+        }
+        self.distanze = None
+        self.upper_bound = None
+
+    def solve(self, targets=None, use_pruning=True, use_branch_and_bound=True, seed_upper_bound=True):
+        """
+        Risolve CAMMINOMIN dall'origine verso tutte le celle libere (o solo verso le celle
+        'targets', se indicate) e restituisce un array numpy (rows, cols) di float con le
+        lunghezze minime: inf per ostacoli, celle irraggiungibili e celle non richieste.
+        'use_branch_and_bound' attiva il pruning globale con un incumbent per ogni cella.
+        'seed_upper_bound' inizializza gli incumbent con le distanze di Dijkstra
+        dall'origine, come l'opzione omonima di PathfindingSolver.solve: le celle non
+        raggiungibili sul grafo restano subito infinite e quelle per cui CAMMINOMIN non
+        trova un cammino entro il limite vengono risolte di nuovo senza.
+        Chiamate successive con altre destinazioni riusano i sottoproblemi già risolti.
+        """
+        start_time = time.perf_counter()
+        num_celle = self.grid.rows * self.grid.cols
+        if targets is None:
+            richieste = np.flatnonzero(self.grid.get_free_mask().reshape(-1))
+        else:
+            richieste = np.array([r * self.grid.cols + c for r, c in targets
+                                  if self.grid.is_traversable((r, c), 0)], dtype=np.int64)
+        if not self.grid.is_traversable(self.origin, 0):
+            richieste = richieste[:0]
+
+        self._use_pruning = use_pruning
+        self._use_branch_and_bound = use_branch_and_bound or seed_upper_bound
+        limite = None
+        if seed_upper_bound and richieste.size:
+            distanze_grafo, _ = graph_search.dijkstra(self.grid, self.origin)
+            self.upper_bound = np.full(num_celle, np.inf)
+            self.upper_bound[[r * self.grid.cols + c for r, c in distanze_grafo]] = list(distanze_grafo.values())
+            richieste = richieste[np.isfinite(self.upper_bound[richieste])]
+            # Stessa tolleranza di PathfindingSolver.solve sulle somme in virgola mobile
+            limite = self.upper_bound * (1 + 1e-9) + 1e-9
+            self._incumbent = np.minimum(self._incumbent, limite)
+
+        if richieste.size:
+            self._radice = self._risolvi(self.origin, 0, richieste, 0, 0.0)
+            if limite is not None:
+                posizioni = self._radice.posizioni(richieste)
+                falliti = richieste[self._radice.distanze[posizioni] >= limite[richieste]]
+                if falliti.size:
+                    self.stats["seed_fallbacks"] += falliti.size
+                    self._risolvi_senza_limite(falliti, use_pruning, use_branch_and_bound)
+
+        distanze = np.full(num_celle, np.inf)
+        if self._radice is not None:
+            calcolate = self._radice.costo_calcolo < np.inf
+            distanze[self._radice.celle[calcolate]] = self._radice.distanze[calcolate]
+        if self._ripiego is not None:
+            distanze[self._celle_ripiego] = self._ripiego.distanze.reshape(-1)[self._celle_ripiego]
+        self.distanze = distanze.reshape(self.grid.rows, self.grid.cols)
+        self.stats["execution_time"] += time.perf_counter() - start_time
+        return self.distanze
+
+    def _risolvi_senza_limite(self, celle, use_pruning, use_branch_and_bound):
+        """Risolve di nuovo, senza il limite di Dijkstra, le celle per cui la ricerca limitata non è esatta."""
+        if self._ripiego is None:
+            self._ripiego = DistanceFieldSolver(self.grid, self.origin, self.closure_backend,
+                                                closure_cache=self.closure_cache)
+        self._celle_ripiego[celle] = True
+        targets = [(int(r), int(c)) for r, c in zip(self._righe[celle], self._colonne[celle])]
+        self._ripiego.solve(targets, use_pruning, use_branch_and_bound, seed_upper_bound=False)
+
+    def sequenza_landmark(self, destination):
+        """
+        Ricostruisce la sequenza di landmark del cammino minimo verso 'destination'
+        (già risolta da solve), nello stesso formato di PathfindingSolver.sequenza_landmark.
+        A parità di lunghezza la sequenza può differire da quella scelta da PathfindingSolver.
+        """
+        if self.distanze is None:
+            raise ValueError("Nessun campo di distanze calcolato: chiamare prima solve().")
+        if self.distanze[destination] == np.inf:
+            return []
+        if destination == self.origin:
+            return [(self.origin, 1)]
+        cella = destination[0] * self.grid.cols + destination[1]
+        if self._celle_ripiego[cella]:
+            return self._ripiego.sequenza_landmark(destination)
+
+        sequenza = [(self.origin, 0)]
+        nodo = self._radice
+        while nodo.tipo(cella) == 0:
+            posizione = nodo.posizioni(cella)
+            f_pos, f_type = nodo.frontiera[nodo.scelta[posizione]]
+            sequenza.append((f_pos, f_type))
+            nodo = self._nodi[(f_pos, nodo.new_forbidden_obstacles)]
+        sequenza.append((destination, int(nodo.tipo(cella))))
+        return sequenza
+
+    def _distanze_libere(self, origin, celle):
+        """Distanza libera (vedi path_logic.calcola_distanza_libera) tra 'origin' e le celle di indice 'celle'."""
+        delta_r = np.abs(self._righe[celle] - origin[0])
+        delta_c = np.abs(self._colonne[celle] - origin[1])
+        delta_min = np.minimum(delta_r, delta_c)
+        return math.sqrt(2) * delta_min + (np.maximum(delta_r, delta_c) - delta_min)
+
+    def _calcola_chiusura(self, origin, forbidden_obstacles):
+        """Contesto e complemento di 'origin', passando per la cache delle chiusure se presente."""
+        if self.closure_cache is None:
+            return self._calcola_contesto_e_complemento(self.grid, origin, forbidden_obstacles)
+        key = (origin, forbidden_obstacles)
+        chiusura = self.closure_cache.get(key)
+        if chiusura is None:
+            chiusura = self._calcola_contesto_e_complemento(self.grid, origin, forbidden_obstacles)
+            self.closure_cache[key] = chiusura
+        return chiusura
+
+    def _nuovo_nodo(self, origin, forbidden_obstacles):
+        """Crea il nodo del sottoproblema calcolandone la chiusura (la frontiera solo quando serve)."""
+        nodo = _NodoCampo(origin, forbidden_obstacles)
+        nodo.chiusura = self._calcola_chiusura(origin, forbidden_obstacles)
+        return nodo
+
+    def _risolvi(self, origin, forbidden_obstacles, richieste, depth, costo_accumulato):
+        """
+        Risolve il sottoproblema (origin, forbidden_obstacles) per le destinazioni di indice
+        'richieste' e restituisce il suo nodo.
+        Con il pruning globale il valore di una cella dipende dal costo accumulato dalla
+        radice: un valore calcolato con costo c resta valido per ogni costo >= c (il pruning
+        non può che aumentare), altrimenti la cella viene risolta di nuovo. Senza pruning
+        globale i valori sono esatti e non vengono mai ricalcolati.
+        """
+        self.stats["recursive_calls"] += 1
+        if depth > self.stats["max_recursion_depth"]:
+            self.stats["max_recursion_depth"] = depth
+        costo_calcolo = costo_accumulato if self._use_branch_and_bound else -np.inf
+
+        key = (origin, forbidden_obstacles)
+        nodo = self._nodi.get(key)
+        if nodo is None:
+            nodo = self._nodi[key] = self._nuovo_nodo(origin, forbidden_obstacles)
+            posizioni = nodo.posizioni(richieste)
+        else:
+            posizioni = nodo.posizioni(richieste)
+            da_risolvere = nodo.costo_calcolo[posizioni] > costo_calcolo
+            richieste, posizioni = richieste[da_risolvere], posizioni[da_risolvere]
+            if richieste.size == 0:
+                self.stats["cache_hits"] += 1
+                return nodo
+
+        # Casi base: destinazioni nella chiusura (o l'origine stessa)
+        nella_chiusura = nodo.tipo(richieste) > 0
+        base, pos_base = richieste[nella_chiusura], posizioni[nella_chiusura]
+        nodo.distanze[pos_base] = self._distanze_libere(origin, base)
+        nodo.costo_calcolo[pos_base] = -np.inf
+        if self._use_branch_and_bound:
+            self._incumbent[base] = np.minimum(self._incumbent[base], costo_accumulato + nodo.distanze[pos_base])
+        resto, pos_resto = richieste[~nella_chiusura], posizioni[~nella_chiusura]
+
+        if resto.size:
+            if nodo.frontiera is None:
+                nodo.frontiera = closure_logic.calcola_frontiera(self.grid, nodo.chiusura, forbidden_obstacles)
+                nodo.new_forbidden_obstacles = forbidden_obstacles | self.grid.bitset_from_mask(nodo.chiusura.mask)
+            self._esplora_frontiera(nodo, resto, pos_resto, depth, costo_accumulato)
+            nodo.costo_calcolo[pos_resto] = costo_calcolo
+        return nodo
+
+    def _esplora_frontiera(self, nodo, resto, pos_resto, depth, costo_accumulato):
+        """
+        Ciclo sulla frontiera per le destinazioni 'resto', che sono fuori dalla chiusura e
+        occupano le posizioni 'pos_resto' negli array del nodo. Le posizioni restano valide
+        durante la ricorsione: i discendenti hanno sempre più ostacoli proibiti, quindi
+        nessuno di loro è lo stesso nodo.
+        """
+        for indice, (f_pos, f_type) in enumerate(nodo.frontiera):
+            len_of = path_logic.calcola_distanza_libera(nodo.origin, f_pos)
+            celle, posizioni = resto, pos_resto
+            if self._use_pruning or self._use_branch_and_bound:
+                costo_potenziale = len_of + self._distanze_libere(f_pos, resto)
+                if self._use_pruning:
+                    utili = costo_potenziale < nodo.distanze[posizioni]
+                    celle, posizioni, costo_potenziale = celle[utili], posizioni[utili], costo_potenziale[utili]
+                    if celle.size == 0:
+                        self.stats["pruning_successes"] += 1
+                        self.stats["pruning_successes_local"] += 1
+                        continue
+                if self._use_branch_and_bound:
+                    utili = costo_accumulato + costo_potenziale < self._incumbent[celle]
+                    celle, posizioni = celle[utili], posizioni[utili]
+                    if celle.size == 0:
+                        self.stats["pruning_successes"] += 1
+                        self.stats["pruning_successes_global"] += 1
+                        continue
+
+            figlio = self._risolvi(f_pos, nodo.new_forbidden_obstacles, celle, depth + 1, costo_accumulato + len_of)
+            posizioni_figlio = figlio.posizioni(celle)
+            totale = len_of + figlio.distanze[posizioni_figlio]
+            migliora = totale < nodo.distanze[posizioni]
+            aggiornate = celle[migliora]
+            nodo.distanze[posizioni[migliora]] = totale[migliora]
+            nodo.scelta[posizioni[migliora]] = indice
+            if self._use_branch_and_bound:
+                self._incumbent[aggiornate] = np.minimum(self._incumbent[aggiornate], costo_accumulato + totale[migliora])
+
+    def get_stats_summary(self):
+        """Ritorna le statistiche della visita, compreso il numero di sottoproblemi memorizzati."""
+        return {**self.stats, "cached_subproblems": len(self._nodi)}
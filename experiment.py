@@ -4,16 +4,23 @@ import random
 import time
 import math
 import os
-import csv
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import grid_generator
+import grid_corpus
+import results_store
+import graph_search
 from solver import PathfindingSolver
+from session import GridSession
 from data_structures import Grid
 
-def select_od_pair(grid_obj: Grid):
+def select_od_pair(grid_obj: Grid, rng=None):
     """
     Seleziona una coppia (O, D) valida e possibilmente distante da un oggetto Grid.
+    'rng' è il generatore casuale da usare (default: il modulo random).
     """
+    rng = rng or random
     rows, cols = grid_obj.rows, grid_obj.cols
     free_cells = list(grid_obj.adj.keys())
     
@@ -24,136 +31,381 @@ def select_od_pair(grid_obj: Grid):
     quadrant4 = [cell for cell in free_cells if cell[0] > rows / 2 and cell[1] > cols / 2]
     
     if quadrant1 and quadrant4:
-        origin = random.choice(quadrant1)
-        destination = random.choice(quadrant4)
+        origin = rng.choice(quadrant1)
+        destination = rng.choice(quadrant4)
         return origin, destination
     else:
-        return random.sample(free_cells, 2)
+        return rng.sample(free_cells, 2)
 
-def run_single_run(grid_data, origin, destination, use_cache=True, use_pruning=True):
+def run_single_run(grid_data, origin, destination, use_cache=True, use_pruning=True, use_branch_and_bound=False, profile=False):
     """
     Esegue una singola esecuzione dell’algoritmo di ricerca del percorso sulla griglia fornita, dalla posizione di partenza a quella di destinazione.
         Argomenti:
-            - grid_data (Any): La rappresentazione della griglia o mappa su cui eseguire il pathfinding.
+            - grid_data (Any): La rappresentazione della griglia o mappa su cui eseguire il pathfinding (matrice o Grid già costruita).
             - origin (Any): Il punto di partenza per l’algoritmo di ricerca del percorso.
             - destination (Any): Il punto di arrivo per l’algoritmo di ricerca del percorso.
             - use_cache (bool, opzionale): Indica se utilizzare la cache per velocizzare i calcoli. Default è True.
             - use_pruning (bool, opzionale): Indica se applicare tecniche di pruning per ottimizzare la ricerca. Default è True.
+            - use_branch_and_bound (bool, opzionale): Indica se attivare anche il pruning globale (branch-and-bound). Default è False.
+            - profile (bool, opzionale): Indica se misurare tempi per fase e dimensioni (vedi PathfindingSolver.solve). Default è False.
         Returns
             - dict: Un dizionario contenente la lunghezza minima del percorso ('lunghezza') e statistiche aggiuntive ottenute dal solver.
     """
     solver = PathfindingSolver(grid_data, origin, destination)
-    solver.solve(debug=False, use_cache=use_cache, use_pruning=use_pruning)
+    solver.solve(debug=False, use_cache=use_cache, use_pruning=use_pruning, use_branch_and_bound=use_branch_and_bound,
+                 profile=profile)
     stats = solver.get_stats_summary()
     results = {'lunghezza': solver.lunghezza_minima}
     results.update(stats)
     return results
 
-def main(args):
-    """Script principale per l'esecuzione degli esperimenti."""
+def run_astar_oracle(grid_obj: Grid, origin, destination):
+    """
+    Calcola con A* il cammino minimo sul grafo della griglia, usato come riferimento
+    veloce per validare il risultato di CAMMINOMIN.
+        Returns
+            - dict: La lunghezza trovata da A* ('lunghezza_astar') e il tempo impiegato ('execution_time_astar').
+    """
+    start_time = time.perf_counter()
+    lunghezza, _ = graph_search.astar(grid_obj, origin, destination)
+    return {'lunghezza_astar': lunghezza, 'execution_time_astar': time.perf_counter() - start_time}
+
+def lunghezze_concordano(lunghezza_a, lunghezza_b):
+    """Confronta due lunghezze di cammino tollerando gli errori di arrotondamento (inf == inf)."""
+    if lunghezza_a == float('inf') or lunghezza_b == float('inf'):
+        return lunghezza_a == lunghezza_b
+    return math.isclose(lunghezza_a, lunghezza_b)
+
+TEST_SUITES = {
+    "dimensione": [
+        {"rows": 5, "cols": 5, "obstacle_ratio": 0.20, "num_runs": 20}, # config_index 0
+        {"rows": 7, "cols": 7, "obstacle_ratio": 0.20, "num_runs": 20}, # config_index 1
+        {"rows": 9, "cols": 9, "obstacle_ratio": 0.20, "num_runs": 20}, # config_index 2
+        {"rows": 10, "cols": 10, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 3
+        {"rows": 12, "cols": 12, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 4
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.20, "num_runs": 10},  # config_index 5
+        {"rows": 17, "cols": 17, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 6
+        {"rows": 20, "cols": 20, "obstacle_ratio": 0.20, "num_runs": 10},  # config_index 7
+    ],
+    "ostacoli": [
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.10, "num_runs": 10}, # config_index 0
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.15, "num_runs": 10}, # config_index 1
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 2
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.25, "num_runs": 10}, # config_index 3
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.30, "num_runs": 10}, # config_index 4
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.35, "num_runs": 10}, # config_index 5
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.40, "num_runs": 10}, # config_index 6
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.45, "num_runs": 10}, # config_index 7
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.50, "num_runs": 10}, # config_index 8
+    ],
+    "confronto": [
+        {"rows": 10, "cols": 10, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 0
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.20, "num_runs": 5},  # config_index 1
+        {"rows": 18, "cols": 18, "obstacle_ratio": 0.20, "num_runs": 3},  # config_index 2
+    ],
+    "aggiornamenti": [
+        {"rows": 10, "cols": 10, "obstacle_ratio": 0.20, "num_runs": 10, "num_edits": 10}, # config_index 0
+        {"rows": 15, "cols": 15, "obstacle_ratio": 0.20, "num_runs": 5, "num_edits": 10},  # config_index 1
+        {"rows": 18, "cols": 18, "obstacle_ratio": 0.20, "num_runs": 3, "num_edits": 10},  # config_index 2
+    ]
+}
+
+def seed_run(base_seed, id_scenario, run_num):
+    """
+    Deriva in modo deterministico il seme di un singolo run da seme base, scenario e
+    numero del run, così i risultati non dipendono dall'ordine di esecuzione.
+    """
+    digest = hashlib.sha256(f"{base_seed}:{id_scenario}:{run_num}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+def _scegli_od(grid_obj: Grid, seed):
+    """Sceglie la coppia (O, D) di un run in modo riproducibile a partire dal suo seme."""
+    return select_od_pair(grid_obj, rng=random.Random(seed))
+
+def esegui_run(test_type, config, run_num, seed, mappa=None, profile=False):
+    """
+    Esegue un singolo run di uno scenario: genera la mappa, sceglie la coppia (O, D)
+    e risolve secondo il tipo di test. Tutta la casualità deriva da 'seed'.
+    Se 'mappa' = (grid, origine, destinazione) è indicata (ad esempio letta da un corpus)
+    la mappa e la coppia (O, D) non vengono generate.
+    Con 'profile' i record contengono anche tempi per fase e dimensioni misurate dal solver.
+        Returns
+            - list[dict]: I record del run (vuota se la griglia è troppo piena per scegliere O e D).
+    """
+    if mappa is not None:
+        grid_obj, origin, destination = mappa
+        session = GridSession(grid_obj)
+    else:
+        grid_data = grid_generator.generate_grid_map(
+            rows=config['rows'], cols=config['cols'], obstacle_ratio=config['obstacle_ratio'], seed=seed
+        )
+        session = GridSession(grid_data)
+        origin, destination = _scegli_od(session.grid, seed)
     
-    TEST_SUITES = {
-        "dimensione": [
-            {"rows": 5, "cols": 5, "obstacle_ratio": 0.20, "num_runs": 20}, # config_index 0
-            {"rows": 7, "cols": 7, "obstacle_ratio": 0.20, "num_runs": 20}, # config_index 1
-            {"rows": 9, "cols": 9, "obstacle_ratio": 0.20, "num_runs": 20}, # config_index 2
-            {"rows": 10, "cols": 10, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 3
-            {"rows": 12, "cols": 12, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 4
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.20, "num_runs": 10},  # config_index 5
-            {"rows": 17, "cols": 17, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 6
-            {"rows": 20, "cols": 20, "obstacle_ratio": 0.20, "num_runs": 10},  # config_index 7
-        ],
-        "ostacoli": [
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.10, "num_runs": 10}, # config_index 0
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.15, "num_runs": 10}, # config_index 1
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 2
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.25, "num_runs": 10}, # config_index 3
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.30, "num_runs": 10}, # config_index 4
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.35, "num_runs": 10}, # config_index 5
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.40, "num_runs": 10}, # config_index 6
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.45, "num_runs": 10}, # config_index 7
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.50, "num_runs": 10}, # config_index 8
-        ],
-        "confronto": [
-            {"rows": 10, "cols": 10, "obstacle_ratio": 0.20, "num_runs": 10}, # config_index 0
-            {"rows": 15, "cols": 15, "obstacle_ratio": 0.20, "num_runs": 5},  # config_index 1
-            {"rows": 18, "cols": 18, "obstacle_ratio": 0.20, "num_runs": 3},  # config_index 2
+    if not origin:
+        return []
+
+    base_record = {**config, "run_num": run_num, "seed": seed, "origin": origin, "destination": destination}
+    if test_type == 'aggiornamenti':
+        return esegui_aggiornamenti(session, origin, destination, config['num_edits'], base_record, seed)
+    risultati_astar = run_astar_oracle(session.grid, origin, destination)
+
+    if test_type == 'confronto':
+        varianti = [
+            ("ottimizzato", {"use_cache": True, "use_pruning": True}),
+            ("branch_and_bound", {"use_cache": True, "use_pruning": True, "use_branch_and_bound": True}),
+            ("naive", {"use_cache": False, "use_pruning": False}),
         ]
-    }
+        records = []
+        for tipo, opzioni in varianti:
+            risultati = run_single_run(session.grid, origin, destination, profile=profile, **opzioni)
+            record = {**base_record, "type": tipo}
+            record.update({f"{k}_OD": v for k, v in risultati.items()})
+            record.update(risultati_astar)
+            record['concorda_astar'] = lunghezze_concordano(record['lunghezza_OD'], risultati_astar['lunghezza_astar'])
+            if not record['concorda_astar']:
+                print(f"    ATTENZIONE: CAMMINOMIN ({tipo}) e A* non concordano: "
+                      f"{record['lunghezza_OD']} vs {risultati_astar['lunghezza_astar']}")
+            records.append(record)
+        return records
+
+    # Le cache vengono svuotate tra le due query: le colonne _DO misurano una risoluzione a
+    # freddo di D->O, non il riuso dei sottoproblemi di O->D
+    solver_od = session.solve(origin, destination, profile=profile)
+    session.clear_caches()
+    solver_do = session.solve(destination, origin, profile=profile)
+    stats_od = solver_od.get_stats_summary()
+    stats_do = solver_do.get_stats_summary()
+
+    risultati_run = {}
+    risultati_run['lunghezza_OD'] = solver_od.lunghezza_minima
+    risultati_run.update({f"{key}_OD": val for key, val in stats_od.items()})
+    risultati_run['lunghezza_DO'] = solver_do.lunghezza_minima
+    risultati_run.update({f"{key}_DO": val for key, val in stats_do.items()})
+    
+    lung_od, lung_do = risultati_run['lunghezza_OD'], risultati_run['lunghezza_DO']
+    risultati_run['correttezza_superata'] = math.isclose(lung_od, lung_do) if lung_od != float('inf') else lung_do == float('inf')
+    risultati_run.update(risultati_astar)
+    risultati_run['concorda_astar'] = lunghezze_concordano(lung_od, risultati_astar['lunghezza_astar'])
+    if not risultati_run['concorda_astar']:
+        print(f"    ATTENZIONE: CAMMINOMIN e A* non concordano: {lung_od} vs {risultati_astar['lunghezza_astar']}")
+    
+    return [{**base_record, **risultati_run}]
+
+def esegui_aggiornamenti(session, origin, destination, num_edits, base_record, seed):
+    """
+    Test delle modifiche incrementali alla mappa: dopo una prima risoluzione applica
+    'num_edits' modifiche casuali (una cella libera diventa ostacolo o un ostacolo viene
+    liberato) e dopo ognuna confronta la risoluzione "calda", sulla sessione con le cache
+    invalidate in modo mirato, con quella "a freddo" su una sessione nuova della mappa modificata.
+        Returns
+            - list[dict]: Un record per modifica, con tempi, lunghezze e voci scartate dalle cache.
+    """
+    rng = random.Random(f"{seed}:aggiornamenti")
+    session.solve(origin, destination)
+    records = []
+    for edit_num in range(1, num_edits + 1):
+        cella = origin
+        while cella in (origin, destination):
+            cella = (rng.randrange(session.grid.rows), rng.randrange(session.grid.cols))
+        bloccata = session.grid.is_traversable(cella)
+        prima = session.get_stats_summary()
+        if bloccata:
+            session.set_obstacle(cella)
+        else:
+            session.clear_obstacle(cella)
+        dopo = session.get_stats_summary()
+        invalidation_time = dopo['invalidation_time'] - prima['invalidation_time']
+
+        solver_caldo = session.solve(origin, destination)
+        solver_freddo = GridSession(session.grid.to_matrix()).solve(origin, destination)
+        tempo_caldo = invalidation_time + solver_caldo.stats['execution_time']
+        tempo_freddo = solver_freddo.stats['execution_time']
+
+        record = {**base_record, "type": "set_obstacle" if bloccata else "clear_obstacle", "edit_num": edit_num}
+        record.update({
+            'lunghezza_warm': solver_caldo.lunghezza_minima,
+            'execution_time_warm': tempo_caldo,
+            'invalidation_time': invalidation_time,
+            'recursive_calls_warm': solver_caldo.stats['recursive_calls'],
+            'lunghezza_cold': solver_freddo.lunghezza_minima,
+            'execution_time_cold': tempo_freddo,
+            'recursive_calls_cold': solver_freddo.stats['recursive_calls'],
+            'speedup': tempo_freddo / tempo_caldo if tempo_caldo > 0 else float('inf'),
+            'invalidated_closures': dopo['invalidated_closures'] - prima['invalidated_closures'],
+            'invalidated_subproblems': dopo['invalidated_subproblems'] - prima['invalidated_subproblems'],
+            'cached_closures': prima['cached_closures'],
+            'cached_subproblems': prima['cached_subproblems'],
+        })
+        record.update(run_astar_oracle(session.grid, origin, destination))
+        record['concorda_cold'] = lunghezze_concordano(record['lunghezza_warm'], record['lunghezza_cold'])
+        record['concorda_astar'] = lunghezze_concordano(record['lunghezza_warm'], record['lunghezza_astar'])
+        if not record['concorda_cold']:
+            print(f"    ATTENZIONE: risoluzione calda e a freddo non concordano dopo la modifica {edit_num}: "
+                  f"{record['lunghezza_warm']} vs {record['lunghezza_cold']}")
+        records.append(record)
+    return records
+
+def _mappa_dal_corpus(corpus, indice):
+    """Restituisce (grid, origine, destinazione) della mappa 'indice' del corpus."""
+    voce = corpus.entry(indice)
+    return corpus.grid(indice), voce["origin"], voce["destination"]
+
+def _esegui_job(job):
+    """
+    Funzione eseguita dai processi del pool: job = (test_type, config_index, run_num, seed, corpus_path, indice, profile).
+    Se 'corpus_path' è indicato la mappa 'indice' viene letta dal corpus, aperto una sola volta per processo.
+    """
+    test_type, config_index, run_num, seed, corpus_path, indice, profile = job
+    config = crea_config(test_type, config_index)
+    mappa = _mappa_dal_corpus(grid_corpus.apri_corpus(corpus_path), indice) if corpus_path else None
+    return config['id_scenario'], run_num, esegui_run(test_type, config, run_num, seed, mappa, profile)
+
+def crea_config(test_type, config_index):
+    """Restituisce una copia della configurazione dello scenario con il suo 'id_scenario'."""
+    config = dict(TEST_SUITES[test_type][config_index])
+    config['id_scenario'] = f"{test_type}_{config_index}"
+    return config
+
+def crea_corpus_esperimenti(path, test_types, base_seed):
+    """
+    Genera un corpus con le mappe e le coppie (O, D) di tutti i run degli scenari dei
+    tipi di test indicati, con gli stessi semi usati da un esperimento con 'base_seed'.
+    Ogni voce dell'indice riporta test_type, config_index, id_scenario e run_num.
+    """
+    voci = []
+    for test_type in test_types:
+        for config_index in range(len(TEST_SUITES[test_type])):
+            config = crea_config(test_type, config_index)
+            for run_num in range(1, config['num_runs'] + 1):
+                voci.append({
+                    "rows": config['rows'], "cols": config['cols'],
+                    "seed": seed_run(base_seed, config['id_scenario'], run_num),
+                    "family": "random", "params": {"obstacle_ratio": config['obstacle_ratio']},
+                    "obstacle_ratio": config['obstacle_ratio'], "test_type": test_type,
+                    "config_index": config_index, "id_scenario": config['id_scenario'], "run_num": run_num,
+                })
+    return grid_corpus.crea_corpus(path, voci, scegli_od=_scegli_od)
+
+FORMATI_RISULTATI = results_store.FORMATI + ("csv",)
+
+def salva_risultati(id_scenario, lista_risultati_run, output_dir="experiment_data", formato="auto"):
+    """
+    Aggiunge i record dello scenario all'archivio dei risultati con colonne tipizzate
+    (vedi results_store). Con formato "csv" i record vengono invece aggiunti al file
+    results_<id_scenario>.csv, scrivendo l'intestazione solo se il file non esiste ancora.
+    Se il file esistente ha colonne diverse (ad esempio un CSV scritto da una versione
+    precedente) viene riscritto con l'unione delle colonne, lasciando vuoti i valori mancanti.
+        Returns
+            - str: Il percorso del file scritto.
+    """
+    if formato != "csv":
+        return results_store.aggiungi_risultati(id_scenario, lista_risultati_run, output_dir, formato)
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_filename = os.path.join(output_dir, f"results_{id_scenario}.csv")
+    df = results_store.risultati_da_records(lista_risultati_run)
+    if not os.path.exists(output_filename):
+        df.to_csv(output_filename, index=False)
+        return output_filename
+
+    intestazione = pd.read_csv(output_filename, nrows=0).columns
+    if list(intestazione) == list(df.columns):
+        df.to_csv(output_filename, mode='a', header=False, index=False)
+    else:
+        esistenti = results_store.normalizza_risultati(pd.read_csv(output_filename))
+        results_store.unisci_risultati([esistenti, df]).to_csv(output_filename, index=False)
+    return output_filename
+
+def esegui_campagna(test_types, base_seed, jobs, corpus_path=None, formato="auto", profile=False):
+    """
+    Esegue tutti gli scenari dei tipi di test indicati distribuendo i singoli run su
+    un pool di 'jobs' processi. Ogni run ha un seme derivato da (base_seed, scenario, run),
+    quindi i risultati sono riproducibili indipendentemente dall'ordine di esecuzione.
+    Con 'corpus_path' i run sono invece le mappe del corpus appartenenti a quei tipi di test:
+    i worker aprono il corpus in sola lettura e ne leggono le mappe senza rigenerarle.
+    Uno scenario viene salvato, con i run in ordine, appena tutti i suoi run sono terminati.
+    """
+    lavori, run_mancanti, risultati = [], {}, {}
+    if corpus_path:
+        corpus = grid_corpus.apri_corpus(corpus_path)
+        for indice, voce in enumerate(corpus.entries):
+            if voce.get("test_type") in test_types:
+                id_scenario = voce["id_scenario"]
+                run_mancanti[id_scenario] = run_mancanti.get(id_scenario, 0) + 1
+                risultati[id_scenario] = {}
+                lavori.append((voce["test_type"], voce["config_index"], voce["run_num"], voce["seed"], corpus_path, indice, profile))
+    else:
+        for test_type in test_types:
+            for config_index, config in enumerate(TEST_SUITES[test_type]):
+                id_scenario = f"{test_type}_{config_index}"
+                run_mancanti[id_scenario] = config['num_runs']
+                risultati[id_scenario] = {}
+                for i in range(config['num_runs']):
+                    lavori.append((test_type, config_index, i + 1, seed_run(base_seed, id_scenario, i + 1), None, None, profile))
+
+    origine = f"corpus {corpus_path}" if corpus_path else f"seed base {base_seed}"
+    print(f"\n--- Campagna: {len(run_mancanti)} scenari, {len(lavori)} run su {jobs} processi ({origine}) ---")
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(_esegui_job, lavoro) for lavoro in lavori]
+        for future in as_completed(futures):
+            id_scenario, run_num, records = future.result()
+            risultati[id_scenario][run_num] = records
+            run_mancanti[id_scenario] -= 1
+            if run_mancanti[id_scenario] == 0:
+                records_scenario = [r for n in sorted(risultati[id_scenario]) for r in risultati[id_scenario][n]]
+                if records_scenario:
+                    output_filename = salva_risultati(id_scenario, records_scenario, formato=formato)
+                    print(f"  Scenario {id_scenario} completato. Risultati aggiunti al file: {output_filename}")
+                else:
+                    print(f"  Scenario {id_scenario} completato senza risultati validi.")
+                del risultati[id_scenario]
+
+def main(args):
+    """Script principale per l'esecuzione degli esperimenti."""
+    base_seed = args.seed if args.seed is not None else random.randrange(2**32)
+
+    if args.build_corpus:
+        corpus = crea_corpus_esperimenti(args.build_corpus, args.test_types or list(TEST_SUITES.keys()), base_seed)
+        print(f"Corpus di {len(corpus)} mappe salvato in: {args.build_corpus} (seed base {base_seed})")
+        return
+
+    if args.campaign:
+        esegui_campagna(args.test_types or list(TEST_SUITES.keys()), base_seed, args.jobs, args.corpus,
+                        args.results_format, args.profile)
+        return
     
     test_type = args.test_type
     config_index = args.config_index
     
-    if test_type not in TEST_SUITES or not (0 <= config_index < len(TEST_SUITES[test_type])):
+    if test_type not in TEST_SUITES or config_index is None or not (0 <= config_index < len(TEST_SUITES[test_type])):
         print(f"Errore: tipo di test '{test_type}' o indice '{config_index}' non validi.")
         print(f"Tipi validi: {list(TEST_SUITES.keys())}")
         return
 
-    config = TEST_SUITES[test_type][config_index]
-    config['id_scenario'] = f"{test_type}_{config_index}"
+    config = crea_config(test_type, config_index)
     
     lista_risultati_run = []
     
-    print(f"\n--- Esecuzione Scenario: {config['id_scenario']} ({config['num_runs']} runs) ---")
+    if args.corpus:
+        corpus = grid_corpus.apri_corpus(args.corpus)
+        indici_corpus = sorted(corpus.select(id_scenario=config['id_scenario']), key=lambda i: corpus.entries[i]["run_num"])
+        runs = [(corpus.entries[i]["run_num"], corpus.entries[i]["seed"], _mappa_dal_corpus(corpus, i)) for i in indici_corpus]
+        print(f"\n--- Esecuzione Scenario: {config['id_scenario']} ({len(runs)} runs dal corpus {args.corpus}) ---")
+    else:
+        runs = [(i + 1, seed_run(base_seed, config['id_scenario'], i + 1), None) for i in range(config['num_runs'])]
+        print(f"\n--- Esecuzione Scenario: {config['id_scenario']} ({config['num_runs']} runs, seed base {base_seed}) ---")
     
-    for i in range(config['num_runs']):
-        print(f"  Run {i+1}/{config['num_runs']}...")
-        
-        grid_data = grid_generator.generate_grid_map(
-            rows=config['rows'], cols=config['cols'], obstacle_ratio=config['obstacle_ratio']
-        )
-        temp_grid_obj = Grid.from_matrix(grid_data)
-        origin, destination = select_od_pair(temp_grid_obj)
-        
-        if not origin:
+    for run_num, seed, mappa in runs:
+        print(f"  Run {run_num}/{len(runs)}...")
+        records = esegui_run(test_type, config, run_num, seed, mappa, args.profile)
+        if not records:
             print("    ERRORE: Griglia troppo piena per trovare una coppia O, D. Run saltato.")
             continue
-
-        if test_type == 'confronto':
-            risultati_opt = run_single_run(grid_data, origin, destination, use_cache=True, use_pruning=True)
-            record_opt = {**config, "run_num": i+1, "origin": origin, "destination": destination, "type": "ottimizzato"}
-            record_opt.update({f"{k}_OD": v for k, v in risultati_opt.items()}) 
-            lista_risultati_run.append(record_opt)
-            
-            risultati_naive = run_single_run(grid_data, origin, destination, use_cache=False, use_pruning=False)
-            record_naive = {**config, "run_num": i+1, "origin": origin, "destination": destination, "type": "naive"}
-            record_naive.update({f"{k}_OD": v for k, v in risultati_naive.items()}) 
-            lista_risultati_run.append(record_naive)
-        else:
-            solver_od = PathfindingSolver(grid_data, origin, destination)
-            solver_od.solve(debug=False)
-            stats_od = solver_od.get_stats_summary()
-            
-            solver_do = PathfindingSolver(grid_data, destination, origin)
-            solver_do.solve(debug=False)
-            stats_do = solver_do.get_stats_summary()
-
-            risultati_run = {}
-            risultati_run['lunghezza_OD'] = solver_od.lunghezza_minima
-            risultati_run.update({f"{key}_OD": val for key, val in stats_od.items()})
-            risultati_run['lunghezza_DO'] = solver_do.lunghezza_minima
-            risultati_run.update({f"{key}_DO": val for key, val in stats_do.items()})
-            
-            lung_od, lung_do = risultati_run['lunghezza_OD'], risultati_run['lunghezza_DO']
-            risultati_run['correttezza_superata'] = math.isclose(lung_od, lung_do) if lung_od != float('inf') else lung_do == float('inf')
-            
-            record_completo = {**config, "run_num": i + 1, "origin": origin, "destination": destination, **risultati_run}
-            lista_risultati_run.append(record_completo)
+        lista_risultati_run.extend(records)
 
     if lista_risultati_run:
-        output_dir = "experiment_data"
-        os.makedirs(output_dir, exist_ok=True)
-        output_filename = os.path.join(output_dir, f"results_{config['id_scenario']}.csv")
-        
-        fieldnames = list(lista_risultati_run[0].keys())
-        file_exists = os.path.exists(output_filename)
-
-        with open(output_filename, 'a', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            if not file_exists:
-                writer.writeheader()
-            writer.writerows(lista_risultati_run)
-
+        output_filename = salva_risultati(config['id_scenario'], lista_risultati_run, formato=args.results_format)
         print(f"\n--- Scenario Completato ---")
         print(f"Risultati aggiunti al file: {output_filename}")
     else:
@@ -161,8 +413,20 @@ def main(args):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Script per la sperimentazione dell'algoritmo CAMMINOMIN.")
-    parser.add_argument("--test_type", required=True, choices=["dimensione", "ostacoli", "confronto"], help="Il tipo di esperimento da eseguire.")
-    parser.add_argument("--config_index", required=True, type=int, help="L'indice della configurazione da testare all'interno del tipo di test.")
+    parser.add_argument("--test_type", choices=list(TEST_SUITES.keys()), help="Il tipo di esperimento da eseguire.")
+    parser.add_argument("--config_index", type=int, help="L'indice della configurazione da testare all'interno del tipo di test.")
+    parser.add_argument("--campaign", action="store_true", help="Esegue tutti gli scenari dei tipi selezionati su un pool di processi.")
+    parser.add_argument("--test_types", nargs="+", choices=list(TEST_SUITES.keys()), help="Tipi di test inclusi nella campagna (default: tutti).")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Numero di processi usati dalla campagna.")
+    parser.add_argument("--seed", type=int, help="Seme base da cui derivare i semi dei singoli run (default: casuale).")
+    parser.add_argument("--corpus", help="Directory di un corpus di mappe da cui leggere mappe e coppie (O, D) invece di generarle.")
+    parser.add_argument("--results_format", choices=FORMATI_RISULTATI, default="auto",
+                        help="Formato dei risultati: archivio binario (npz, feather o auto) oppure csv.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Registra anche tempi per fase (cache, chiusura, frontiera, ordinamento) e dimensioni medie e massime.")
+    parser.add_argument("--build_corpus", help="Genera nella directory indicata il corpus delle mappe dei tipi selezionati ed esce.")
     
     args = parser.parse_args()
-    main(args)
\ No newline at end of file
+    if not args.campaign and not args.build_corpus and (args.test_type is None or args.config_index is None):
+        parser.error("--test_type e --config_index sono obbligatori se non si usa --campaign.")
+    main(args)
@@ -0,0 +1,82 @@
+import heapq
+import path_logic
+from data_structures import Grid
+
+def ricostruisci_percorso(predecessori, destination):
+    """
+    Ricostruisce il percorso dall'origine a 'destination' risalendo il dizionario
+    dei predecessori prodotto da dijkstra o astar.
+    Returns:
+        list[tuple[int, int]]: il percorso, estremi inclusi (vuoto se 'destination' non è stata raggiunta).
+    """
+    if destination not in predecessori:
+        return []
+    percorso = [destination]
+    while predecessori[percorso[-1]] is not None:
+        percorso.append(predecessori[percorso[-1]])
+    percorso.reverse()
+    return percorso
+
+def dijkstra(grid: Grid, origin, destination=None):
+    """
+    Algoritmo di Dijkstra con heap binario sulla lista di adiacenze della Grid
+    (costo 1 per le mosse rettilinee e √2 per quelle diagonali).
+    Se 'destination' è indicata la ricerca si ferma non appena la destinazione viene estratta.
+    Args:
+        grid (Grid): la griglia su cui cercare.
+        origin (tuple[int, int]): la cella di partenza.
+        destination (tuple[int, int], opzionale): la cella di arrivo.
+    Returns:
+        tuple[dict, dict]: le distanze definitive dall'origine e i predecessori di ogni cella raggiunta.
+    """
+    distanze = {}
+    predecessori = {origin: None}
+    migliori = {origin: 0.0}
+    heap = [(0.0, origin)]
+    while heap:
+        dist, cella = heapq.heappop(heap)
+        if cella in distanze:
+            continue
+        distanze[cella] = dist
+        if cella == destination:
+            break
+        for vicino, costo in grid.get_neighbors(cella).items():
+            nuova = dist + costo
+            if vicino not in distanze and nuova < migliori.get(vicino, float('inf')):
+                migliori[vicino] = nuova
+                predecessori[vicino] = cella
+                heapq.heappush(heap, (nuova, vicino))
+    return distanze, {cella: predecessori[cella] for cella in distanze}
+
+def astar(grid: Grid, origin, destination):
+    """
+    Algoritmo A* con heap binario e euristica octile (la distanza libera
+    path_logic.calcola_distanza_libera, ammissibile e consistente su questa griglia).
+    Args:
+        grid (Grid): la griglia su cui cercare.
+        origin (tuple[int, int]): la cella di partenza.
+        destination (tuple[int, int]): la cella di arrivo.
+    Returns:
+        tuple[float, list]: la lunghezza del cammino minimo (inf se non esiste) e il percorso, estremi inclusi.
+    """
+    if not grid.is_traversable(origin) or not grid.is_traversable(destination):
+        return float('inf'), []
+    chiuse = set()
+    predecessori = {origin: None}
+    migliori = {origin: 0.0}
+    heap = [(path_logic.calcola_distanza_libera(origin, destination), 0.0, origin)]
+    while heap:
+        _, dist, cella = heapq.heappop(heap)
+        if cella in chiuse:
+            continue
+        if cella == destination:
+            return dist, ricostruisci_percorso(predecessori, destination)
+        chiuse.add(cella)
+        for vicino, costo in grid.get_neighbors(cella).items():
+            nuova = dist + costo
+            if vicino not in chiuse and nuova < migliori.get(vicino, float('inf')):
+                migliori[vicino] = nuova
+                predecessori[vicino] = cella
+                stima = nuova + path_logic.calcola_distanza_libera(vicino, destination)
+                heapq.heappush(heap, (stima, nuova, vicino))
+    return float('inf'), []
@@ -0,0 +1,131 @@
+import json
+import os
+import numpy as np
+import grid_generator
+from data_structures import CompactGrid
+
+VERSIONE_CORPUS = 2
+# Versioni leggibili: la 1 salvava le maschere con un uint8 per cella, senza impacchettarle
+VERSIONI_SUPPORTATE = (1, 2)
+FILE_MASCHERE = "masks.npy"
+FILE_INDICE = "index.json"
+
+# Corpus già aperti dal processo corrente, così i worker di un pool aprono ogni file una sola volta
+_CORPUS_APERTI = {}
+
+class GridCorpus:
+    """
+    Insieme fisso di mappe salvato su disco, pensato per ripetere gli esperimenti
+    sempre sulle stesse griglie e per condividerle tra processi senza rigenerarle.
+    Una directory di corpus contiene:
+        - masks.npy: le maschere degli ostacoli di tutte le mappe, impacchettate a un bit
+          per cella (np.packbits, 1 = ostacolo) e concatenate in un unico array piatto di
+          byte; ogni mappa inizia su un byte nuovo;
+        - index.json: per ogni mappa forma, famiglia, seme, parametri del generatore,
+          offset (in byte) nell'array delle maschere e coppia (O, D) scelta.
+    Le maschere vengono aperte in memory-mapping in sola lettura: una mappa viene letta
+    dal disco solo quando serve e solo lei viene spacchettata in memoria, quindi il
+    corpus non viene mai caricato tutto. I corpus della versione 1 (un uint8 per cella)
+    restano leggibili e le loro mappe sono viste senza copie.
+    """
+    def __init__(self, path):
+        with open(os.path.join(path, FILE_INDICE)) as f:
+            indice = json.load(f)
+        if indice.get("version") not in VERSIONI_SUPPORTATE:
+            raise ValueError(f"Versione del corpus '{indice.get('version')}' non supportata. "
+                             f"Versioni disponibili: {list(VERSIONI_SUPPORTATE)}")
+        self.path = path
+        self.version = indice["version"]
+        self.entries = indice["entries"]
+        self.masks = np.load(os.path.join(path, FILE_MASCHERE), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.entries)
+
+    def entry(self, indice):
+        """Restituisce i metadati della mappa 'indice', con origine e destinazione come tuple."""
+        voce = dict(self.entries[indice])
+        for chiave in ("origin", "destination"):
+            if voce.get(chiave) is not None:
+                voce[chiave] = tuple(voce[chiave])
+        return voce
+
+    def mask(self, indice):
+        """
+        Restituisce la maschera (rows, cols) di uint8 della mappa 'indice', spacchettata
+        dai byte del corpus (nei corpus della versione 1 è una vista in sola lettura).
+        """
+        voce = self.entries[indice]
+        inizio, celle = voce["offset"], voce["rows"] * voce["cols"]
+        if self.version == 1:
+            return self.masks[inizio:inizio + celle].reshape(voce["rows"], voce["cols"])
+        impacchettata = self.masks[inizio:inizio + _byte_impacchettati(celle)]
+        return np.unpackbits(impacchettata, count=celle).reshape(voce["rows"], voce["cols"])
+
+    def grid(self, indice):
+        """Restituisce la mappa 'indice' come CompactGrid costruita sulla sua maschera, senza altre copie."""
+        voce = self.entries[indice]
+        return CompactGrid(voce["rows"], voce["cols"], self.mask(indice))
+
+    def select(self, **filtri):
+        """
+        Restituisce gli indici delle mappe i cui metadati coincidono con tutti i filtri
+        indicati, ad esempio select(id_scenario="dimensione_3", run_num=2).
+        """
+        return [i for i, voce in enumerate(self.entries)
+                if all(voce.get(chiave) == valore for chiave, valore in filtri.items())]
+
+def _byte_impacchettati(celle):
+    """Byte occupati da una maschera di 'celle' celle impacchettata a un bit per cella."""
+    return -(-celle // 8)
+
+def apri_corpus(path):
+    """Apre il corpus in 'path' riusando, se possibile, quello già aperto dal processo corrente."""
+    chiave = os.path.abspath(path)
+    if chiave not in _CORPUS_APERTI:
+        _CORPUS_APERTI[chiave] = GridCorpus(path)
+    return _CORPUS_APERTI[chiave]
+
+def crea_corpus(path, voci, scegli_od=None):
+    """
+    Genera le mappe descritte da 'voci' e le salva come corpus nella directory 'path'.
+    Ogni voce è un dizionario con 'rows', 'cols', 'seed', opzionalmente 'family'
+    (default "random") e 'params' (parametri del generatore della famiglia, ad esempio
+    {"obstacle_ratio": 0.2}); le altre chiavi vengono copiate nell'indice così come sono.
+    Le maschere sono impacchettate e scritte una alla volta nel file in memory-mapping,
+    quindi il corpus non deve mai stare tutto in memoria.
+        Argomenti:
+            - scegli_od (callable, opzionale): funzione (grid, seed) -> (origine, destinazione)
+              usata per scegliere la coppia (O, D) di ogni mappa. Se assente la coppia non viene salvata.
+        Returns
+            - GridCorpus: il corpus appena creato, aperto in sola lettura.
+    """
+    voci = list(voci)
+    os.makedirs(path, exist_ok=True)
+    totale_byte = sum(_byte_impacchettati(voce["rows"] * voce["cols"]) for voce in voci)
+    masks = np.lib.format.open_memmap(os.path.join(path, FILE_MASCHERE), mode='w+', dtype=np.uint8, shape=(totale_byte,))
+
+    entries = []
+    offset = 0
+    for voce in voci:
+        rows, cols, seed = voce["rows"], voce["cols"], voce["seed"]
+        family = voce.get("family", "random")
+        mappa = grid_generator.generate_family_map(family, rows, cols, seed=seed, **voce.get("params", {}))
+        mappa = (np.asarray(mappa) == 1).astype(np.uint8)
+        dimensione = _byte_impacchettati(rows * cols)
+        masks[offset:offset + dimensione] = np.packbits(mappa.reshape(-1))
+
+        entry = {**voce, "family": family, "offset": offset, "num_obstacles": int(np.count_nonzero(mappa))}
+        if scegli_od is not None:
+            origin, destination = scegli_od(CompactGrid(rows, cols, mappa), seed)
+            entry["origin"] = list(origin) if origin else None
+            entry["destination"] = list(destination) if destination else None
+        entries.append(entry)
+        offset += dimensione
+
+    masks.flush()
+    del masks
+    with open(os.path.join(path, FILE_INDICE), "w") as f:
+        json.dump({"version": VERSIONE_CORPUS, "entries": entries}, f)
+    _CORPUS_APERTI.pop(os.path.abspath(path), None)
+    return GridCorpus(path)
@@ -0,0 +1,257 @@
+import hashlib
+import heapq
+import math
+import time
+import numpy as np
+import path_logic
+from data_structures import Grid, calcola_free_runs
+
+VERSIONE_INDICE = 1
+
+def celle_candidate(grid: Grid):
+    """
+    Restituisce la maschera (rows, cols) delle celle candidate a essere landmark: le celle
+    libere con un ostacolo tra i 4 vicini ortogonali. Le mosse diagonali possono passare
+    sullo spigolo di un ostacolo, quindi un cammino minimo piega solo in queste celle
+    (i vertici del "rombo" di celle che circonda ogni ostacolo); tra due pieghe consecutive
+    il cammino è un cammino libero di tipo 1 o 2.
+    """
+    libere = grid.get_free_mask()
+    ostacoli = np.pad(~libere, 1, constant_values=False)
+    vicino_ostacolo = (ostacoli[:-2, 1:-1] | ostacoli[2:, 1:-1] | ostacoli[1:-1, :-2] | ostacoli[1:-1, 2:])
+    return libere & vicino_ostacolo
+
+def _impronta_griglia(grid: Grid):
+    """Impronta (SHA-256) della maschera degli ostacoli, per riconoscere la griglia di un indice salvato."""
+    return hashlib.sha256(np.ascontiguousarray(grid.get_free_mask(), dtype=np.uint8).tobytes()).hexdigest()
+
+# Direzioni diagonali e, per ognuna, le due direzioni rettilinee che la compongono
+_DIAGONALI = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+_DIREZIONI = ((-1, 0), (1, 0), (0, -1), (0, 1)) + _DIAGONALI
+
+class LandmarkIndex:
+    """
+    Indice dei landmark di una Grid: un grafo (in formato CSR) che ha per nodi le celle
+    candidate (vedi celle_candidate) e un arco tra due candidate quando una raggiunge
+    l'altra con un cammino libero di tipo 1 o 2 che non passa per altre candidate,
+    pesato con la distanza libera.
+    Gli archi che attraversano una candidata intermedia w sono superflui: i due tratti
+    del cammino prima e dopo w sono a loro volta cammini liberi, e la somma delle loro
+    distanze libere è la distanza libera dell'arco. Senza quegli archi il grafo resta
+    esatto e ha pochi archi per nodo invece di uno per ogni candidata visibile.
+    Gli archi si enumerano senza calcolare chiusure, con le tabelle delle celle libere
+    consecutive (Grid.get_free_runs) e delle celle non candidate consecutive: da ogni
+    cella si percorre il primo tratto del cammino (diagonale per il tipo 1, rettilineo
+    per il tipo 2) finché resta libero e senza candidate, e da ogni punto di svolta la
+    tabella dà la prima candidata raggiungibile nel secondo tratto.
+    L'indice si costruisce una volta per mappa e si può salvare su disco.
+    Un'interrogazione (O, D) collega O e D al grafo nello stesso modo e cerca il cammino
+    minimo con A* (euristica: distanza libera).
+    """
+    def __init__(self, grid: Grid, candidate, indptr, indices, pesi, tipi):
+        self.grid = grid
+        self.candidate = candidate
+        self.indptr = indptr
+        self.indices = indices
+        self.pesi = pesi
+        self.tipi = tipi
+        # Indice del nodo di ogni cella (-1 se la cella non è candidata)
+        self._nodo_di_cella = np.full(grid.rows * grid.cols, -1, dtype=np.int64)
+        self._nodo_di_cella[candidate[:, 0] * grid.cols + candidate[:, 1]] = np.arange(len(candidate))
+        self._celle = [tuple(cella) for cella in candidate.tolist()]
+        self._indptr_lista = indptr.tolist()
+        self._indices_lista = indices.tolist()
+        self._pesi_lista = pesi.tolist()
+        self._tipi_lista = tipi.tolist()
+        self._liberi = None
+        self._non_candidate = None
+        self.stats = {"queries": 0, "total_time": 0.0, "expanded_nodes": 0}
+
+    @classmethod
+    def build(cls, grid: Grid):
+        """Costruisce l'indice della griglia enumerando gli archi di tutte le celle candidate."""
+        candidate = np.argwhere(celle_candidate(grid))
+        indice = cls(grid, candidate, np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                     np.zeros(0), np.zeros(0, dtype=np.int8))
+        sorgenti, destinazioni, tipi = indice._archi(candidate[:, 0] * grid.cols + candidate[:, 1])
+        sorgenti, nodi, tipi = indice._unici(sorgenti, indice._nodo_di_cella[destinazioni], tipi)
+        indptr = np.zeros(len(candidate) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sorgenti, minlength=len(candidate)), out=indptr[1:])
+        return cls(grid, candidate, indptr, nodi, indice._distanze_libere(candidate[sorgenti], nodi), tipi)
+
+    def save(self, path):
+        """
+        Salva l'indice in formato .npz, insieme all'impronta della griglia. Il file viene
+        scritto esattamente in 'path': np.savez aggiungerebbe l'estensione .npz ai percorsi
+        che non ce l'hanno, e chi controlla l'esistenza di 'path' non lo ritroverebbe.
+        """
+        with open(path, "wb") as f:
+            np.savez(f, version=VERSIONE_INDICE, rows=self.grid.rows, cols=self.grid.cols,
+                     impronta=_impronta_griglia(self.grid), candidate=self.candidate,
+                     indptr=self.indptr, indices=self.indices, pesi=self.pesi, tipi=self.tipi)
+
+    @classmethod
+    def load(cls, path, grid: Grid):
+        """Carica un indice salvato con save(), verificando che sia stato costruito per 'grid'."""
+        with np.load(path, allow_pickle=False) as dati:
+            if int(dati["version"]) != VERSIONE_INDICE:
+                raise ValueError(f"Versione dell'indice '{int(dati['version'])}' non supportata (attesa {VERSIONE_INDICE}).")
+            if (int(dati["rows"]), int(dati["cols"])) != (grid.rows, grid.cols) or str(dati["impronta"]) != _impronta_griglia(grid):
+                raise ValueError(f"L'indice '{path}' è stato costruito per una griglia diversa.")
+            return cls(grid, dati["candidate"], dati["indptr"], dati["indices"], dati["pesi"], dati["tipi"])
+
+    def _distanze_libere(self, origini, nodi):
+        """Distanza libera tra le celle 'origini' (una cella o un array (n, 2)) e le candidate 'nodi'."""
+        delta = np.abs(self.candidate[nodi] - np.asarray(origini))
+        delta_min = delta.min(axis=1)
+        return math.sqrt(2) * delta_min + (delta.max(axis=1) - delta_min)
+
+    def _tabelle(self):
+        """Tabelle piatte, per direzione, delle celle libere e delle celle non candidate consecutive."""
+        if self._liberi is None:
+            liberi = self.grid.get_free_runs()
+            non_candidate = calcola_free_runs(celle_candidate(self.grid), dtype=np.int32)
+            self._liberi = {d: liberi[d[0] + 1, d[1] + 1].reshape(-1) for d in _DIREZIONI}
+            self._non_candidate = {d: non_candidate[d[0] + 1, d[1] + 1].reshape(-1) for d in _DIREZIONI}
+        return self._liberi, self._non_candidate
+
+    def _archi(self, celle):
+        """
+        Enumera gli archi uscenti dalle celle indicate (array di cell_id): per ogni cammino
+        libero di tipo 1 o 2 che parte da una di esse e arriva a una candidata senza
+        attraversarne altre restituisce (posizione della cella di partenza in 'celle',
+        cell_id della candidata, tipo). Una candidata raggiunta con entrambi i tipi compare
+        due volte.
+        """
+        liberi, non_candidate = self._tabelle()
+        cols = self.grid.cols
+        posizioni = np.arange(len(celle))
+        sorgenti, destinazioni, tipi = [], [], []
+
+        def prima_candidata(pos, partenze, direzione, tipo):
+            # La prima candidata lungo 'direzione' è raggiungibile se tutto il tratto è libero
+            passi = non_candidate[direzione][partenze] + 1
+            valide = passi <= liberi[direzione][partenze]
+            sorgenti.append(pos[valide])
+            destinazioni.append(partenze[valide] + passi[valide] * (direzione[0] * cols + direzione[1]))
+            tipi.append(np.full(np.count_nonzero(valide), tipo, dtype=np.int8))
+
+        # Tratti rettilinei o diagonali puri: i due tipi coincidono
+        for direzione in _DIREZIONI:
+            prima_candidata(posizioni, celle, direzione, 1)
+        # Un primo tratto (diagonale per il tipo 1, rettilineo per il tipo 2) di k >= 1 passi
+        # su celle libere e non candidate, poi il secondo tratto fino alla prima candidata
+        for dr, dc in _DIAGONALI:
+            for retta in ((dr, 0), (0, dc)):
+                for tipo, primo, secondo in ((1, (dr, dc), retta), (2, retta, (dr, dc))):
+                    massimo = np.minimum(liberi[primo][celle], non_candidate[primo][celle])
+                    totale = int(massimo.sum())
+                    if totale == 0:
+                        continue
+                    pos = np.repeat(posizioni, massimo)
+                    k = np.arange(1, totale + 1) - np.repeat(np.cumsum(massimo) - massimo, massimo)
+                    prima_candidata(pos, celle[pos] + k * (primo[0] * cols + primo[1]), secondo, tipo)
+        return np.concatenate(sorgenti), np.concatenate(destinazioni), np.concatenate(tipi)
+
+    @staticmethod
+    def _unici(sorgenti, nodi, tipi):
+        """Ordina gli archi per (sorgente, nodo) e tiene un solo arco per coppia, preferendo il tipo 1."""
+        ordine = np.lexsort((tipi, nodi, sorgenti))
+        sorgenti, nodi, tipi = sorgenti[ordine], nodi[ordine], tipi[ordine]
+        primi = np.ones(len(ordine), dtype=bool)
+        primi[1:] = (sorgenti[1:] != sorgenti[:-1]) | (nodi[1:] != nodi[:-1])
+        return sorgenti[primi], nodi[primi], tipi[primi]
+
+    def _collega(self, cella):
+        """
+        Restituisce le candidate raggiunte da 'cella' con un cammino libero di tipo 1 o 2
+        che non attraversa altre candidate, come indici di nodo in ordine crescente, con il
+        tipo del cammino.
+        """
+        celle = np.array([cella[0] * self.grid.cols + cella[1]], dtype=np.int64)
+        sorgenti, destinazioni, tipi = self._archi(celle)
+        _, nodi, tipi = self._unici(sorgenti, self._nodo_di_cella[destinazioni], tipi)
+        return nodi, tipi
+
+    def query(self, origin, destination):
+        """
+        Restituisce (lunghezza minima, sequenza di landmark) da 'origin' a 'destination',
+        nello stesso formato di PathfindingSolver: [(origin, 0), (landmark, tipo), ..., (destination, tipo)].
+        """
+        start_time = time.perf_counter()
+        risultato = self._interroga(origin, destination)
+        self.stats["queries"] += 1
+        self.stats["total_time"] += time.perf_counter() - start_time
+        return risultato
+
+    def _interroga(self, origin, destination):
+        if not self.grid.is_traversable(origin, 0) or not self.grid.is_traversable(destination, 0):
+            return float('inf'), []
+        if origin == destination:
+            return 0, [(origin, 1)]
+
+        # Archi da O (chiusura di O) e verso D (chiusura di D: i cammini liberi si percorrono
+        # anche al contrario, con i tipi scambiati)
+        diretto = self.grid.free_path_type(origin, destination, 0)
+        if diretto:
+            return path_logic.calcola_distanza_libera(origin, destination), [(origin, 0), (destination, diretto)]
+        vicini_o, tipi_o = self._collega(origin)
+        vicini_d, tipi_d = self._collega(destination)
+        verso_d = dict(zip(vicini_d.tolist(), (3 - tipi_d).tolist()))
+        if len(vicini_o) == 0 or not verso_d:
+            return float('inf'), []
+        return self._a_star(origin, destination, vicini_o, tipi_o, verso_d)
+
+    def _a_star(self, origin, destination, vicini_o, tipi_o, verso_d):
+        """
+        A* sul grafo dei landmark, partendo dalle candidate collegate a O e terminando
+        quando nessun nodo aperto può migliorare il miglior cammino che entra in D.
+        Restituisce (lunghezza, sequenza di landmark), (inf, []) se D non è raggiungibile.
+        """
+        celle, indptr, indices, pesi, tipi = self._celle, self._indptr_lista, self._indices_lista, self._pesi_lista, self._tipi_lista
+        # Euristica di tutti i nodi, calcolata in blocco: la distanza libera da D
+        euristica = self._distanze_libere(destination, slice(None)).tolist()
+
+        distanze = [float('inf')] * len(celle)
+        predecessori = {}
+        heap = []
+        for nodo, tipo, peso in zip(vicini_o.tolist(), tipi_o.tolist(), self._distanze_libere(origin, vicini_o).tolist()):
+            if peso < distanze[nodo]:
+                distanze[nodo] = peso
+                predecessori[nodo] = (-1, tipo)
+                heapq.heappush(heap, (peso + euristica[nodo], peso, nodo))
+
+        migliore, ultimo = float('inf'), None
+        chiusi = set()
+        espansi = 0
+        while heap:
+            stima, distanza, nodo = heapq.heappop(heap)
+            if stima >= migliore:
+                break
+            if nodo in chiusi:
+                continue
+            chiusi.add(nodo)
+            espansi += 1
+            if nodo in verso_d:
+                totale = distanza + euristica[nodo]
+                if totale < migliore:
+                    migliore, ultimo = totale, nodo
+            for k in range(indptr[nodo], indptr[nodo + 1]):
+                vicino = indices[k]
+                nuova = distanza + pesi[k]
+                if nuova < distanze[vicino]:
+                    distanze[vicino] = nuova
+                    predecessori[vicino] = (nodo, tipi[k])
+                    heapq.heappush(heap, (nuova + euristica[vicino], nuova, vicino))
+        self.stats["expanded_nodes"] += espansi
+
+        if ultimo is None:
+            return float('inf'), []
+        sequenza = [(destination, verso_d[ultimo])]
+        nodo = ultimo
+        while nodo != -1:
+            precedente, tipo = predecessori[nodo]
+            sequenza.append((celle[nodo], tipo))
+            nodo = precedente
+        sequenza.append((origin, 0))
+        return migliore, sequenza[::-1]
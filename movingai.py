@@ -0,0 +1,255 @@
+import argparse
+import math
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from data_structures import Grid, CompactGrid
+from session import GridSession
+from solver import PathfindingSolver
+
+# Caratteri delle mappe Moving AI: 0 = libero, 1 = ostacolo.
+# '.' e 'G' sono terreno, 'S' (palude) è attraversabile; '@' e 'O' sono fuori mappa,
+# 'T' (alberi) e 'W' (acqua) non sono attraversabili da un agente di terra, come nei
+# benchmark octile standard.
+CARATTERI_LIBERI = b".GS"
+CARATTERI_OSTACOLO = b"@OTW"
+_CARATTERE_SCONOSCIUTO = 2
+
+_TABELLA_CARATTERI = np.full(256, _CARATTERE_SCONOSCIUTO, dtype=np.uint8)
+_TABELLA_CARATTERI[list(CARATTERI_LIBERI)] = 0
+_TABELLA_CARATTERI[list(CARATTERI_OSTACOLO)] = 1
+
+# Colonne del file .scen (versione 1), nell'ordine in cui compaiono
+COLONNE_SCENARIO = ("bucket", "map", "width", "height", "start_x", "start_y", "goal_x", "goal_y", "optimal_length")
+
+def _leggi_intestazione(f, path):
+    """Legge l'intestazione di un file .map fino alla riga 'map' e restituisce (height, width)."""
+    campi = {}
+    while True:
+        riga = f.readline()
+        if not riga:
+            raise ValueError(f"Mappa '{path}' non valida: intestazione senza la riga 'map'.")
+        parole = riga.split()
+        if not parole:
+            continue
+        if parole[0] == b"map":
+            break
+        if len(parole) != 2:
+            raise ValueError(f"Riga di intestazione '{riga.decode(errors='replace').strip()}' non valida nella mappa '{path}'.")
+        campi[parole[0].decode()] = parole[1].decode()
+
+    if campi.get("type", "octile") != "octile":
+        raise ValueError(f"Tipo di mappa '{campi['type']}' non supportato. Tipi disponibili: ['octile']")
+    try:
+        return int(campi["height"]), int(campi["width"])
+    except (KeyError, ValueError):
+        raise ValueError(f"Mappa '{path}' non valida: 'height' e 'width' devono essere interi.")
+
+def leggi_maschera(path):
+    """
+    Legge un file .map di Moving AI e restituisce la maschera degli ostacoli come array
+    uint8 (height, width), 1 = ostacolo.
+    Il file viene letto una riga alla volta e ogni riga è convertita con una tabella di
+    lookup direttamente nella sua porzione della maschera, senza liste intermedie.
+    """
+    with open(path, "rb") as f:
+        rows, cols = _leggi_intestazione(f, path)
+        maschera = np.empty((rows, cols), dtype=np.uint8)
+        for r in range(rows):
+            riga = f.readline().rstrip(b"\r\n")
+            if len(riga) < cols:
+                raise ValueError(f"Mappa '{path}' non valida: la riga {r} ha {len(riga)} caratteri invece di {cols}.")
+            maschera[r] = _TABELLA_CARATTERI[np.frombuffer(riga, dtype=np.uint8, count=cols)]
+
+    if rows and cols and maschera.max() == _CARATTERE_SCONOSCIUTO:
+        r, c = np.argwhere(maschera == _CARATTERE_SCONOSCIUTO)[0]
+        raise ValueError(f"Carattere non valido nella mappa '{path}' alla cella ({r}, {c}). "
+                         f"Caratteri disponibili: {list((CARATTERI_LIBERI + CARATTERI_OSTACOLO).decode())}")
+    return maschera
+
+def leggi_mappa(path, compact=True):
+    """
+    Legge un file .map di Moving AI e restituisce la griglia corrispondente: una
+    CompactGrid che usa la maschera letta senza copie oppure, con compact=False, una
+    Grid con la lista di adiacenze.
+    """
+    maschera = leggi_maschera(path)
+    if compact:
+        return CompactGrid(maschera.shape[0], maschera.shape[1], maschera)
+    return Grid.from_matrix(maschera)
+
+def leggi_scenari(path):
+    """
+    Legge un file .scen di Moving AI e restituisce, una riga alla volta, gli scenari
+    come dizionari con 'bucket', 'map', 'width', 'height', 'origin', 'destination' e
+    'optimal_length'. Nel file le coordinate sono (x, y) = (colonna, riga): origine e
+    destinazione sono convertite in (riga, colonna) come nel resto del progetto.
+    """
+    with open(path) as f:
+        for numero, riga in enumerate(f, start=1):
+            campi = riga.split()
+            if not campi or (numero == 1 and campi[0] == "version"):
+                continue
+            if len(campi) != len(COLONNE_SCENARIO):
+                raise ValueError(f"Riga {numero} dello scenario '{path}' non valida: "
+                                 f"attese {len(COLONNE_SCENARIO)} colonne, trovate {len(campi)}.")
+            bucket, mappa, width, height, start_x, start_y, goal_x, goal_y = campi[:-1]
+            yield {
+                "bucket": int(bucket),
+                "map": mappa,
+                "width": int(width),
+                "height": int(height),
+                "origin": (int(start_y), int(start_x)),
+                "destination": (int(goal_y), int(goal_x)),
+                "optimal_length": float(campi[-1]),
+            }
+
+def risolvi_percorso_mappa(nome_mappa, scen_path):
+    """
+    Trova il file .map indicato da uno scenario: il percorso nel file .scen è relativo
+    alla directory del .scen; se lì non esiste si cerca il solo nome del file.
+    """
+    directory = os.path.dirname(scen_path)
+    for candidato in (os.path.join(directory, nome_mappa), os.path.join(directory, os.path.basename(nome_mappa))):
+        if os.path.exists(candidato):
+            return candidato
+    raise ValueError(f"Mappa '{nome_mappa}' dello scenario '{scen_path}' non trovata.")
+
+def confronta_lunghezza(lunghezza, ottimo):
+    """
+    Confronta la lunghezza trovata con quella ottima del .scen (arrotondata a 8 decimali
+    nei file): restituisce "ottimo", "piu_corto", "piu_lungo" oppure "non_trovato".
+    I cammini di Moving AI non tagliano gli angoli degli ostacoli, mentre CAMMINOMIN sì:
+    "piu_corto" è quindi un risultato legittimo, "piu_lungo" indica un errore.
+    """
+    if lunghezza == float('inf'):
+        return "non_trovato"
+    if math.isclose(lunghezza, ottimo, rel_tol=1e-6, abs_tol=1e-6):
+        return "ottimo"
+    return "piu_corto" if lunghezza < ottimo else "piu_lungo"
+
+def esegui_scenari(scenari, grid, closure_backend="sweep", use_session=True, **solve_kwargs):
+    """
+    Risolve con CAMMINOMIN gli scenari indicati, tutti sulla stessa griglia, e
+    restituisce un record per scenario con lunghezza trovata, lunghezza ottima del
+    .scen, esito del confronto e tempo di risoluzione (in secondi).
+        Argomenti:
+            - use_session (bool): se True le interrogazioni condividono le cache di una
+              GridSession, come in un servizio a lunga durata; altrimenti ogni scenario
+              usa un PathfindingSolver con cache vuote.
+            - solve_kwargs: opzioni passate a PathfindingSolver.solve (use_branch_and_bound, engine, ...).
+    """
+    sessione = GridSession(grid, closure_backend=closure_backend) if use_session else None
+    records = []
+    for scenario in scenari:
+        if (scenario["height"], scenario["width"]) != (grid.rows, grid.cols):
+            raise ValueError(f"Lo scenario su '{scenario['map']}' ({scenario['height']}x{scenario['width']}) "
+                             f"non corrisponde alla mappa caricata ({grid.rows}x{grid.cols}).")
+        origin, destination = scenario["origin"], scenario["destination"]
+        inizio = time.perf_counter()
+        if sessione is not None:
+            solver = sessione.solve(origin, destination, **solve_kwargs)
+        else:
+            solver = PathfindingSolver(grid, origin, destination, closure_backend=closure_backend)
+            solver.solve(debug=False, **solve_kwargs)
+        tempo = time.perf_counter() - inizio
+        records.append({
+            "bucket": scenario["bucket"],
+            "map": scenario["map"],
+            "origin": origin,
+            "destination": destination,
+            "optimal_length": scenario["optimal_length"],
+            "lunghezza": solver.lunghezza_minima,
+            "esito": confronta_lunghezza(solver.lunghezza_minima, scenario["optimal_length"]),
+            "execution_time": tempo,
+        })
+    return records
+
+def esegui_file_scenari(scen_path, map_path=None, buckets=None, max_per_bucket=None, compact_grid=True, **kwargs):
+    """
+    Legge un file .scen e ne risolve gli scenari, mappa per mappa: ogni file .map viene
+    letto una sola volta. Se 'map_path' è indicato tutti gli scenari usano quella mappa.
+        Argomenti:
+            - buckets (iterabile, opzionale): bucket da eseguire (default: tutti).
+            - max_per_bucket (int, opzionale): numero massimo di scenari per bucket.
+            - kwargs: passati a esegui_scenari.
+        Returns
+            - list: i record di esegui_scenari di tutti gli scenari eseguiti.
+    """
+    buckets = set(buckets) if buckets is not None else None
+    per_mappa = {}
+    per_bucket = {}
+    for scenario in leggi_scenari(scen_path):
+        bucket = scenario["bucket"]
+        if buckets is not None and bucket not in buckets:
+            continue
+        if max_per_bucket is not None and per_bucket.get(bucket, 0) >= max_per_bucket:
+            continue
+        per_bucket[bucket] = per_bucket.get(bucket, 0) + 1
+        per_mappa.setdefault(scenario["map"], []).append(scenario)
+
+    records = []
+    for nome_mappa, scenari in per_mappa.items():
+        grid = leggi_mappa(map_path or risolvi_percorso_mappa(nome_mappa, scen_path), compact=compact_grid)
+        records.extend(esegui_scenari(scenari, grid, **kwargs))
+    return records
+
+def riepilogo_per_bucket(records):
+    """
+    Riassume i record di esegui_scenari per bucket: numero di interrogazioni, tempo
+    totale, medio e al 95° percentile (ms), throughput (interrogazioni al secondo) e
+    conteggio degli esiti del confronto con le lunghezze del .scen.
+    """
+    df = pd.DataFrame(records)
+    if df.empty:
+        return pd.DataFrame()
+    tempi = df.groupby("bucket")["execution_time"]
+    riepilogo = pd.DataFrame({
+        "num_queries": tempi.size(),
+        "total_time": tempi.sum(),
+        "mean_time_ms": tempi.mean() * 1000,
+        "p95_time_ms": tempi.quantile(0.95) * 1000,
+        "mean_optimal_length": df.groupby("bucket")["optimal_length"].mean(),
+    })
+    riepilogo["throughput_qps"] = riepilogo["num_queries"] / riepilogo["total_time"]
+    esiti = pd.crosstab(df["bucket"], df["esito"])
+    for esito in ("ottimo", "piu_corto", "piu_lungo", "non_trovato"):
+        riepilogo[esito] = esiti[esito] if esito in esiti else 0
+    return riepilogo.reset_index()
+
+def main(args):
+    """Esegue gli scenari di un file .scen e stampa il riepilogo per bucket."""
+    solve_kwargs = {"use_branch_and_bound": args.branch_and_bound, "engine": args.engine}
+    records = esegui_file_scenari(
+        args.scen, map_path=args.map, buckets=args.buckets, max_per_bucket=args.max_per_bucket,
+        closure_backend=args.closure_backend, use_session=not args.cold, **solve_kwargs
+    )
+    if not records:
+        print("Nessuno scenario eseguito.")
+        return
+    riepilogo = riepilogo_per_bucket(records)
+    print(riepilogo.to_string(index=False))
+
+    df = pd.DataFrame(records)
+    totale = df["execution_time"].sum()
+    print(f"\n{len(df)} scenari in {totale:.3f} s ({len(df) / totale:.1f} interrogazioni/s).")
+    if riepilogo["piu_lungo"].sum() or riepilogo["non_trovato"].sum():
+        print("ATTENZIONE: alcuni cammini sono più lunghi dell'ottimo del .scen o non sono stati trovati.")
+    if args.output:
+        riepilogo.to_csv(args.output, index=False)
+        print(f"Riepilogo salvato in: {args.output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Esegue con CAMMINOMIN gli scenari di benchmark Moving AI (.map/.scen).")
+    parser.add_argument("--scen", required=True, help="File .scen con gli scenari da eseguire.")
+    parser.add_argument("--map", help="File .map da usare per tutti gli scenari (default: quello indicato nel .scen).")
+    parser.add_argument("--buckets", type=int, nargs="+", help="Bucket da eseguire (default: tutti).")
+    parser.add_argument("--max_per_bucket", type=int, help="Numero massimo di scenari eseguiti per bucket.")
+    parser.add_argument("--closure_backend", default="sweep", help="Backend di chiusura usato dai solver.")
+    parser.add_argument("--engine", default="ricorsivo", choices=["ricorsivo", "iterativo"], help="Motore di ricerca del solver.")
+    parser.add_argument("--branch_and_bound", action="store_true", help="Attiva il pruning globale con incumbent.")
+    parser.add_argument("--cold", action="store_true", help="Risolve ogni scenario con cache vuote invece di una sessione condivisa.")
+    parser.add_argument("--output", help="File CSV in cui salvare il riepilogo per bucket.")
+    main(parser.parse_args())
@@ -0,0 +1,205 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import path_logic
+from data_structures import CompactGrid
+from solver import PathfindingSolver, _statistiche_iniziali
+
+# Stato di ogni processo worker, inizializzato una sola volta da _inizializza_worker
+_WORKER = {}
+
+class _SolverWorker(PathfindingSolver):
+    """
+    Solver usato nei processi worker: l'incumbent del branch-and-bound è condiviso
+    tra tutti i processi tramite un multiprocessing.Value, così ogni worker pota
+    anche grazie ai cammini trovati dagli altri.
+    """
+    def __init__(self, grid, origin, destination, closure_backend, incumbent_condiviso,
+                 closure_cache, memoization_cache):
+        super().__init__(grid, origin, destination, closure_backend=closure_backend,
+                         closure_cache=closure_cache, memoization_cache=memoization_cache)
+        self._incumbent_condiviso = incumbent_condiviso
+
+    def _apri_nodo(self, *args, **kwargs):
+        condiviso = self._incumbent_condiviso.value
+        if condiviso < self._incumbent:
+            self._incumbent = condiviso
+        return super()._apri_nodo(*args, **kwargs)
+
+    def _aggiorna_incumbent(self, lunghezza):
+        if lunghezza < self._incumbent:
+            self._incumbent = lunghezza
+            with self._incumbent_condiviso.get_lock():
+                if lunghezza < self._incumbent_condiviso.value:
+                    self._incumbent_condiviso.value = lunghezza
+
+def _inizializza_worker(rows, cols, obstacles, destination, closure_backend, incumbent_condiviso):
+    """
+    Inizializzatore del pool: ricostruisce la griglia (come CompactGrid) una sola
+    volta per processo e prepara le cache condivise dai task dello stesso worker.
+    """
+    _WORKER["grid"] = CompactGrid(rows, cols, bytearray(obstacles))
+    _WORKER["destination"] = destination
+    _WORKER["closure_backend"] = closure_backend
+    _WORKER["incumbent"] = incumbent_condiviso
+    _WORKER["closure_cache"] = {}
+    _WORKER["memoization_cache"] = {}
+
+def _risolvi_sottoproblema(task):
+    """
+    Risolve nel worker il sottoproblema CAMMINOMIN(F, D) con gli ostacoli proibiti
+    indicati, partendo dal costo già accumulato dalla radice.
+    Ritorna (indice, lunghezza F->D, sequenza F->D, statistiche, frontiere viste).
+    """
+    indice, f_pos, forbidden_obstacles, costo_accumulato, depth, use_cache, use_pruning = task
+    destination = _WORKER["destination"]
+    incumbent = _WORKER["incumbent"]
+    solver = _SolverWorker(
+        _WORKER["grid"], f_pos, destination, _WORKER["closure_backend"], incumbent,
+        _WORKER["closure_cache"] if use_cache else None,
+        _WORKER["memoization_cache"] if use_cache else None
+    )
+    frontiere = solver.stats.pop("total_unique_frontiers")
+    # Il ramo potrebbe già essere escluso dall'incumbent trovato nel frattempo da altri worker
+    if costo_accumulato + path_logic.calcola_distanza_libera(f_pos, destination) >= incumbent.value:
+        solver.stats["pruning_successes"] += 1
+        solver.stats["pruning_successes_global"] += 1
+        return indice, float('inf'), [], solver.stats, frontiere
+
+    solver.stats["total_unique_frontiers"] = frontiere
+    solver._incumbent = incumbent.value
+    len_fd, seq_fd = solver._cammino_min_ricorsivo(
+        f_pos, destination, forbidden_obstacles, depth,
+        use_cache=use_cache, use_pruning=use_pruning,
+        use_branch_and_bound=True, costo_accumulato=costo_accumulato
+    )
+    frontiere = solver.stats.pop("total_unique_frontiers")
+    return indice, len_fd, seq_fd, solver.stats, frontiere
+
+class ParallelPathfindingSolver(PathfindingSolver):
+    """
+    Variante di PathfindingSolver che distribuisce su un ProcessPoolExecutor i
+    sottoproblemi generati dalla frontiera dei primi 'parallel_depth' livelli.
+    I worker condividono la miglior lunghezza trovata (branch-and-bound globale),
+    quindi la lunghezza restituita coincide con quella del solver sequenziale.
+    Il pool resta aperto tra una solve() e l'altra, con le cache dei worker, e va chiuso
+    con close() oppure usando il solver come context manager.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._executor = None
+        self._configurazione_pool = None
+        self._incumbent_condiviso = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Chiude il pool dei worker, che verrà ricreato alla prossima solve()."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+            self._configurazione_pool = None
+            self._incumbent_condiviso = None
+
+    def _pool(self, n_workers):
+        """
+        Restituisce il pool dei worker, creandolo alla prima richiesta oppure di nuovo
+        se numero di processi, ostacoli, destinazione o backend sono cambiati, perché
+        l'inizializzatore dei worker li fissa una volta per processo.
+        """
+        obstacles = (~self.grid.get_free_mask()).astype(np.uint8).tobytes()
+        configurazione = (n_workers, obstacles, self.destination, self.closure_backend)
+        if self._executor is None or self._configurazione_pool != configurazione:
+            self.close()
+            self._incumbent_condiviso = multiprocessing.Value('d', float('inf'))
+            self._executor = ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_inizializza_worker,
+                initargs=(self.grid.rows, self.grid.cols, obstacles, self.destination,
+                          self.closure_backend, self._incumbent_condiviso)
+            )
+            self._configurazione_pool = configurazione
+        return self._executor
+
+    def solve(self, debug=False, use_cache=True, use_pruning=True, n_workers=None, parallel_depth=1):
+        """
+        Risolve CAMMINOMIN(origin, destination) in parallelo.
+        :param n_workers: numero di processi (default: os.cpu_count()).
+        :param parallel_depth: numero di livelli espansi nel processo principale; le
+                               celle di frontiera dell'ultimo livello diventano i task.
+        """
+        self.stats = _statistiche_iniziali()
+        if use_cache and not self._cache_condivisa:
+            self.memoization_cache = {}
+        self._incumbent = float('inf')
+        n_workers = n_workers or os.cpu_count()
+
+        start_time = time.perf_counter()
+        candidati, tasks = self._espandi(max(1, parallel_depth), use_cache)
+
+        if tasks:
+            executor = self._pool(n_workers)
+            self._incumbent_condiviso.value = self._incumbent
+            richieste = [
+                (indice, f_pos, forbidden, costo, depth, use_cache, use_pruning)
+                for indice, (f_pos, forbidden, costo, depth, _) in enumerate(tasks)
+            ]
+            for indice, len_fd, seq_fd, stats, frontiere in executor.map(_risolvi_sottoproblema, richieste):
+                self._unisci_statistiche(stats, frontiere)
+                if len_fd != float('inf'):
+                    _, _, costo, _, prefisso = tasks[indice]
+                    candidati.append((costo + len_fd, indice, path_logic.compatta_sequenza(prefisso, seq_fd)))
+
+        if candidati:
+            self.lunghezza_minima, _, self.sequenza_landmark = min(candidati, key=lambda c: (c[0], c[1]))
+        else:
+            self.lunghezza_minima, self.sequenza_landmark = float('inf'), []
+
+        self.stats["execution_time"] = time.perf_counter() - start_time
+        if debug:
+            print(f"--- Esecuzione parallela completata in {self.stats['execution_time']:.4f} secondi "
+                  f"({len(tasks)} sottoproblemi su {n_workers} processi) ---")
+
+    def _espandi(self, parallel_depth, use_cache):
+        """
+        Espande nel processo principale i primi 'parallel_depth' livelli della ricerca.
+        Ritorna i cammini completi già trovati, come (lunghezza, -1, sequenza), e i task,
+        come (F, ostacoli proibiti, costo accumulato fino a F, profondità, sequenza fino a F).
+        """
+        candidati, tasks = [], []
+        da_espandere = [(self.origin, 0, 0.0, 0, [])]
+        while da_espandere:
+            origin, forbidden, costo, depth, prefisso = da_espandere.pop(0)
+            risultato, nodo = self._apri_nodo(origin, self.destination, forbidden, depth, use_cache, costo)
+            if nodo is None:
+                if risultato[0] != float('inf'):
+                    sequenza = path_logic.compatta_sequenza(prefisso, risultato[1]) if prefisso else risultato[1]
+                    candidati.append((costo + risultato[0], -1, sequenza))
+                continue
+            for f_pos, f_type in nodo.frontiera:
+                len_of = path_logic.calcola_distanza_libera(origin, f_pos)
+                if costo + len_of + path_logic.calcola_distanza_libera(f_pos, self.destination) >= self._incumbent:
+                    self.stats["pruning_successes"] += 1
+                    self.stats["pruning_successes_global"] += 1
+                    continue
+                prefisso_f = path_logic.compatta_sequenza(prefisso or [(origin, 0)], [(origin, 0), (f_pos, f_type)])
+                figlio = (f_pos, nodo.new_forbidden_obstacles, costo + len_of, depth + 1, prefisso_f)
+                if depth + 1 < parallel_depth:
+                    da_espandere.append(figlio)
+                else:
+                    tasks.append(figlio)
+        return candidati, tasks
+
+    def _unisci_statistiche(self, stats, frontiere):
+        """Somma alle statistiche del solver quelle restituite da un worker."""
+        for chiave in ("recursive_calls", "cache_hits", "pruning_successes",
+                       "pruning_successes_local", "pruning_successes_global"):
+            self.stats[chiave] += stats[chiave]
+        self.stats["max_recursion_depth"] = max(self.stats["max_recursion_depth"], stats["max_recursion_depth"])
+        self.stats["total_unique_frontiers"].update(frontiere)
@@ -1,5 +1,4 @@
 import math
-import numpy as np
 from data_structures import Grid
 
 def is_path_free(grid: Grid, path, forbidden_obstacles=frozenset()):
@@ -37,7 +36,7 @@ def generate_path_coordinates(origin, destination, diagonal_first):
     delta_r, delta_c = r_dest - r_curr, c_dest - c_curr
     num_diag = min(abs(delta_r), abs(delta_c))
     num_rect = abs(abs(delta_r) - abs(delta_c))
-    step_r, step_c = int(np.sign(delta_r)), int(np.sign(delta_c))
+    step_r, step_c = (delta_r > 0) - (delta_r < 0), (delta_c > 0) - (delta_c < 0)
     
     if abs(delta_r) > abs(delta_c):
         rect_step_r, rect_step_c = step_r, 0
@@ -94,4 +93,19 @@ def compatta_sequenza(seq1, seq2):
         list[tuple[int, int]]: Sequenza compatta risultante dalla concatenazione.
     """
     if not isinstance(seq2, list) or not seq2: return seq1
-    return seq1 + seq2[1:]
\ No newline at end of file
+    return seq1 + seq2[1:]
+def percorso_contiene(sequenza, cella):
+    """
+    Controlla se il cammino descritto da una sequenza di landmark [(coord, tipo), ...]
+    passa per 'cella'. Ogni tratto arriva al suo landmark con un cammino libero di tipo 1
+    (prima le diagonali) o di tipo 2 (prima le mosse rettilinee); i tratti il cui
+    rettangolo non contiene la cella vengono scartati senza generarne le coordinate.
+    """
+    r, c = cella
+    for (origine, _), (arrivo, tipo) in zip(sequenza, sequenza[1:]):
+        if not (min(origine[0], arrivo[0]) <= r <= max(origine[0], arrivo[0]) and
+                min(origine[1], arrivo[1]) <= c <= max(origine[1], arrivo[1])):
+            continue
+        if cella in generate_path_coordinates(origine, arrivo, tipo == 1):
+            return True
+    return bool(sequenza) and sequenza[0][0] == cella
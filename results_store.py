@@ -0,0 +1,199 @@
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.feather
+except ImportError:
+    pyarrow = None
+
+VERSIONE_SCHEMA = 1
+FORMATI = ("auto", "npz", "feather")
+
+# Colonne con pochi valori distinti, salvate come categorie (codici interi + elenco dei valori)
+COLONNE_CATEGORICHE = ("id_scenario", "type", "test_type", "family")
+# Colonne di coordinate (r, c), salvate come due colonne intere <nome>_r e <nome>_c (-1 se assenti)
+COLONNE_COORDINATE = ("origin", "destination")
+
+_CHIAVE_SCHEMA = "__schema__"
+_PREFISSO_CATEGORIE = "__categorie__"
+
+def _separa_coordinate(colonna):
+    """
+    Converte una colonna di coordinate (tuple o stringhe "(r, c)" dei vecchi CSV) in due
+    array int32 di righe e colonne, con -1 per i valori mancanti.
+    """
+    if not pd.api.types.is_numeric_dtype(colonna) and colonna.map(lambda x: isinstance(x, str)).any():
+        parti = colonna.astype(str).str.extract(r"\(\s*(-?\d+)\s*,\s*(-?\d+)\s*\)")
+        return (parti[0].fillna(-1).astype(np.int32).to_numpy(),
+                parti[1].fillna(-1).astype(np.int32).to_numpy())
+    coppie = [x if isinstance(x, (tuple, list)) and len(x) == 2 else (-1, -1) for x in colonna]
+    coordinate = np.array(coppie, dtype=np.int32).reshape(-1, 2)
+    return coordinate[:, 0], coordinate[:, 1]
+
+def _colonna_seme(colonna):
+    """
+    Converte la colonna dei semi in uint64. Se alcuni valori mancano (righe di CSV scritte
+    prima dell'introduzione del seme) usa il tipo nullable UInt64, passando per interi
+    Python per non perdere precisione sui semi oltre 2**53.
+    """
+    mancanti = colonna.isna() | (colonna.astype(str) == "")
+    if not mancanti.any():
+        return colonna.astype(np.uint64)
+    return pd.array([pd.NA if m else int(x) for x, m in zip(colonna, mancanti)], dtype="UInt64")
+
+def normalizza_risultati(df):
+    """
+    Porta un DataFrame di risultati allo schema tipizzato: coordinate in colonne intere
+    <nome>_r/<nome>_c, colonne categoriche come 'category', interi come int64 (il seme
+    come uint64) e le altre metriche numeriche come float64.
+    Funziona sia sui record appena prodotti sia sui vecchi CSV con le tuple in formato stringa.
+    """
+    df = df.copy()
+    for nome in COLONNE_COORDINATE:
+        if nome in df.columns:
+            df[f"{nome}_r"], df[f"{nome}_c"] = _separa_coordinate(df.pop(nome))
+    for nome in df.columns:
+        colonna = df[nome]
+        if nome in COLONNE_CATEGORICHE:
+            df[nome] = colonna.astype(str).astype("category")
+        elif nome == "seed":
+            df[nome] = _colonna_seme(colonna)
+        elif pd.api.types.is_bool_dtype(colonna):
+            df[nome] = colonna.astype(bool)
+        elif pd.api.types.is_integer_dtype(colonna):
+            df[nome] = colonna.astype(np.int64)
+        elif pd.api.types.is_numeric_dtype(colonna):
+            df[nome] = colonna.astype(np.float64)
+    return df
+
+def risultati_da_records(records):
+    """Crea il DataFrame tipizzato dalla lista di dizionari prodotta da experiment.esegui_run."""
+    return normalizza_risultati(pd.DataFrame.from_records(records))
+
+def _formato_effettivo(formato):
+    """Risolve il formato 'auto': feather se pyarrow è disponibile, altrimenti npz."""
+    if formato not in FORMATI:
+        raise ValueError(f"Formato '{formato}' non valido. Formati disponibili: {list(FORMATI)}")
+    if formato == "auto":
+        return "feather" if pyarrow is not None else "npz"
+    if formato == "feather" and pyarrow is None:
+        raise ValueError("Il formato 'feather' richiede il pacchetto pyarrow.")
+    return formato
+
+def _scrivi_npz(df, filename):
+    """Salva il DataFrame tipizzato in un file .npz, una colonna per array più lo schema."""
+    array = {}
+    categoriche = []
+    for nome in df.columns:
+        colonna = df[nome]
+        if isinstance(colonna.dtype, pd.CategoricalDtype):
+            categoriche.append(nome)
+            array[nome] = colonna.cat.codes.to_numpy(dtype=np.int32)
+            array[_PREFISSO_CATEGORIE + nome] = np.asarray(colonna.cat.categories, dtype=str)
+        elif colonna.dtype == object:
+            array[nome] = colonna.astype(str).to_numpy(dtype=str)
+        else:
+            array[nome] = colonna.to_numpy()
+    schema = {"version": VERSIONE_SCHEMA, "columns": list(df.columns), "categorical": categoriche}
+    array[_CHIAVE_SCHEMA] = np.array(json.dumps(schema))
+    np.savez(filename, **array)
+
+def _leggi_npz(filename):
+    """Legge un file .npz scritto da _scrivi_npz e ricostruisce il DataFrame tipizzato."""
+    with np.load(filename, allow_pickle=False) as dati:
+        schema = json.loads(str(dati[_CHIAVE_SCHEMA]))
+        _verifica_versione(schema.get("version"), filename)
+        colonne = {}
+        for nome in schema["columns"]:
+            if nome in schema["categorical"]:
+                colonne[nome] = pd.Categorical.from_codes(dati[nome], categories=dati[_PREFISSO_CATEGORIE + nome])
+            else:
+                colonne[nome] = dati[nome]
+    return pd.DataFrame(colonne)
+
+def _scrivi_feather(df, filename):
+    """Salva il DataFrame tipizzato in formato feather, con la versione dello schema nei metadati."""
+    tabella = pyarrow.Table.from_pandas(df, preserve_index=False)
+    metadati = dict(tabella.schema.metadata or {})
+    metadati[b"schema_version"] = str(VERSIONE_SCHEMA).encode()
+    pyarrow.feather.write_feather(tabella.replace_schema_metadata(metadati), filename)
+
+def _leggi_feather(filename):
+    """Legge un file feather scritto da _scrivi_feather."""
+    if pyarrow is None:
+        raise ValueError(f"Impossibile leggere '{filename}': il formato 'feather' richiede il pacchetto pyarrow.")
+    tabella = pyarrow.feather.read_table(filename)
+    versione = (tabella.schema.metadata or {}).get(b"schema_version")
+    _verifica_versione(int(versione) if versione is not None else None, filename)
+    return tabella.to_pandas()
+
+def _verifica_versione(versione, filename):
+    if versione != VERSIONE_SCHEMA:
+        raise ValueError(f"Versione dello schema '{versione}' di '{filename}' non supportata (attesa {VERSIONE_SCHEMA}).")
+
+def _prossimo_blocco(output_dir, id_scenario):
+    """
+    Numero del prossimo blocco dello scenario: uno in più del massimo già presente (in
+    qualsiasi formato), così la cancellazione di un blocco non fa riusare un numero esistente.
+    """
+    numeri = []
+    for filename in glob.glob(os.path.join(output_dir, f"results_{glob.escape(id_scenario)}.*.*")):
+        numero = os.path.basename(filename)[len(f"results_{id_scenario}."):].split(".")[0]
+        if numero.isdigit():
+            numeri.append(int(numero))
+    return max(numeri) + 1 if numeri else 0
+
+def aggiungi_risultati(id_scenario, records, output_dir="experiment_data", formato="auto"):
+    """
+    Aggiunge i record di uno scenario all'archivio dei risultati. I file binari non si
+    possono estendere sul posto, quindi ogni aggiunta scrive un nuovo blocco
+    results_<id_scenario>.<n>.<formato> accanto a quelli già presenti.
+        Returns
+            - str: Il percorso del blocco scritto.
+    """
+    formato = _formato_effettivo(formato)
+    os.makedirs(output_dir, exist_ok=True)
+    df = risultati_da_records(records)
+    filename = os.path.join(output_dir, f"results_{id_scenario}.{_prossimo_blocco(output_dir, id_scenario):05d}.{formato}")
+    if formato == "npz":
+        _scrivi_npz(df, filename)
+    else:
+        _scrivi_feather(df, filename)
+    return filename
+
+def leggi_blocco(filename):
+    """Legge un singolo blocco dell'archivio (.npz o .feather)."""
+    if filename.endswith(".npz"):
+        return _leggi_npz(filename)
+    return _leggi_feather(filename)
+
+def file_archivio(data_directory="experiment_data"):
+    """Restituisce, in ordine, i blocchi binari dell'archivio presenti nella directory."""
+    return sorted(glob.glob(os.path.join(data_directory, "results_*.npz")) +
+                  glob.glob(os.path.join(data_directory, "results_*.feather")))
+
+def unisci_risultati(df_list):
+    """
+    Concatena più DataFrame tipizzati ricostruendo le colonne categoriche sull'unione dei valori.
+    Booleani e seme diventano tipi nullable di pandas, così le righe dei blocchi in cui
+    mancano (ad esempio i vecchi CSV senza 'seed') non li trasformano in float o object.
+    """
+    df_list = [df.astype({nome: "boolean" if pd.api.types.is_bool_dtype(df[nome]) else "UInt64"
+                          for nome in df.columns if pd.api.types.is_bool_dtype(df[nome]) or nome == "seed"})
+               for df in df_list]
+    df = pd.concat(df_list, ignore_index=True)
+    for nome in COLONNE_CATEGORICHE:
+        if nome in df.columns and not isinstance(df[nome].dtype, pd.CategoricalDtype):
+            df[nome] = df[nome].astype("category")
+    return df
+
+def carica_risultati(data_directory="experiment_data"):
+    """Carica tutti i blocchi binari della directory in un unico DataFrame (None se non ce ne sono)."""
+    blocchi = file_archivio(data_directory)
+    if not blocchi:
+        return None
+    return unisci_risultati([leggi_blocco(f) for f in blocchi])
@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import json
+import os
+import stat
+import sys
+import time
+from collections import deque
+import numpy as np
+import grid_corpus
+import movingai
+from session import GridSession
+
+# Latenze recenti conservate per le statistiche (media, percentili e massimo)
+MAX_LATENZE = 10000
+# Limite di default della memoria stimata della cache delle chiusure di ogni mappa (MiB)
+MAX_CLOSURE_MB = 256
+
+# Opzioni di PathfindingSolver.solve accettate nelle interrogazioni
+OPZIONI_SOLVE = ("use_cache", "use_pruning", "engine", "use_branch_and_bound", "seed_upper_bound", "profile")
+
+def carica_mappa(path):
+    """
+    Carica una matrice di ostacoli da file: .npy (array 2D, 1 = ostacolo), .json
+    (lista di liste) oppure .map di Moving AI. Restituisce la matrice come array numpy.
+    """
+    if path.endswith(".npy"):
+        return np.load(path)
+    if path.endswith(".map"):
+        return movingai.leggi_maschera(path)
+    if path.endswith(".json"):
+        with open(path) as f:
+            return np.array(json.load(f), dtype=np.uint8)
+    raise ValueError(f"Formato della mappa '{path}' non supportato: usare .npy, .json o .map.")
+
+def _lunghezza_json(lunghezza):
+    """JSON non ammette inf: un cammino inesistente viene restituito come null."""
+    return None if lunghezza == float('inf') else lunghezza
+
+def _cella(richiesta, chiave):
+    """Legge la cella 'chiave' della richiesta, che deve essere una coppia [r, c] di interi."""
+    valore = richiesta[chiave]
+    if (not isinstance(valore, (list, tuple)) or len(valore) != 2
+            or any(not isinstance(x, int) or isinstance(x, bool) for x in valore)):
+        raise ValueError(f"Cella '{chiave}' non valida: {valore!r}. Attesa una coppia [r, c] di interi.")
+    return tuple(valore)
+
+class QueryServer:
+    """
+    Server di interrogazioni a lunga durata: tiene in memoria una GridSession per ogni
+    mappa caricata, quindi Grid e cache di chiusure e sottoproblemi restano calde tra
+    un'interrogazione e l'altra.
+    Riceve richieste JSON, una per riga, e risponde con una riga JSON per richiesta:
+        {"id": 1, "map": "nome", "origin": [r, c], "destination": [r, c], "use_branch_and_bound": true}
+        {"id": 2, "cmd": "stats"}            statistiche di latenza e delle cache
+        {"id": 3, "cmd": "maps"}             mappe caricate
+        {"id": 4, "cmd": "clear", "map": "nome"}  svuota le cache di una mappa
+    Le richieste di una connessione vengono servite in modo concorrente (le risposte
+    possono arrivare in ordine diverso, si abbinano con "id"); le risoluzioni sulla
+    stessa mappa sono serializzate perché ne condividono le cache.
+    La cache delle chiusure di ogni mappa è limitata a 'max_closure_mb' MiB (stimati) e le
+    statistiche di latenza riguardano le ultime MAX_LATENZE richieste, quindi la memoria
+    del server non cresce con il numero di interrogazioni servite.
+    """
+    def __init__(self, closure_backend="sweep", compact_grid=True, max_closure_mb=MAX_CLOSURE_MB):
+        self.closure_backend = closure_backend
+        self.compact_grid = compact_grid
+        self.max_closure_bytes = int(max_closure_mb * 2**20) if max_closure_mb is not None else None
+        self.sessioni = {}
+        self._lock = {}
+        self.latenze = deque(maxlen=MAX_LATENZE)
+        self.richieste = 0
+        self.errori = 0
+
+    def aggiungi_mappa(self, nome, grid_data):
+        """Registra una mappa (matrice di ostacoli o Grid) con il nome indicato."""
+        self.sessioni[nome] = GridSession(grid_data, closure_backend=self.closure_backend, compact_grid=self.compact_grid,
+                                          max_closure_bytes=self.max_closure_bytes)
+        self._lock[nome] = asyncio.Lock()
+
+    async def gestisci_riga(self, riga):
+        """Elabora una riga di richiesta e restituisce il dizionario di risposta."""
+        inizio = time.perf_counter()
+        id_richiesta = None
+        try:
+            richiesta = json.loads(riga)
+            if not isinstance(richiesta, dict):
+                raise ValueError("La richiesta deve essere un oggetto JSON.")
+            id_richiesta = richiesta.get("id")
+            comando = richiesta.get("cmd", "solve")
+            if comando == "solve":
+                risposta = await self._risolvi(richiesta)
+            elif comando == "stats":
+                risposta = self.get_stats_summary()
+            elif comando == "maps":
+                risposta = {"maps": {nome: [s.grid.rows, s.grid.cols] for nome, s in self.sessioni.items()}}
+            elif comando == "clear":
+                self._sessione(richiesta).clear_caches()
+                risposta = {}
+            else:
+                raise ValueError(f"Comando '{comando}' non valido. Comandi disponibili: ['solve', 'stats', 'maps', 'clear']")
+            risposta = {"id": id_richiesta, "ok": True, **risposta}
+        except (ValueError, KeyError, TypeError) as e:
+            self.errori += 1
+            risposta = {"id": id_richiesta, "ok": False, "error": str(e)}
+        except Exception as e:
+            # Un errore imprevisto su una richiesta non deve interrompere il server
+            self.errori += 1
+            risposta = {"id": id_richiesta, "ok": False, "error": f"Errore interno ({type(e).__name__}): {e}"}
+        latenza = time.perf_counter() - inizio
+        self.latenze.append(latenza)
+        self.richieste += 1
+        risposta["latency_ms"] = latenza * 1000
+        return risposta
+
+    def _sessione(self, richiesta):
+        nome = richiesta.get("map")
+        if nome is None and len(self.sessioni) == 1:
+            nome = next(iter(self.sessioni))
+        if nome not in self.sessioni:
+            raise ValueError(f"Mappa '{nome}' non caricata. Mappe disponibili: {list(self.sessioni.keys())}")
+        return self.sessioni[nome]
+
+    async def _risolvi(self, richiesta):
+        sessione = self._sessione(richiesta)
+        origin, destination = _cella(richiesta, "origin"), _cella(richiesta, "destination")
+        opzioni = {k: v for k, v in richiesta.items() if k not in ("id", "cmd", "map", "origin", "destination")}
+        sconosciute = set(opzioni) - set(OPZIONI_SOLVE)
+        if sconosciute:
+            raise ValueError(f"Opzioni non valide: {sorted(sconosciute)}. Opzioni disponibili: {list(OPZIONI_SOLVE)}")
+        for cella in (origin, destination):
+            if not sessione.grid.is_within_bounds(cella):
+                raise ValueError(f"Cella {list(cella)} fuori dalla griglia.")
+
+        nome = richiesta.get("map") or next(iter(self.sessioni))
+        async with self._lock[nome]:
+            # La risoluzione è CPU-bound: gira in un thread per non bloccare le altre connessioni
+            solver = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: sessione.solve(origin, destination, **opzioni)
+            )
+        return {
+            "lunghezza": _lunghezza_json(solver.lunghezza_minima),
+            "sequenza": [[r, c, t] for (r, c), t in solver.sequenza_landmark],
+            "stats": solver.get_stats_summary(),
+            "cache": sessione.get_stats_summary(),
+        }
+
+    def get_stats_summary(self):
+        """
+        Numero di richieste servite, latenze (in millisecondi) delle ultime MAX_LATENZE e
+        statistiche delle cache di ogni mappa.
+        """
+        latenze = np.array(self.latenze) * 1000
+        riepilogo = {"requests": self.richieste, "errors": self.errori}
+        if len(latenze):
+            riepilogo.update({
+                "latency_mean_ms": float(latenze.mean()),
+                "latency_p50_ms": float(np.percentile(latenze, 50)),
+                "latency_p95_ms": float(np.percentile(latenze, 95)),
+                "latency_max_ms": float(latenze.max()),
+            })
+        riepilogo["maps"] = {nome: s.get_stats_summary() for nome, s in self.sessioni.items()}
+        return riepilogo
+
+    async def _servi_flusso(self, reader, scrivi):
+        """Legge le richieste riga per riga e avvia un task per ciascuna."""
+        tasks = set()
+        while True:
+            riga = await reader.readline()
+            if not riga:
+                break
+            if not riga.strip():
+                continue
+
+            async def rispondi(riga=riga):
+                scrivi(json.dumps(await self.gestisci_riga(riga)) + "\n")
+
+            task = asyncio.create_task(rispondi())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def servi_socket(self, path):
+        """Serve le richieste su un socket Unix locale finché il processo non viene interrotto."""
+        async def connessione(reader, writer):
+            await self._servi_flusso(reader, lambda testo: writer.write(testo.encode()))
+            await writer.drain()
+            writer.close()
+
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(connessione, path)
+        print(f"Server in ascolto su {path} ({len(self.sessioni)} mappe caricate).", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    async def servi_stdin(self):
+        """
+        Serve le richieste lette da stdin, scrivendo le risposte su stdout, fino alla fine dell'input.
+        stdin può essere una pipe, un terminale o un file rediretto ('< richieste.jsonl'):
+        un file regolare non è supportato da connect_read_pipe, quindi viene letto riga per
+        riga in un thread.
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        alimentatore = None
+        if stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode):
+            alimentatore = asyncio.create_task(_alimenta_da_file(reader, sys.stdin.buffer))
+        else:
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+        def scrivi(testo):
+            sys.stdout.write(testo)
+            sys.stdout.flush()
+
+        await self._servi_flusso(reader, scrivi)
+        if alimentatore is not None:
+            await alimentatore
+
+async def _alimenta_da_file(reader, f):
+    """Copia le righe del file 'f' nello StreamReader, leggendole in un thread per non bloccare il loop."""
+    loop = asyncio.get_running_loop()
+    while True:
+        riga = await loop.run_in_executor(None, f.readline)
+        if not riga:
+            break
+        reader.feed_data(riga)
+    reader.feed_eof()
+
+def main(args):
+    """Carica le mappe richieste e avvia il server sul socket Unix o su stdin."""
+    server = QueryServer(closure_backend=args.closure_backend, max_closure_mb=args.max_closure_mb)
+    for voce in args.map or []:
+        nome, separatore, path = voce.partition("=")
+        if not separatore:
+            nome, path = os.path.splitext(os.path.basename(voce))[0], voce
+        server.aggiungi_mappa(nome, carica_mappa(path))
+    if args.corpus:
+        corpus = grid_corpus.apri_corpus(args.corpus)
+        for indice in range(len(corpus)):
+            server.aggiungi_mappa(f"corpus:{indice}", corpus.grid(indice))
+    if not server.sessioni:
+        raise SystemExit("Nessuna mappa caricata: indicare almeno una --map o un --corpus.")
+
+    if args.socket:
+        asyncio.run(server.servi_socket(args.socket))
+    else:
+        asyncio.run(server.servi_stdin())
+        print(json.dumps(server.get_stats_summary()), file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server locale di interrogazioni CAMMINOMIN con mappe e cache sempre calde.")
+    parser.add_argument("--map", action="append", help="Mappa da caricare, come NOME=PERCORSO (.npy, .json o .map). Ripetibile.")
+    parser.add_argument("--corpus", help="Directory di un corpus di mappe: ogni mappa viene caricata come 'corpus:<indice>'.")
+    parser.add_argument("--socket", help="Percorso del socket Unix su cui ascoltare (default: richieste da stdin).")
+    parser.add_argument("--closure_backend", default="sweep", help="Backend di chiusura usato dai solver.")
+    parser.add_argument("--max_closure_mb", type=float, default=MAX_CLOSURE_MB,
+                        help="Memoria stimata massima (MiB) della cache delle chiusure di ogni mappa: "
+                             "oltre il limite si scartano le chiusure usate meno di recente.")
+    main(parser.parse_args())
@@ -0,0 +1,229 @@
+import os
+import time
+from collections import OrderedDict
+from data_structures import Grid
+import path_logic
+import closure_logic
+from solver import PathfindingSolver
+from distance_field import DistanceFieldSolver
+from landmark_index import LandmarkIndex
+
+class ClosureCache(OrderedDict):
+    """
+    Cache delle chiusure: {(origine, ostacoli proibiti): closure_logic.Chiusura}.
+    È un dizionario che in più conta i successi e i fallimenti di get() e, se 'max_bytes'
+    è indicato, funziona da cache LRU: quando la memoria stimata delle chiusure
+    (Chiusura.stima_byte) supera il limite scarta quelle usate meno di recente.
+    """
+    def __init__(self, max_bytes=None):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        risultato = super().get(key, default)
+        if risultato is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.move_to_end(key)
+        return risultato
+
+    def __setitem__(self, key, chiusura):
+        if key in self:
+            del self[key]
+        super().__setitem__(key, chiusura)
+        self.bytes += chiusura.stima_byte()
+        if self.max_bytes is not None:
+            while self.bytes > self.max_bytes and len(self) > 1:
+                _, scartata = super().popitem(last=False)
+                self.bytes -= scartata.stima_byte()
+                self.evictions += 1
+
+    def __delitem__(self, key):
+        self.bytes -= self[key].stima_byte()
+        super().__delitem__(key)
+
+class GridSession:
+    """
+    Mantiene una sola Grid e le cache condivise (chiusure e sottoproblemi) per
+    rispondere a molte interrogazioni (O, D) sulla stessa mappa.
+    Le chiusure non dipendono dalla destinazione, quindi interrogazioni ripetute o
+    inverse (D, O) riusano gran parte del lavoro già svolto.
+    """
+    def __init__(self, grid_data, closure_backend="naive", compact_grid=False, max_closure_bytes=None):
+        """
+        :param grid_data: matrice di ostacoli oppure Grid già costruita.
+        :param closure_backend: backend di closure_logic.BACKEND_CHIUSURA usato dai solver.
+        :param compact_grid: se True costruisce una CompactGrid.
+        :param max_closure_bytes: limite (stimato, in byte) della cache delle chiusure, oltre
+                                  il quale si scartano le meno usate di recente (None = nessun limite).
+        """
+        if isinstance(grid_data, Grid):
+            self.grid = grid_data
+        else:
+            self.grid = Grid.from_matrix(grid_data, compact=compact_grid)
+        self.closure_backend = closure_backend
+        self.max_closure_bytes = max_closure_bytes
+        self.closure_cache = ClosureCache(max_closure_bytes)
+        self.memoization_cache = {}
+        self._landmark_index = None
+        self.stats = {"queries": 0, "total_time": 0.0, "obstacle_updates": 0,
+                      "invalidated_closures": 0, "invalidated_subproblems": 0, "invalidation_time": 0.0}
+
+    def solver(self, origin, destination):
+        """Crea un PathfindingSolver che condivide Grid e cache della sessione."""
+        return PathfindingSolver(
+            self.grid, origin, destination,
+            closure_backend=self.closure_backend,
+            closure_cache=self.closure_cache,
+            memoization_cache=self.memoization_cache
+        )
+
+    def solve(self, origin, destination, debug=False, use_cache=True, use_pruning=True, **solve_kwargs):
+        """
+        Risolve CAMMINOMIN(origin, destination) e restituisce il solver usato, da cui
+        leggere lunghezza_minima, sequenza_landmark e get_stats_summary().
+        Gli altri parametri (engine, use_branch_and_bound, ...) sono passati a PathfindingSolver.solve.
+        """
+        solver = self.solver(origin, destination)
+        solver.solve(debug=debug, use_cache=use_cache, use_pruning=use_pruning, **solve_kwargs)
+        self.stats["queries"] += 1
+        self.stats["total_time"] += solver.stats["execution_time"]
+        return solver
+
+    def solve_many(self, pairs, **solve_kwargs):
+        """
+        Risolve in sequenza una lista di coppie (origine, destinazione) e
+        restituisce la lista dei solver, nello stesso ordine.
+        """
+        return [self.solve(origin, destination, **solve_kwargs) for origin, destination in pairs]
+
+    def distance_field(self, origin, targets=None, **solve_kwargs):
+        """
+        Calcola con un DistanceFieldSolver, che condivide Grid e cache delle chiusure della
+        sessione, le lunghezze minime da 'origin' verso tutte le celle (o verso 'targets').
+        Restituisce il solver, da cui leggere distanze, sequenza_landmark() e get_stats_summary().
+        """
+        solver = DistanceFieldSolver(self.grid, origin, closure_backend=self.closure_backend,
+                                     closure_cache=self.closure_cache)
+        solver.solve(targets, **solve_kwargs)
+        self.stats["queries"] += 1
+        self.stats["total_time"] += solver.stats["execution_time"]
+        return solver
+
+    def landmark_index(self, path=None):
+        """
+        Restituisce il LandmarkIndex della griglia della sessione, costruendolo alla prima
+        richiesta. Se 'path' è indicato l'indice viene caricato da quel file quando esiste,
+        altrimenti viene costruito e salvato lì.
+        """
+        if self._landmark_index is None:
+            if path is not None and os.path.exists(path):
+                self._landmark_index = LandmarkIndex.load(path, self.grid)
+            else:
+                self._landmark_index = LandmarkIndex.build(self.grid)
+                if path is not None:
+                    self._landmark_index.save(path)
+        return self._landmark_index
+
+    def set_obstacle(self, cell):
+        """
+        Trasforma 'cell' in un ostacolo e scarta solo le voci delle cache che potevano
+        passare per quella cella (vedi _invalida). Ritorna False se era già un ostacolo.
+        """
+        return self._aggiorna_cella(cell, bloccata=True)
+
+    def clear_obstacle(self, cell):
+        """
+        Libera 'cell' e scarta solo le voci delle cache che la nuova cella libera può
+        cambiare (vedi _invalida). Ritorna False se era già libera.
+        """
+        return self._aggiorna_cella(cell, bloccata=False)
+
+    def _aggiorna_cella(self, cell, bloccata):
+        modificata = self.grid.set_obstacle(cell) if bloccata else self.grid.clear_obstacle(cell)
+        if modificata:
+            start_time = time.perf_counter()
+            self._invalida(cell, bloccata)
+            # L'indice dei landmark è legato all'impronta della griglia: va ricostruito
+            self._landmark_index = None
+            self.stats["obstacle_updates"] += 1
+            self.stats["invalidation_time"] += time.perf_counter() - start_time
+        return modificata
+
+    def _invalida(self, cell, bloccata):
+        """
+        Scarta le voci delle cache su cui la modifica di 'cell' può influire.
+        Una voce che ha 'cell' tra gli ostacoli proibiti resta valida: la cella era già
+        bloccata per tutto il suo sottoalbero. Per le altre:
+            - chiusure (origine, proibiti): bloccando la cella cambiano solo le chiusure che
+              la contengono (o che partono da lì); liberandola, solo quelle in cui l'origine
+              o una cella della chiusura è tra i suoi 8 vicini, perché un cammino libero di
+              tipo 1 o 2 verso di lei o oltre di lei passa per uno di essi;
+            - sottoproblemi (O, D, proibiti): bloccando la cella si scartano quelli il cui
+              cammino minimo passa per la cella, gli altri restano minimi perché le
+              alternative possono solo diminuire; liberandola si scartano quelli senza
+              soluzione e quelli per cui un cammino attraverso la cella, lungo almeno
+              dlib(O, cella) + dlib(cella, D), potrebbe essere più corto.
+        """
+        bit = 1 << self.grid.cell_id(cell)
+        r, c = cell
+        intorno = (slice(max(r - 1, 0), r + 2), slice(max(c - 1, 0), c + 2))
+
+        def chiusura_cambia(key, chiusura):
+            origin, forbidden_obstacles = key
+            if forbidden_obstacles & bit:
+                return False
+            if bloccata:
+                return chiusura.tipo(cell) != closure_logic.FUORI
+            return bool((chiusura.tipi[intorno] != closure_logic.FUORI).any())
+
+        def sottoproblema_cambia(key, risultato):
+            origin, destination, forbidden_obstacles = key
+            if forbidden_obstacles & bit:
+                return False
+            lunghezza, sequenza = risultato
+            if bloccata:
+                return path_logic.percorso_contiene(sequenza, cell)
+            return lunghezza == float('inf') or (path_logic.calcola_distanza_libera(origin, cell) +
+                                                 path_logic.calcola_distanza_libera(cell, destination)) < lunghezza
+
+        chiusure = [key for key, chiusura in self.closure_cache.items() if chiusura_cambia(key, chiusura)]
+        for key in chiusure:
+            del self.closure_cache[key]
+        sottoproblemi = [key for key, risultato in self.memoization_cache.items() if sottoproblema_cambia(key, risultato)]
+        for key in sottoproblemi:
+            del self.memoization_cache[key]
+        self.stats["invalidated_closures"] += len(chiusure)
+        self.stats["invalidated_subproblems"] += len(sottoproblemi)
+
+    def clear_caches(self):
+        """Svuota le cache della sessione mantenendo la Grid."""
+        self.closure_cache = ClosureCache(self.max_closure_bytes)
+        self.memoization_cache = {}
+
+    def get_stats_summary(self):
+        """
+        Ritorna le statistiche della sessione: numero di interrogazioni, tempo totale,
+        dimensione delle cache, successi/fallimenti, memoria stimata e voci scartate della
+        cache delle chiusure e, per le modifiche agli ostacoli, voci scartate dalle cache
+        e tempo speso a scartarle.
+        """
+        return {
+            "queries": self.stats["queries"],
+            "total_time": self.stats["total_time"],
+            "cached_closures": len(self.closure_cache),
+            "closure_cache_hits": self.closure_cache.hits,
+            "closure_cache_misses": self.closure_cache.misses,
+            "closure_cache_bytes": self.closure_cache.bytes,
+            "closure_cache_evictions": self.closure_cache.evictions,
+            "cached_subproblems": len(self.memoization_cache),
+            "obstacle_updates": self.stats["obstacle_updates"],
+            "invalidated_closures": self.stats["invalidated_closures"],
+            "invalidated_subproblems": self.stats["invalidated_subproblems"],
+            "invalidation_time": self.stats["invalidation_time"],
+        }
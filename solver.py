@@ -1,53 +1,193 @@
 import numpy as np
-from matplotlib.colors import ListedColormap
-from matplotlib.patches import Patch
 from data_structures import Grid
 from labeling import LabelManager
 import closure_logic
+import graph_search
 import path_logic
+import tracing
 import visualization
 import time
 
+class _NodoRicerca:
+    """
+    Stato di un sottoproblema CAMMINOMIN(origin, dest) in corso di risoluzione:
+    la frontiera ordinata, la posizione raggiunta nel ciclo e il miglior risultato
+    locale. Lo usano sia il motore ricorsivo sia quello iterativo.
+    """
+    __slots__ = ("origin", "dest", "forbidden_obstacles", "depth", "cache_key", "frontiera",
+                 "new_forbidden_obstacles", "indice", "best_len", "best_seq",
+                 "f_corrente", "len_of_corrente", "costo_accumulato", "potature_globali_iniziali")
+
+    def __init__(self, origin, dest, forbidden_obstacles, depth, cache_key, frontiera,
+                 costo_accumulato=0.0, potature_globali_iniziali=0):
+        self.origin = origin
+        self.dest = dest
+        self.forbidden_obstacles = forbidden_obstacles
+        self.depth = depth
+        self.cache_key = cache_key
+        self.frontiera = frontiera
+        self.costo_accumulato = costo_accumulato
+        self.potature_globali_iniziali = potature_globali_iniziali
+        self.new_forbidden_obstacles = forbidden_obstacles
+        self.indice = 0
+        self.best_len = float('inf')
+        self.best_seq = []
+        self.f_corrente = None
+        self.len_of_corrente = 0.0
+
+class _ProfiloFasi:
+    """
+    Strumentazione opzionale di PathfindingSolver.solve(profile=True): tempo e numero di
+    chiamate di ogni fase della ricerca e istogrammi delle dimensioni di contesto,
+    complemento, frontiera e ostacoli proibiti (questi ultimi separati per profondità).
+    Gli istogrammi sono dizionari {dimensione: occorrenze}.
+    """
+    FASI = ("cache_lookup", "closure", "frontier", "sort", "upper_bound")
+    ISTOGRAMMI = ("contesto", "complemento", "frontier")
+
+    def __init__(self):
+        self.tempi = dict.fromkeys(self.FASI, 0.0)
+        self.chiamate = dict.fromkeys(self.FASI, 0)
+        self.istogrammi = {nome: {} for nome in self.ISTOGRAMMI}
+        self.forbidden_per_depth = {}
+
+    def solo_fase(self, nome):
+        """Restituisce un profilo vuoto che conserva solo tempo e chiamate della fase 'nome'."""
+        profilo = _ProfiloFasi()
+        profilo.tempi[nome] = self.tempi[nome]
+        profilo.chiamate[nome] = self.chiamate[nome]
+        return profilo
+
+    def fase(self, nome, inizio):
+        """Aggiunge alla fase 'nome' il tempo trascorso da 'inizio' (perf_counter)."""
+        self.tempi[nome] += time.perf_counter() - inizio
+        self.chiamate[nome] += 1
+
+    def dimensione(self, nome, valore):
+        istogramma = self.istogrammi[nome]
+        istogramma[valore] = istogramma.get(valore, 0) + 1
+
+    def forbidden(self, depth, valore):
+        istogramma = self.forbidden_per_depth.setdefault(depth, {})
+        istogramma[valore] = istogramma.get(valore, 0) + 1
+
+    @staticmethod
+    def _media_e_massimo(istogramma):
+        occorrenze = sum(istogramma.values())
+        if not occorrenze:
+            return float('nan'), 0
+        return sum(k * n for k, n in istogramma.items()) / occorrenze, max(istogramma)
+
+    def riepilogo(self, execution_time):
+        """
+        Statistiche scalari del profilo, da aggiungere a get_stats_summary(): time_<fase>
+        e calls_<fase> per ogni fase, time_overhead (il tempo non attribuito a nessuna fase,
+        cioè ricorsione, pruning e gestione dei nodi) e media e massimo di ogni istogramma.
+        """
+        riepilogo = {}
+        for nome in self.FASI:
+            riepilogo[f"time_{nome}"] = self.tempi[nome]
+            riepilogo[f"calls_{nome}"] = self.chiamate[nome]
+        riepilogo["time_overhead"] = max(0.0, execution_time - sum(self.tempi.values()))
+        forbidden = {}
+        for istogramma in self.forbidden_per_depth.values():
+            for k, n in istogramma.items():
+                forbidden[k] = forbidden.get(k, 0) + n
+        for nome, istogramma in (*self.istogrammi.items(), ("forbidden", forbidden)):
+            riepilogo[f"{nome}_size_mean"], riepilogo[f"{nome}_size_max"] = self._media_e_massimo(istogramma)
+        return riepilogo
+
+MOTORI = ("ricorsivo", "iterativo")
+
+def _statistiche_iniziali():
+    """Contatori di PathfindingSolver.stats all'inizio di una ricerca."""
+    return {
+        "execution_time": 0.0,
+        "recursive_calls": 0,
+        "cache_hits": 0,
+        "total_unique_frontiers": set(),
+        "pruning_successes": 0,
+        "pruning_successes_local": 0,
+        "pruning_successes_global": 0,
+        "max_recursion_depth": 0
+    }
+
 class PathfindingSolver:
-    def __init__(self, grid_data, origin, destination):
+    def __init__(self, grid_data, origin, destination, closure_backend="naive", compact_grid=False,
+                 closure_cache=None, memoization_cache=None):
         """
         Il costruttore inizializza il problema.
+        'grid_data' può essere una matrice di ostacoli oppure una Grid già costruita,
+        che in quel caso viene usata così com'è.
+        'closure_backend' sceglie l'implementazione del calcolo di contesto e complemento
+        tra quelle registrate in closure_logic.BACKEND_CHIUSURA.
+        'compact_grid' costruisce una CompactGrid (maschera di ostacoli) al posto della
+        lista di adiacenze.
+        'closure_cache' e 'memoization_cache' permettono di condividere tra più solver
+        (vedi session.GridSession) le chiusure già calcolate, indicizzate per
+        (origine, ostacoli proibiti), e i risultati dei sottoproblemi. Una cache di
+        memoizzazione condivisa non viene svuotata da solve().
         """
-        self.grid = Grid.from_matrix(grid_data)
+        if closure_backend not in closure_logic.BACKEND_CHIUSURA:
+            raise ValueError(f"Backend di chiusura '{closure_backend}' non valido. "
+                             f"Backend disponibili: {list(closure_logic.BACKEND_CHIUSURA.keys())}")
+        if isinstance(grid_data, Grid):
+            self.grid = grid_data
+        else:
+            self.grid = Grid.from_matrix(grid_data, compact=compact_grid)
         self.origin = origin
         self.destination = destination
+        self.closure_backend = closure_backend
+        self._calcola_contesto_e_complemento = closure_logic.BACKEND_CHIUSURA[closure_backend]
         
         self.label_manager = LabelManager()
-        self.memoization_cache = {}
+        self.closure_cache = closure_cache
+        self._cache_condivisa = memoization_cache is not None
+        self.memoization_cache = memoization_cache if self._cache_condivisa else {}
         
-        self.stats = {
-            "execution_time": 0.0,
-            "recursive_calls": 0,
-            "cache_hits": 0,
-            "total_unique_frontiers": set(),
-            "pruning_successes": 0,
-            "max_recursion_depth": 0
-        }
+        self.stats = _statistiche_iniziali()
 
         self.lunghezza_minima = float('inf')
         self.sequenza_landmark = []
+        self._incumbent = float('inf')
+        self.upper_bound = None
+        self.tracer = None
+        self.profilo = None
 
-    def solve(self, debug=True, use_cache=True, use_pruning=True):
+    def solve(self, debug=True, use_cache=True, use_pruning=True, engine="ricorsivo",
+              use_branch_and_bound=False, seed_upper_bound=False, tracer=None, profile=False):
         """
         Avvia l'algoritmo ricorsivo e ne misura le performance.
         I flag 'use_cache' e 'use_pruning' controllano le ottimizzazioni.
+        'engine' sceglie il motore: "ricorsivo" (ricorsione Python) oppure "iterativo"
+        (stack esplicito, non limitato dal limite di ricorsione dell'interprete).
+        Entrambi producono gli stessi risultati e le stesse statistiche.
+        'use_branch_and_bound' attiva il pruning globale: ogni sottoproblema conosce il
+        costo già speso dalla radice e scarta le celle di frontiera per cui quel costo più
+        la distanza libera residua non migliora il miglior cammino completo trovato finora
+        (incumbent). Le potature locali e globali sono contate separatamente.
+        'seed_upper_bound' calcola prima il cammino minimo con A* e lo usa come incumbent
+        iniziale (attivando il pruning globale), così il pruning parte dalla prima cella di
+        frontiera. Se D non è raggiungibile sul grafo il risultato è subito infinito; se
+        CAMMINOMIN non trova un cammino entro quel limite la ricerca viene ripetuta senza.
+        'tracer' (vedi tracing.Tracer) riceve gli eventi della ricerca: ingresso nei
+        sottoproblemi, cache, casi base, potature, ritorni e miglioramenti. Con debug=True
+        e nessun tracer indicato viene usato un tracing.TextTracer, che stampa l'albero
+        della ricerca; senza tracer la ricerca non registra nulla.
+        'profile' attiva la misura per fase (ricerca in cache, chiusura, frontiera,
+        ordinamento della frontiera, limite superiore) e gli istogrammi delle dimensioni,
+        riportati da get_stats_summary() e, completi, in self.profilo.
         """
-        self.stats = {
-            "execution_time": 0.0,
-            "recursive_calls": 0,
-            "cache_hits": 0,
-            "total_unique_frontiers": set(),
-            "pruning_successes": 0,
-            "max_recursion_depth": 0
-        }
+        if engine not in MOTORI:
+            raise ValueError(f"Motore '{engine}' non valido. Motori disponibili: {list(MOTORI)}")
+
+        self.stats = _statistiche_iniziali()
 
-        if use_cache:
+        if use_cache and not self._cache_condivisa:
             self.memoization_cache = {}
+        self._incumbent = float('inf')
+        self.tracer = tracer if tracer is not None else tracing.TextTracer() if debug else None
+        self.profilo = _ProfiloFasi() if profile else None
 
         if debug:
             print(f"\n--- Esecuzione Procedura CAMMINOMIN da O={self.origin} a D={self.destination} ---")
@@ -55,15 +195,45 @@ class PathfindingSolver:
 
         start_time = time.perf_counter()
         
-        self.lunghezza_minima, self.sequenza_landmark = self._cammino_min_ricorsivo(
-            self.origin, 
-            self.destination, 
-            frozenset(),
-            depth=0,
-            debug=debug,
-            use_cache=use_cache,
-            use_pruning=use_pruning
-        )
+        motore = self._cammino_min_ricorsivo if engine == "ricorsivo" else self._cammino_min_iterativo
+        risultato = None
+        if seed_upper_bound:
+            inizio_fase = time.perf_counter()
+            self.upper_bound, _ = graph_search.astar(self.grid, self.origin, self.destination)
+            if self.profilo is not None:
+                self.profilo.fase("upper_bound", inizio_fase)
+            if debug:
+                print(f"    (Limite superiore iniziale da A*: {self.upper_bound:.4f})")
+            if self.upper_bound == float('inf'):
+                risultato = (float('inf'), [])
+            else:
+                # Piccola tolleranza: le somme in virgola mobile di A* e CAMMINOMIN
+                # possono differire nell'ultima cifra per lo stesso cammino
+                self._incumbent = self.upper_bound * (1 + 1e-9) + 1e-9
+                risultato = motore(
+                    self.origin, self.destination, 0, depth=0,
+                    use_cache=use_cache, use_pruning=use_pruning, use_branch_and_bound=True
+                )
+                if risultato[0] == float('inf'):
+                    # Le statistiche (e il profilo, tranne la fase di A*) descrivono solo la
+                    # ricerca che produce il risultato; execution_time comprende entrambe
+                    self._incumbent = float('inf')
+                    self.stats = _statistiche_iniziali()
+                    if self.profilo is not None:
+                        self.profilo = self.profilo.solo_fase("upper_bound")
+                    risultato = None
+
+        if risultato is None:
+            risultato = motore(
+                self.origin, 
+                self.destination, 
+                0,
+                depth=0,
+                use_cache=use_cache,
+                use_pruning=use_pruning,
+                use_branch_and_bound=use_branch_and_bound
+            )
+        self.lunghezza_minima, self.sequenza_landmark = risultato
 
         end_time = time.perf_counter()
         self.stats["execution_time"] = end_time - start_time
@@ -72,118 +242,254 @@ class PathfindingSolver:
             print(f"--- Esecuzione completata in {self.stats['execution_time']:.4f} secondi ---")
 
     def _cammino_min_ricorsivo(self, current_origin, current_dest, forbidden_obstacles, 
-                               depth=0, debug=True, use_cache=True, use_pruning=True):
+                               depth=0, use_cache=True, use_pruning=True,
+                               use_branch_and_bound=False, costo_accumulato=0.0):
         """
         Implementazione ricorsiva di CAMMINOMIN con ottimizzazioni configurabili.
+        Gli ostacoli proibiti sono un bitset intero indicizzato con Grid.cell_id, così
+        l'unione con la chiusura e l'hash della chiave di cache restano economici.
+        'costo_accumulato' è la lunghezza già percorsa dalla radice fino a current_origin.
+        """
+        risultato, nodo = self._apri_nodo(current_origin, current_dest, forbidden_obstacles,
+                                          depth, use_cache, costo_accumulato)
+        if nodo is None:
+            return risultato
+
+        f_pos = self._prossimo_figlio(nodo, use_pruning, use_branch_and_bound)
+        while f_pos is not None:
+            len_fd, seq_fd = self._cammino_min_ricorsivo(
+                f_pos, current_dest, nodo.new_forbidden_obstacles, depth + 1,
+                use_cache=use_cache, use_pruning=use_pruning,
+                use_branch_and_bound=use_branch_and_bound,
+                costo_accumulato=costo_accumulato + nodo.len_of_corrente
+            )
+            self._registra_figlio(nodo, len_fd, seq_fd)
+            f_pos = self._prossimo_figlio(nodo, use_pruning, use_branch_and_bound)
+
+        return self._chiudi_nodo(nodo, use_cache)
+
+    def _cammino_min_iterativo(self, current_origin, current_dest, forbidden_obstacles,
+                               depth=0, use_cache=True, use_pruning=True,
+                               use_branch_and_bound=False, costo_accumulato=0.0):
+        """
+        Implementazione non ricorsiva di CAMMINOMIN: i sottoproblemi aperti sono tenuti
+        in uno stack esplicito di _NodoRicerca, quindi la profondità della ricerca non è
+        limitata da sys.getrecursionlimit(). Visita i nodi nello stesso ordine della
+        versione ricorsiva.
+        """
+        risultato, nodo = self._apri_nodo(current_origin, current_dest, forbidden_obstacles,
+                                          depth, use_cache, costo_accumulato)
+        if nodo is None:
+            return risultato
+
+        stack = [nodo]
+        while stack:
+            nodo = stack[-1]
+            f_pos = self._prossimo_figlio(nodo, use_pruning, use_branch_and_bound)
+            if f_pos is None:
+                risultato = self._chiudi_nodo(nodo, use_cache)
+                stack.pop()
+                if stack:
+                    self._registra_figlio(stack[-1], *risultato)
+                continue
+
+            risultato, figlio = self._apri_nodo(f_pos, current_dest, nodo.new_forbidden_obstacles,
+                                                nodo.depth + 1, use_cache,
+                                                nodo.costo_accumulato + nodo.len_of_corrente)
+            if figlio is None:
+                self._registra_figlio(nodo, *risultato)
+            else:
+                stack.append(figlio)
+
+        return risultato
+
+    def _apri_nodo(self, current_origin, current_dest, forbidden_obstacles, depth, use_cache,
+                   costo_accumulato=0.0):
+        """
+        Parte iniziale di CAMMINOMIN(current_origin, current_dest): statistiche, cache,
+        casi base e calcolo della frontiera ordinata. Un cammino completo trovato in un
+        caso base aggiorna l'incumbent globale.
+        Ritorna (risultato, None) se il sottoproblema si risolve subito, altrimenti
+        (None, nodo) con il nodo pronto per il ciclo sulla frontiera.
         """
         self.stats["recursive_calls"] += 1
         if depth > self.stats["max_recursion_depth"]:
             self.stats["max_recursion_depth"] = depth
         
-        if debug:
-            indent = "  " * depth
-            print(f"\n{indent}╔══════════════════════════════════════════════════════")
-            print(f"{indent}║ RICORSIONE (Livello {depth}): CAMMINOMIN({current_origin}, {current_dest})")
-            print(f"{indent}║ Ostacoli Proibiti: {len(forbidden_obstacles)} elementi")
+        tracer = self.tracer
+        if tracer is not None:
+            tracer.enter(depth, current_origin, current_dest, forbidden_obstacles.bit_count())
+        profilo = self.profilo
+        if profilo is not None:
+            profilo.forbidden(depth, forbidden_obstacles.bit_count())
+            inizio_fase = time.perf_counter()
         
         cache_key = (current_origin, current_dest, forbidden_obstacles)
-        if use_cache and cache_key in self.memoization_cache:
+        trovato = use_cache and cache_key in self.memoization_cache
+        if profilo is not None:
+            profilo.fase("cache_lookup", inizio_fase)
+        if trovato:
             self.stats["cache_hits"] += 1
-            if debug:
-                print(f"{indent}║ -> Trovato in CACHE. Ritorno il risultato salvato.")
-                print(f"{indent}╚══════════════════════════════════════════════════════")
-            return self.memoization_cache[cache_key]
+            if tracer is not None:
+                tracer.cache_hit(depth, current_origin)
+            return self.memoization_cache[cache_key], None
 
         if current_origin == current_dest:
-            if debug:
-                print(f"{indent}║ -> CASO BASE: Origine == Destinazione. Ritorno (0, [...]).")
-                print(f"{indent}╚══════════════════════════════════════════════════════")
-            return 0, [(current_origin, 1)]
+            if tracer is not None:
+                tracer.base_case(depth, current_origin, tracing.CASO_ORIGINE_DESTINAZIONE, 0)
+            return (0, [(current_origin, 1)]), None
 
-        contesto, complemento = closure_logic.calcola_contesto_e_complemento(
-            self.grid, current_origin, forbidden_obstacles
-        )
-        if debug:
-            print(f"{indent}║ Chiusura calcolata: {len(contesto)} nel contesto, {len(complemento)} nel complemento.")
-
-        if current_dest in set(contesto):
+        # Casi base: destinazione nel contesto o nel complemento. Bastano i due cammini
+        # liberi verso la destinazione, senza costruire la chiusura
+        tipo_destinazione = self.grid.free_path_type(current_origin, current_dest, forbidden_obstacles)
+        if tipo_destinazione == closure_logic.CONTESTO:
             dist = path_logic.calcola_distanza_libera(current_origin, current_dest)
-            if debug:
-                print(f"{indent}║ -> CASO BASE: Destinazione nel CONTESTO. Ritorno ({dist:.2f}, [...]).")
-                print(f"{indent}╚══════════════════════════════════════════════════════")
+            if tracer is not None:
+                tracer.base_case(depth, current_origin, tracing.CASO_CONTESTO, dist)
             seq = [(current_origin, 0), (current_dest, 1)]
+            self._aggiorna_incumbent(costo_accumulato + dist)
             if use_cache: self.memoization_cache[cache_key] = (dist, seq)
-            return dist, seq
+            return (dist, seq), None
         
-        if current_dest in set(complemento):
+        if tipo_destinazione == closure_logic.COMPLEMENTO:
             dist = path_logic.calcola_distanza_libera(current_origin, current_dest)
-            if debug:
-                print(f"{indent}║ -> CASO BASE: Destinazione nel COMPLEMENTO. Ritorno ({dist:.2f}, [...]).")
-                print(f"{indent}╚══════════════════════════════════════════════════════")
+            if tracer is not None:
+                tracer.base_case(depth, current_origin, tracing.CASO_COMPLEMENTO, dist)
             seq = [(current_origin, 0), (current_dest, 2)]
+            self._aggiorna_incumbent(costo_accumulato + dist)
             if use_cache: self.memoization_cache[cache_key] = (dist, seq)
-            return dist, seq
+            return (dist, seq), None
+
+        if profilo is not None:
+            inizio_fase = time.perf_counter()
+        chiusura = self._calcola_chiusura(current_origin, forbidden_obstacles, use_cache)
+        num_contesto, num_complemento = len(chiusura.contesto), len(chiusura.complemento)
+        if profilo is not None:
+            profilo.fase("closure", inizio_fase)
+            profilo.dimensione("contesto", num_contesto)
+            profilo.dimensione("complemento", num_complemento)
+        if tracer is not None:
+            tracer.closure(depth, current_origin, num_contesto, num_complemento)
 
-        frontiera = closure_logic.calcola_frontiera(
-            self.grid, current_origin, contesto, complemento, forbidden_obstacles
-        )
+        if profilo is not None:
+            inizio_fase = time.perf_counter()
+        frontiera = closure_logic.calcola_frontiera(self.grid, chiusura, forbidden_obstacles)
+        if profilo is not None:
+            profilo.fase("frontier", inizio_fase)
+            profilo.dimensione("frontier", len(frontiera))
         coords_frontiera = {item[0] for item in frontiera}
         self.stats["total_unique_frontiers"].update(coords_frontiera)
-        if debug:
-            print(f"{indent}║ Frontiera calcolata: {len(frontiera)} celle.")
+        if tracer is not None:
+            tracer.frontier(depth, current_origin, len(frontiera))
         
         if not frontiera:
-            if debug:
-                print(f"{indent}║ -> VICOLO CIECO: Frontiera vuota. Ritorno (inf, []).")
-                print(f"{indent}╚══════════════════════════════════════════════════════")
-            return float('inf'), []
+            if tracer is not None:
+                tracer.base_case(depth, current_origin, tracing.CASO_VICOLO_CIECO, float('inf'))
+            return (float('inf'), []), None
 
-        best_len_locale, best_seq_locale = float('inf'), []
+        closure_bits = self.grid.bitset_from_mask(chiusura.mask)
+        if profilo is not None:
+            inizio_fase = time.perf_counter()
         frontiera.sort(key=lambda item: path_logic.calcola_distanza_libera(item[0], current_dest))
-        
-        if debug:
-            print(f"{indent}║ Inizio ciclo FOR sulla frontiera...")
-        
-        for i, (f_pos, f_type) in enumerate(frontiera):
-            len_of = path_logic.calcola_distanza_libera(current_origin, f_pos)
-            if debug:
-                print(f"{indent}║ ({i+1}/{len(frontiera)}) Esamino F={f_pos} (tipo {f_type}). Costo O->F: {len_of:.2f}")
+        if profilo is not None:
+            profilo.fase("sort", inizio_fase)
 
-            if use_pruning and (len_of + path_logic.calcola_distanza_libera(f_pos, current_dest) >= best_len_locale):
-                self.stats["pruning_successes"] += 1
-                if debug:
-                    print(f"{indent}║   -> PRUNING: costo potenziale ({len_of + path_logic.calcola_distanza_libera(f_pos, current_dest):.2f}) >= miglior costo attuale ({best_len_locale:.2f})")
-                continue
-            
-            current_closure = set(contesto) | set(complemento) | {current_origin}
-            new_forbidden_obstacles = forbidden_obstacles.union(current_closure)
-            
-            len_fd, seq_fd = self._cammino_min_ricorsivo(
-                f_pos, current_dest, new_forbidden_obstacles, depth + 1,
-                debug=debug, use_cache=use_cache, use_pruning=use_pruning
+        nodo = _NodoRicerca(current_origin, current_dest, forbidden_obstacles, depth, cache_key, frontiera,
+                            costo_accumulato, self.stats["pruning_successes_global"])
+        nodo.new_forbidden_obstacles = forbidden_obstacles | closure_bits
+        return None, nodo
+
+    def _prossimo_figlio(self, nodo, use_pruning, use_branch_and_bound=False):
+        """
+        Avanza sulla frontiera del nodo saltando le celle eliminate dal pruning locale
+        (confronto con il miglior risultato del nodo) e, se attivo, da quello globale
+        (confronto con l'incumbent, sommando il costo accumulato dalla radice).
+        Ritorna la prossima cella di frontiera da esplorare, oppure None se la
+        frontiera è esaurita.
+        """
+        tracer = self.tracer
+        while nodo.indice < len(nodo.frontiera):
+            f_pos, f_type = nodo.frontiera[nodo.indice]
+            nodo.indice += 1
+            len_of = path_logic.calcola_distanza_libera(nodo.origin, f_pos)
+            if tracer is not None:
+                tracer.child(nodo.depth, f_pos, f_type, nodo.indice, len(nodo.frontiera), len_of)
+
+            if use_pruning or use_branch_and_bound:
+                costo_potenziale = len_of + path_logic.calcola_distanza_libera(f_pos, nodo.dest)
+                if use_pruning and costo_potenziale >= nodo.best_len:
+                    self.stats["pruning_successes"] += 1
+                    self.stats["pruning_successes_local"] += 1
+                    if tracer is not None:
+                        tracer.prune(nodo.depth, f_pos, False, costo_potenziale, nodo.best_len)
+                    continue
+                if use_branch_and_bound and nodo.costo_accumulato + costo_potenziale >= self._incumbent:
+                    self.stats["pruning_successes"] += 1
+                    self.stats["pruning_successes_global"] += 1
+                    if tracer is not None:
+                        tracer.prune(nodo.depth, f_pos, True, nodo.costo_accumulato + costo_potenziale, self._incumbent)
+                    continue
+
+            nodo.f_corrente = (f_pos, f_type)
+            nodo.len_of_corrente = len_of
+            return f_pos
+        return None
+
+    def _registra_figlio(self, nodo, len_fd, seq_fd):
+        """
+        Combina il risultato del sottoproblema (F, D) appena risolto con il costo O->F
+        e aggiorna, se migliore, il miglior percorso locale del nodo.
+        """
+        if len_fd == float('inf'):
+            return
+        f_pos, f_type = nodo.f_corrente
+        total_len = nodo.len_of_corrente + len_fd
+        tracer = self.tracer
+        if tracer is not None:
+            tracer.child_return(nodo.depth, f_pos, len_fd, total_len)
+        self._aggiorna_incumbent(nodo.costo_accumulato + total_len)
+        if total_len < nodo.best_len:
+            if tracer is not None:
+                tracer.improvement(nodo.depth, f_pos, total_len)
+            nodo.best_len = total_len
+            nodo.best_seq = path_logic.compatta_sequenza(
+                [(nodo.origin, 0), (f_pos, f_type)], seq_fd
             )
-            
-            if len_fd != float('inf'):
-                total_len = len_of + len_fd
-                if debug:
-                    print(f"{indent}║   -> Ritorno da ricorsione per F={f_pos}. Costo F->D: {len_fd:.2f}. Totale: {total_len:.2f}")
-                if total_len < best_len_locale:
-                    if debug:
-                        print(f"{indent}║   -> NUOVO MIGLIOR PERCORSO LOCALE TROVATO! (costo {total_len:.2f})")
-                    best_len_locale = total_len
-                    best_seq_locale = path_logic.compatta_sequenza(
-                        [(current_origin, 0), (f_pos, f_type)], seq_fd
-                    )
-        
-        if debug:
-            print(f"{indent}║ Fine ciclo FOR. Miglior risultato locale: ({best_len_locale if best_len_locale != float('inf') else 'inf'}, {len(best_seq_locale)} landmark).")
-            print(f"{indent}║ Salvo in CACHE e ritorno.")
-            print(f"{indent}╚══════════════════════════════════════════════════════")
+
+    def _chiudi_nodo(self, nodo, use_cache):
+        """
+        Salva in cache il miglior risultato locale del nodo e lo restituisce.
+        Se nel sottoalbero del nodo è intervenuto il pruning globale il risultato
+        dipende dall'incumbent e non è esatto, quindi non viene salvato in cache.
+        """
+        esatto = self.stats["pruning_successes_global"] == nodo.potature_globali_iniziali
+        if self.tracer is not None:
+            self.tracer.exit(nodo.depth, nodo.origin, nodo.best_len, len(nodo.best_seq), esatto)
         
-        if use_cache:
-            self.memoization_cache[cache_key] = (best_len_locale, best_seq_locale)
-        return best_len_locale, best_seq_locale
+        if use_cache and esatto:
+            self.memoization_cache[nodo.cache_key] = (nodo.best_len, nodo.best_seq)
+        return nodo.best_len, nodo.best_seq
+
+    def _aggiorna_incumbent(self, lunghezza):
+        """Aggiorna l'incumbent globale se 'lunghezza' è un cammino completo migliore."""
+        if lunghezza < self._incumbent:
+            self._incumbent = lunghezza
     
+    def _calcola_chiusura(self, origin, forbidden_obstacles, use_cache=True):
+        """
+        Calcola contesto e complemento di 'origin', passando per la cache delle chiusure
+        (se presente e se la cache è attiva). Le chiusure non dipendono dalla
+        destinazione, quindi la cache è condivisibile tra interrogazioni diverse.
+        """
+        if not use_cache or self.closure_cache is None:
+            return self._calcola_contesto_e_complemento(self.grid, origin, forbidden_obstacles)
+        key = (origin, forbidden_obstacles)
+        chiusura = self.closure_cache.get(key)
+        if chiusura is None:
+            chiusura = self._calcola_contesto_e_complemento(self.grid, origin, forbidden_obstacles)
+            self.closure_cache[key] = chiusura
+        return chiusura
+
     def get_stats_summary(self):
         """
         Ritorna un summary delle statistiche correnti.
@@ -191,12 +497,16 @@ class PathfindingSolver:
         Questo metodo crea una copia di un dizionario delle 'stats' interne lo aggiorna con:
             - "total_unique_frontiers": il conto di frontiere uniche incontrate.
             - "max_recursion_depth": la massima profondità ricorsiva raggiunta, incrementata di uno.
+            - se solve() è stato chiamato con profile=True, i tempi e le chiamate per fase e
+              media e massimo delle dimensioni misurate (vedi _ProfiloFasi.riepilogo).
         Returns:
             dict: un dizionario contenente le statistiche riassunte.
         """
         summary = self.stats.copy()
         summary["total_unique_frontiers"] = len(self.stats["total_unique_frontiers"])
         summary["max_recursion_depth"] = self.stats["max_recursion_depth"] + 1
+        if self.profilo is not None:
+            summary.update(self.profilo.riepilogo(self.stats["execution_time"]))
         return summary
 
     def display_results(self):
@@ -224,23 +534,22 @@ class PathfindingSolver:
             output_str += f"({label}, {tipo}) "
         print(f"  Sequenza di landmark: {output_str.strip()}>")
 
-    def visualize_initial_closure_and_frontier(self):
-        """
-        Visualizza la chiusura e la frontiera del problema INIZIALE (partendo da O).
-        """
-        contesto_O, complemento_O = closure_logic.calcola_contesto_e_complemento(self.grid, self.origin)
-        frontiera_O_con_tipo = closure_logic.calcola_frontiera(self.grid, self.origin, contesto_O, complemento_O)
-        CELL_CONTESTO, CELL_COMPLEMENTO, CELL_ORIGINE, CELL_FRONTIERA, CELL_DESTINAZIONE = 2, 3, 4, 5, 6
-        valori_speciali = {}
-        for r, c in contesto_O: valori_speciali[(r, c)] = CELL_CONTESTO
-        for r, c in complemento_O: valori_speciali[(r, c)] = CELL_COMPLEMENTO
-        for (r, c), _ in frontiera_O_con_tipo: valori_speciali[(r, c)] = CELL_FRONTIERA
-        valori_speciali[self.origin] = CELL_ORIGINE
-        valori_speciali[self.destination] = CELL_DESTINAZIONE
-        vis_grid = self.grid.to_matrix(custom_values=valori_speciali)
-        color_map = {0:'white', 1:'#30307A', 2:'#90EE90', 3:'#FFD700', 4:'#FF0000', 5:'#006400', 6:'#800080'}
-        label_map = {0:'Spazio Libero', 1:'Ostacolo', 2:'Contesto', 3:'Complemento', 4:'Origine O', 5:'Frontiera', 6:'Destinazione D'}
-        cmap = ListedColormap([color_map.get(i) for i in sorted(color_map.keys())])
-        legend_patches = [Patch(facecolor=color, edgecolor='black', label=label_map[key]) for key, color in color_map.items()]
+    def visualize_initial_closure_and_frontier(self, output_path=None, max_pixel=visualization.MAX_PIXEL):
+        """
+        Visualizza la chiusura e la frontiera del problema INIZIALE (partendo da O) con il
+        renderer raster di visualization, adatto anche a mappe molto grandi; dopo solve()
+        mostra anche la sequenza di landmark trovata.
+        Con 'output_path' l'immagine viene salvata in PNG senza aprire finestre.
+        """
+        chiusura_O = self._calcola_contesto_e_complemento(self.grid, self.origin)
+        frontiera_O_con_tipo = closure_logic.calcola_frontiera(self.grid, chiusura_O)
+        livelli = {
+            "contesto": chiusura_O.mask_contesto,
+            "complemento": chiusura_O.mask_complemento,
+            "frontiera": [cella for cella, _ in frontiera_O_con_tipo],
+            "origine": [self.origin],
+            "destinazione": [self.destination],
+        }
         titolo = f"Chiusura e Frontiera di O={self.origin}"
-        visualization.visualizza_risultato_finale(vis_grid, cmap, legend_patches, titolo)
\ No newline at end of file
+        return visualization.visualizza_raster(self.grid, livelli, self.sequenza_landmark, titolo,
+                                               output_path=output_path, max_pixel=max_pixel)
\ No newline at end of file
@@ -0,0 +1,99 @@
+import math
+import numpy as np
+import pytest
+import movingai
+from data_structures import CompactGrid, Grid
+
+MAPPA = (
+    "type octile\n"
+    "height 3\n"
+    "width 4\n"
+    "map\n"
+    ".G@S\n"
+    "T..W\n"
+    "O...\n"
+)
+
+SCENARI = (
+    "version 1\n"
+    "0\tmaps/t.map\t4\t3\t0\t0\t1\t0\t1.00000000\n"
+    "1\tmaps/t.map\t4\t3\t3\t2\t1\t1\t2.41421356\n"
+)
+
+def _scrivi(path, testo):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(testo.encode() if isinstance(testo, str) else testo)
+    return str(path)
+
+def test_leggi_maschera_converte_i_caratteri(tmp_path):
+    maschera = movingai.leggi_maschera(_scrivi(tmp_path / "t.map", MAPPA))
+    assert maschera.dtype == np.uint8
+    assert maschera.tolist() == [[0, 0, 1, 0], [1, 0, 0, 1], [1, 0, 0, 0]]
+
+def test_leggi_maschera_accetta_fine_riga_windows(tmp_path):
+    maschera = movingai.leggi_maschera(_scrivi(tmp_path / "t.map", MAPPA.replace("\n", "\r\n")))
+    assert maschera.tolist() == [[0, 0, 1, 0], [1, 0, 0, 1], [1, 0, 0, 0]]
+
+@pytest.mark.parametrize("testo, messaggio", [
+    ("type octile\nheight 2\nwidth 3\nmap\n..@\n.X.\n", "Carattere non valido"),
+    ("type octile\nheight 2\nwidth 3\nmap\n..@\n..\n", "la riga 1 ha 2 caratteri"),
+    ("type tile\nheight 1\nwidth 1\nmap\n.\n", "Tipo di mappa 'tile' non supportato"),
+    ("type octile\nheight 1\nwidth 1\n.\n", "non valida"),
+])
+def test_leggi_maschera_errori(tmp_path, testo, messaggio):
+    with pytest.raises(ValueError, match=messaggio):
+        movingai.leggi_maschera(_scrivi(tmp_path / "errata.map", testo))
+
+def test_leggi_mappa(tmp_path):
+    path = _scrivi(tmp_path / "t.map", MAPPA)
+    compatta = movingai.leggi_mappa(path)
+    assert isinstance(compatta, CompactGrid)
+    assert (compatta.rows, compatta.cols) == (3, 4)
+    assert not compatta.is_traversable((0, 2)) and compatta.is_traversable((0, 3))
+    grid = movingai.leggi_mappa(path, compact=False)
+    assert type(grid) is Grid and (1, 1) in grid.adj and (1, 0) not in grid.adj
+
+def test_leggi_scenari_scambia_x_e_y(tmp_path):
+    scenari = list(movingai.leggi_scenari(_scrivi(tmp_path / "t.map.scen", SCENARI)))
+    assert len(scenari) == 2
+    assert scenari[1]["bucket"] == 1
+    assert scenari[1]["map"] == "maps/t.map"
+    assert (scenari[1]["height"], scenari[1]["width"]) == (3, 4)
+    assert scenari[1]["origin"] == (2, 3)
+    assert scenari[1]["destination"] == (1, 1)
+    assert math.isclose(scenari[1]["optimal_length"], 2.41421356)
+
+def test_leggi_scenari_colonne_errate(tmp_path):
+    with pytest.raises(ValueError, match="Riga 2"):
+        list(movingai.leggi_scenari(_scrivi(tmp_path / "t.map.scen", "version 1\n0\tmaps/t.map\t4\t3\n")))
+
+@pytest.mark.parametrize("lunghezza, ottimo, esito", [
+    (2.82842712, 2.82842712, "ottimo"),
+    (math.sqrt(8), 2.82842712, "ottimo"),
+    (2.0, 2.82842712, "piu_corto"),
+    (3.0, 2.82842712, "piu_lungo"),
+    (float('inf'), 2.82842712, "non_trovato"),
+])
+def test_confronta_lunghezza(lunghezza, ottimo, esito):
+    assert movingai.confronta_lunghezza(lunghezza, ottimo) == esito
+
+def test_riepilogo_per_bucket():
+    records = [
+        {"bucket": 0, "optimal_length": 1.0, "execution_time": 0.5, "esito": "ottimo"},
+        {"bucket": 0, "optimal_length": 3.0, "execution_time": 1.5, "esito": "piu_corto"},
+        {"bucket": 1, "optimal_length": 5.0, "execution_time": 0.25, "esito": "piu_lungo"},
+    ]
+    riepilogo = movingai.riepilogo_per_bucket(records).set_index("bucket")
+    assert riepilogo.loc[0, "num_queries"] == 2
+    assert math.isclose(riepilogo.loc[0, "total_time"], 2.0)
+    assert math.isclose(riepilogo.loc[0, "throughput_qps"], 1.0)
+    assert math.isclose(riepilogo.loc[0, "mean_optimal_length"], 2.0)
+    assert riepilogo.loc[0, ["ottimo", "piu_corto", "piu_lungo", "non_trovato"]].tolist() == [1, 1, 0, 0]
+    assert riepilogo.loc[1, ["ottimo", "piu_corto", "piu_lungo", "non_trovato"]].tolist() == [0, 0, 1, 0]
+    assert movingai.riepilogo_per_bucket([]).empty
+
+def test_esegui_file_scenari(tmp_path):
+    _scrivi(tmp_path / "maps" / "t.map", MAPPA)
+    records = movingai.esegui_file_scenari(_scrivi(tmp_path / "t.map.scen", SCENARI))
+    assert [r["esito"] for r in records] == ["ottimo", "ottimo"]
+    assert math.isclose(records[1]["lunghezza"], 1 + math.sqrt(2))
@@ -0,0 +1,52 @@
+import math
+import random
+import numpy as np
+import pytest
+import grid_generator
+from data_structures import Grid
+from session import GridSession
+from solver import PathfindingSolver
+
+def _stessa_lunghezza(a, b):
+    return a == b or math.isclose(a, b, rel_tol=1e-12)
+
+@pytest.mark.parametrize("seed, closure_backend, compact_grid", [
+    (0, "naive", False),
+    (1, "numpy", True),
+    (2, "sweep", False),
+    (3, "naive", True),
+])
+def test_modifiche_casuali_come_solver_nuovo(seed, closure_backend, compact_grid):
+    rng = random.Random(seed)
+    mappa = grid_generator.generate_grid_map(rows=9, cols=9, obstacle_ratio=0.25, seed=seed)
+    session = GridSession(mappa, closure_backend=closure_backend, compact_grid=compact_grid)
+    libere = list(session.grid.adj.keys())
+    coppie = [tuple(rng.sample(libere, 2)) for _ in range(4)]
+    for origin, destination in coppie:
+        session.solve(origin, destination)
+
+    for _ in range(10):
+        cella = (rng.randrange(9), rng.randrange(9))
+        if session.grid.is_traversable(cella):
+            assert session.set_obstacle(cella)
+            assert not session.set_obstacle(cella)
+        else:
+            assert session.clear_obstacle(cella)
+            assert not session.clear_obstacle(cella)
+        griglia_nuova = Grid.from_matrix(np.array(session.grid.to_matrix()))
+        for origin, destination in coppie:
+            use_branch_and_bound = rng.random() < 0.5
+            calda = session.solve(origin, destination, use_branch_and_bound=use_branch_and_bound)
+            fredda = PathfindingSolver(griglia_nuova, origin, destination)
+            fredda.solve(debug=False)
+            assert _stessa_lunghezza(calda.lunghezza_minima, fredda.lunghezza_minima), (cella, origin, destination)
+
+    assert session.get_stats_summary()["obstacle_updates"] == 10
+
+def test_ostacolo_sul_cammino_allunga_il_percorso():
+    session = GridSession(np.zeros((5, 5), dtype=np.uint8))
+    assert _stessa_lunghezza(session.solve((2, 0), (2, 4)).lunghezza_minima, 4.0)
+    session.set_obstacle((2, 2))
+    assert _stessa_lunghezza(session.solve((2, 0), (2, 4)).lunghezza_minima, 2 + 2 * math.sqrt(2))
+    session.clear_obstacle((2, 2))
+    assert _stessa_lunghezza(session.solve((2, 0), (2, 4)).lunghezza_minima, 4.0)
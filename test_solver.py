@@ -0,0 +1,32 @@
+import math
+import random
+import pytest
+import graph_search
+import grid_generator
+from data_structures import Grid
+from solver import MOTORI, PathfindingSolver
+
+def _stessa_lunghezza(a, b):
+    return a == b or math.isclose(a, b, rel_tol=1e-12)
+
+@pytest.mark.parametrize("engine", MOTORI)
+@pytest.mark.parametrize("seed, lato, obstacle_ratio", [(6, 8, 0.25), (12, 10, 0.3)])
+def test_branch_and_bound_non_sporca_la_cache_condivisa(seed, lato, obstacle_ratio, engine):
+    # Le interrogazioni verso la stessa destinazione condividono i sottoproblemi (F, D): quelli
+    # potati dal branch and bound non sono esatti e non devono finire nella cache condivisa
+    rng = random.Random(seed)
+    mappa = grid_generator.generate_grid_map(rows=lato, cols=lato, obstacle_ratio=obstacle_ratio, seed=seed)
+    grid = Grid.from_matrix(mappa)
+    libere = list(grid.adj.keys())
+    destination = rng.choice(libere)
+    memoization_cache, closure_cache = {}, {}
+    for origin in rng.sample(libere, 6):
+        solver = PathfindingSolver(grid, origin, destination, closure_cache=closure_cache,
+                                   memoization_cache=memoization_cache)
+        solver.solve(debug=False, engine=engine, use_branch_and_bound=True)
+    for origin in libere:
+        solver = PathfindingSolver(grid, origin, destination, closure_cache=closure_cache,
+                                   memoization_cache=memoization_cache)
+        solver.solve(debug=False, engine=engine)
+        atteso, _ = graph_search.astar(grid, origin, destination)
+        assert _stessa_lunghezza(solver.lunghezza_minima, atteso), origin
@@ -0,0 +1,18 @@
+import numpy as np
+import visualization
+
+def test_ostacolo_isolato_resta_visibile_sotto_la_chiusura():
+    mappa = np.zeros((3000, 3000), dtype=np.uint8)
+    mappa[1500, 1500] = 1
+    contesto = mappa == 0
+    codici, fattore = visualization.rasterizza(mappa, {"contesto": contesto})
+    assert fattore == 3
+    assert (codici == visualization.CODICI_RASTER["ostacolo"]).sum() == 1
+    assert codici[500, 500] == visualization.CODICI_RASTER["ostacolo"]
+
+def test_livelli_puntuali_prevalgono_sugli_ostacoli():
+    mappa = np.zeros((20, 20), dtype=np.uint8)
+    mappa[0, 1] = 1
+    codici, fattore = visualization.rasterizza(mappa, {"origine": [(0, 0)]}, max_pixel=10)
+    assert fattore == 2
+    assert codici[0, 0] == visualization.CODICI_RASTER["origine"]
@@ -0,0 +1,225 @@
+import json
+import time
+import numpy as np
+
+# Tipi di evento registrati durante la ricerca
+ENTER, CACHE_HIT, BASE_CASE, CLOSURE, FRONTIER, CHILD, PRUNE, CHILD_RETURN, IMPROVEMENT, RETURN = range(10)
+NOMI_EVENTI = ("enter", "cache_hit", "base_case", "closure", "frontier", "child",
+               "prune", "child_return", "improvement", "return")
+
+# Significato dei campi 'valore', 'valore2' ed 'extra' per ogni tipo di evento (None = non usato)
+CAMPI_EVENTI = {
+    ENTER: ("forbidden_obstacles", None, None),
+    CACHE_HIT: (None, None, None),
+    BASE_CASE: ("lunghezza", None, "caso"),
+    CLOSURE: ("contesto", "complemento", None),
+    FRONTIER: ("frontiera", None, None),
+    CHILD: ("costo_of", None, "tipo"),
+    PRUNE: ("costo_potenziale", "limite", "globale"),
+    CHILD_RETURN: ("costo_fd", "totale", None),
+    IMPROVEMENT: ("totale", None, None),
+    RETURN: ("lunghezza", "esatto", "landmark"),
+}
+
+# Valori del campo 'caso' degli eventi BASE_CASE
+CASO_ORIGINE_DESTINAZIONE, CASO_CONTESTO, CASO_COMPLEMENTO, CASO_VICOLO_CIECO = range(4)
+
+class Tracer:
+    """
+    Registra gli eventi della ricerca di CAMMINOMIN in un buffer circolare preallocato
+    (un array numpy per campo): quando il buffer è pieno gli eventi più vecchi vengono
+    sovrascritti, quindi anche ricerche enormi occupano una quantità fissa di memoria.
+    Ogni evento ha tipo, istante (perf_counter_ns), profondità, cella (origine del
+    sottoproblema o cella di frontiera) e fino a tre valori numerici, il cui significato
+    dipende dal tipo (vedi CAMPI_EVENTI).
+    Il solver chiama i metodi del tracer solo se ne è stato indicato uno, quindi con il
+    tracing disattivato la ricerca non paga nulla.
+    """
+    def __init__(self, capacity=1 << 16):
+        if capacity <= 0:
+            raise ValueError(f"Capacità del tracer '{capacity}' non valida: deve essere positiva.")
+        self.capacity = capacity
+        self.num_eventi = 0
+        self._tipo = np.zeros(capacity, dtype=np.uint8)
+        self._tempo = np.zeros(capacity, dtype=np.int64)
+        self._depth = np.zeros(capacity, dtype=np.int32)
+        self._cella = np.zeros((capacity, 2), dtype=np.int32)
+        self._valore = np.zeros(capacity, dtype=np.float64)
+        self._valore2 = np.zeros(capacity, dtype=np.float64)
+        self._extra = np.zeros(capacity, dtype=np.int32)
+
+    def _registra(self, tipo, depth, cella, valore=0.0, valore2=0.0, extra=0):
+        i = self.num_eventi % self.capacity
+        self._tipo[i] = tipo
+        self._tempo[i] = time.perf_counter_ns()
+        self._depth[i] = depth
+        self._cella[i] = cella
+        self._valore[i] = valore
+        self._valore2[i] = valore2
+        self._extra[i] = extra
+        self.num_eventi += 1
+
+    # Eventi della ricerca, nell'ordine in cui il solver li genera
+
+    def enter(self, depth, origin, destination, num_forbidden):
+        self._registra(ENTER, depth, origin, num_forbidden)
+
+    def cache_hit(self, depth, origin):
+        self._registra(CACHE_HIT, depth, origin)
+
+    def base_case(self, depth, origin, caso, lunghezza):
+        self._registra(BASE_CASE, depth, origin, lunghezza, extra=caso)
+
+    def closure(self, depth, origin, num_contesto, num_complemento):
+        self._registra(CLOSURE, depth, origin, num_contesto, num_complemento)
+
+    def frontier(self, depth, origin, num_frontiera):
+        self._registra(FRONTIER, depth, origin, num_frontiera)
+
+    def child(self, depth, f_pos, f_type, indice, num_frontiera, len_of):
+        self._registra(CHILD, depth, f_pos, len_of, extra=f_type)
+
+    def prune(self, depth, f_pos, globale, costo_potenziale, limite):
+        self._registra(PRUNE, depth, f_pos, costo_potenziale, limite, int(globale))
+
+    def child_return(self, depth, f_pos, len_fd, totale):
+        self._registra(CHILD_RETURN, depth, f_pos, len_fd, totale)
+
+    def improvement(self, depth, f_pos, totale):
+        self._registra(IMPROVEMENT, depth, f_pos, totale)
+
+    def exit(self, depth, origin, lunghezza, num_landmark, esatto):
+        self._registra(RETURN, depth, origin, lunghezza, float(esatto), num_landmark)
+
+    @property
+    def eventi_persi(self):
+        """Numero di eventi sovrascritti perché il buffer era pieno."""
+        return max(0, self.num_eventi - self.capacity)
+
+    def eventi(self):
+        """
+        Restituisce gli eventi ancora nel buffer, in ordine cronologico, come dizionario
+        di array numpy: tipo, tempo_ns, depth, r, c, valore, valore2, extra.
+        """
+        n = min(self.num_eventi, self.capacity)
+        ordine = (np.arange(n) + self.num_eventi - n) % self.capacity
+        return {
+            "tipo": self._tipo[ordine], "tempo_ns": self._tempo[ordine], "depth": self._depth[ordine],
+            "r": self._cella[ordine, 0], "c": self._cella[ordine, 1],
+            "valore": self._valore[ordine], "valore2": self._valore2[ordine], "extra": self._extra[ordine],
+        }
+
+    def conteggi(self):
+        """Numero di eventi nel buffer per ogni tipo, come {nome: conteggio}."""
+        conteggi = np.bincount(self.eventi()["tipo"], minlength=len(NOMI_EVENTI))
+        return {nome: int(n) for nome, n in zip(NOMI_EVENTI, conteggi)}
+
+    def to_chrome_trace(self, path=None):
+        """
+        Converte gli eventi nel formato "Trace Event" di Chrome (apribile con chrome://tracing
+        o Perfetto): ogni sottoproblema diventa un intervallo, da ENTER fino al suo RETURN,
+        CACHE_HIT o BASE_CASE, e gli altri eventi diventano eventi istantanei al suo interno.
+        Gli intervalli rimasti senza inizio, perché sovrascritto nel buffer, vengono scartati;
+        quelli senza fine vengono chiusi all'ultimo istante registrato.
+        Se 'path' è indicato scrive il JSON su file. Restituisce il dizionario del trace.
+        """
+        eventi = self.eventi()
+        trace = []
+        aperti = 0
+        inizio = int(eventi["tempo_ns"][0]) if len(eventi["tipo"]) else 0
+        ts = 0.0
+        for tipo, tempo, depth, r, c, valore, valore2, extra in zip(*(eventi[k].tolist() for k in eventi)):
+            ts = (tempo - inizio) / 1000
+            nomi = CAMPI_EVENTI[tipo]
+            args = {"depth": depth, "cella": [r, c]}
+            for nome, x in zip(nomi, (valore, valore2, extra)):
+                if nome is not None:
+                    args[nome] = x if x != float('inf') else None
+            if tipo == ENTER:
+                aperti += 1
+                trace.append({"name": f"CAMMINOMIN({r}, {c})", "ph": "B", "ts": ts, "pid": 1, "tid": 1, "args": args})
+            elif tipo in (RETURN, CACHE_HIT, BASE_CASE):
+                if aperti == 0:
+                    continue
+                aperti -= 1
+                trace.append({"ph": "E", "ts": ts, "pid": 1, "tid": 1, "args": {"evento": NOMI_EVENTI[tipo], **args}})
+            else:
+                trace.append({"name": NOMI_EVENTI[tipo], "ph": "i", "s": "t", "ts": ts, "pid": 1, "tid": 1, "args": args})
+        trace.extend({"ph": "E", "ts": ts, "pid": 1, "tid": 1} for _ in range(aperti))
+
+        risultato = {"traceEvents": trace, "displayTimeUnit": "ms",
+                     "otherData": {"eventi_totali": self.num_eventi, "eventi_persi": self.eventi_persi}}
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(risultato, f)
+        return risultato
+
+_BORDO = "══════════════════════════════════════════════════════"
+_MESSAGGI_CASO_BASE = {
+    CASO_ORIGINE_DESTINAZIONE: "CASO BASE: Origine == Destinazione. Ritorno (0, [...]).",
+    CASO_CONTESTO: "CASO BASE: Destinazione nel CONTESTO. Ritorno ({:.2f}, [...]).",
+    CASO_COMPLEMENTO: "CASO BASE: Destinazione nel COMPLEMENTO. Ritorno ({:.2f}, [...]).",
+    CASO_VICOLO_CIECO: "VICOLO CIECO: Frontiera vuota. Ritorno (inf, []).",
+}
+
+class TextTracer(Tracer):
+    """
+    Tracer che, oltre a registrare gli eventi, stampa l'albero della ricerca come testo
+    indentato per livello: è l'output di PathfindingSolver.solve(debug=True).
+    """
+    def enter(self, depth, origin, destination, num_forbidden):
+        super().enter(depth, origin, destination, num_forbidden)
+        indent = "  " * depth
+        print(f"\n{indent}╔{_BORDO}")
+        print(f"{indent}║ RICORSIONE (Livello {depth}): CAMMINOMIN({origin}, {destination})")
+        print(f"{indent}║ Ostacoli Proibiti: {num_forbidden} elementi")
+
+    def cache_hit(self, depth, origin):
+        super().cache_hit(depth, origin)
+        indent = "  " * depth
+        print(f"{indent}║ -> Trovato in CACHE. Ritorno il risultato salvato.")
+        print(f"{indent}╚{_BORDO}")
+
+    def base_case(self, depth, origin, caso, lunghezza):
+        super().base_case(depth, origin, caso, lunghezza)
+        indent = "  " * depth
+        print(f"{indent}║ -> {_MESSAGGI_CASO_BASE[caso].format(lunghezza)}")
+        print(f"{indent}╚{_BORDO}")
+
+    def closure(self, depth, origin, num_contesto, num_complemento):
+        super().closure(depth, origin, num_contesto, num_complemento)
+        print(f"{'  ' * depth}║ Chiusura calcolata: {num_contesto} nel contesto, {num_complemento} nel complemento.")
+
+    def frontier(self, depth, origin, num_frontiera):
+        super().frontier(depth, origin, num_frontiera)
+        indent = "  " * depth
+        print(f"{indent}║ Frontiera calcolata: {num_frontiera} celle.")
+        if num_frontiera:
+            print(f"{indent}║ Inizio ciclo FOR sulla frontiera...")
+
+    def child(self, depth, f_pos, f_type, indice, num_frontiera, len_of):
+        super().child(depth, f_pos, f_type, indice, num_frontiera, len_of)
+        print(f"{'  ' * depth}║ ({indice}/{num_frontiera}) Esamino F={f_pos} (tipo {f_type}). Costo O->F: {len_of:.2f}")
+
+    def prune(self, depth, f_pos, globale, costo_potenziale, limite):
+        super().prune(depth, f_pos, globale, costo_potenziale, limite)
+        indent = "  " * depth
+        if globale:
+            print(f"{indent}║   -> PRUNING GLOBALE: costo potenziale dalla radice ({costo_potenziale:.2f}) >= incumbent ({limite:.2f})")
+        else:
+            print(f"{indent}║   -> PRUNING: costo potenziale ({costo_potenziale:.2f}) >= miglior costo attuale ({limite:.2f})")
+
+    def child_return(self, depth, f_pos, len_fd, totale):
+        super().child_return(depth, f_pos, len_fd, totale)
+        print(f"{'  ' * depth}║   -> Ritorno da ricorsione per F={f_pos}. Costo F->D: {len_fd:.2f}. Totale: {totale:.2f}")
+
+    def improvement(self, depth, f_pos, totale):
+        super().improvement(depth, f_pos, totale)
+        print(f"{'  ' * depth}║   -> NUOVO MIGLIOR PERCORSO LOCALE TROVATO! (costo {totale:.2f})")
+
+    def exit(self, depth, origin, lunghezza, num_landmark, esatto):
+        super().exit(depth, origin, lunghezza, num_landmark, esatto)
+        indent = "  " * depth
+        print(f"{indent}║ Fine ciclo FOR. Miglior risultato locale: ({lunghezza if lunghezza != float('inf') else 'inf'}, {num_landmark} landmark).")
+        print(f"{indent}║ {'Salvo in CACHE e ritorno.' if esatto else 'Risultato limitato dal pruning globale: non salvato in CACHE.'}")
+        print(f"{indent}╚{_BORDO}")
@@ -1,15 +1,47 @@
+import math
 import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.colors import ListedColormap
+from matplotlib.figure import Figure
+from matplotlib.patches import Patch
+import path_logic
 
-def visualizza_gridmap_pcolormesh(grid):
+# Livelli del renderer raster: (nome, colore, etichetta). Il codice di un livello è la sua
+# posizione, e sulle celle (o sui blocchi ridotti) coperte da più livelli vince quello con
+# il codice più alto. Gli ostacoli precedono le aree estese di contesto e complemento,
+# altrimenti nel max-pooling sparirebbero da ogni blocco che contiene una cella della chiusura
+LIVELLI_RASTER = (
+    ("libero", "white", "Spazio Libero"),
+    ("contesto", "#90EE90", "Contesto"),
+    ("complemento", "#FFD700", "Complemento"),
+    ("ostacolo", "#30307A", "Ostacolo"),
+    ("frontiera", "#006400", "Frontiera"),
+    ("landmark", "#FF8C00", "Landmark"),
+    ("origine", "#FF0000", "Origine O"),
+    ("destinazione", "#800080", "Destinazione D"),
+)
+CODICI_RASTER = {nome: codice for codice, (nome, _, _) in enumerate(LIVELLI_RASTER)}
+
+# Lato massimo (in pixel) dell'immagine raster prima del ridimensionamento
+MAX_PIXEL = 1000
+# Fino a questo lato (in celle) il renderer raster disegna anche i bordi delle celle, e
+# visualizza_gridmap_pcolormesh usa pcolormesh invece del renderer raster
+MAX_CELLE_BORDI = 60
+
+def visualizza_gridmap_pcolormesh(grid, output_path=None):
     """
     Visualizza la gridmap usando matplotlib con colormesh.
+    Le mappe con più di MAX_CELLE_BORDI righe o colonne, o da salvare su file, passano
+    per visualizza_raster.
     Parametri:
         grid (list of list of int): griglia 2D che rappresenta la mappa,dove il valore di ogni cella ne determina il colore.
+        output_path (str): se indicato, l'immagine viene salvata in PNG invece di essere mostrata.
     """""
     np_grid = np.array(grid)
     rows, cols = np_grid.shape
+    if output_path is not None or max(rows, cols) > MAX_CELLE_BORDI:
+        return visualizza_raster(np_grid, titolo="Griglia iniziale", output_path=output_path)
 
     cmap = ListedColormap(['white', '#333399']) 
     fig, ax = plt.subplots()
@@ -53,6 +85,114 @@ def visualizza_risultato_finale(grid_da_mostrare, cmap, legend_elements, titolo)
     
     plt.show()
 
+def _maschera_livello(celle, shape):
+    """Maschera booleana di un livello, indicato come maschera o come elenco di celle (r, c)."""
+    if isinstance(celle, np.ndarray) and celle.dtype == bool:
+        return celle
+    mask = np.zeros(shape, dtype=bool)
+    celle = list(celle)
+    if celle:
+        rows_idx, cols_idx = zip(*celle)
+        mask[list(rows_idx), list(cols_idx)] = True
+    return mask
+
+def _max_pool(codici, fattore):
+    """Riduce la matrice dei codici di 'fattore' per lato tenendo il codice massimo di ogni blocco."""
+    rows, cols = codici.shape
+    righe_blocchi, colonne_blocchi = -(-rows // fattore), -(-cols // fattore)
+    bordata = np.zeros((righe_blocchi * fattore, colonne_blocchi * fattore), dtype=codici.dtype)
+    bordata[:rows, :cols] = codici
+    return bordata.reshape(righe_blocchi, fattore, colonne_blocchi, fattore).max(axis=(1, 3))
+
+def rasterizza(grid, livelli=None, max_pixel=MAX_PIXEL):
+    """
+    Costruisce l'immagine raster della mappa: una matrice uint8 con, per ogni cella, il
+    codice (vedi LIVELLI_RASTER) del livello più importante che la copre.
+    'grid' è una Grid (o CompactGrid) oppure una matrice di ostacoli (1 = ostacolo);
+    'livelli' è un dizionario {nome: maschera o elenco di celle} con i nomi di LIVELLI_RASTER.
+    Se la mappa ha più di 'max_pixel' righe o colonne viene ridotta di un fattore intero con
+    un max-pooling sui codici, così ostacoli, frontiera e landmark isolati restano visibili.
+    Ritorna (immagine, fattore di riduzione).
+    """
+    if hasattr(grid, "get_free_mask"):
+        ostacoli = ~grid.get_free_mask()
+    else:
+        ostacoli = np.asarray(grid) == 1
+    codici = np.where(ostacoli, CODICI_RASTER["ostacolo"], CODICI_RASTER["libero"]).astype(np.uint8)
+    for nome, celle in (livelli or {}).items():
+        if celle is not None:
+            np.maximum(codici, CODICI_RASTER[nome], out=codici, where=_maschera_livello(celle, codici.shape))
+    fattore = max(1, math.ceil(max(codici.shape) / max_pixel))
+    if fattore > 1:
+        codici = _max_pool(codici, fattore)
+    return codici, fattore
+
+def _in_immagine(celle, fattore):
+    """Coordinate (x, y) dei centri delle celle nell'immagine ridotta di 'fattore'."""
+    r, c = np.array(celle, dtype=float).reshape(-1, 2).T
+    return (c + 0.5) / fattore - 0.5, (r + 0.5) / fattore - 0.5
+
+def visualizza_raster(grid, livelli=None, sequenza_landmark=None, titolo="", output_path=None, max_pixel=MAX_PIXEL):
+    """
+    Renderer raster per mappe di qualsiasi dimensione: disegna con imshow l'immagine di
+    rasterizza (un solo oggetto grafico invece di una cella per oggetto come pcolormesh)
+    e, se indicata, una sequenza di landmark nel formato di PathfindingSolver
+    [(coord, tipo), ...], con i landmark come livello e il cammino come linea.
+    Con 'output_path' la figura viene salvata in PNG con il backend Agg, senza pyplot né
+    display (adatto ai server senza interfaccia grafica); altrimenti viene mostrata con
+    plt.show(). Ritorna la figura.
+    """
+    if sequenza_landmark:
+        livelli = {**(livelli or {}), "landmark": [coords for coords, _ in sequenza_landmark]}
+    codici, fattore = rasterizza(grid, livelli, max_pixel)
+    rows, cols = codici.shape
+
+    altezza = 8
+    figsize = (min(altezza * cols / rows, 2.5 * altezza) + 3, altezza)
+    if output_path is not None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+    else:
+        fig = plt.figure(figsize=figsize)
+    ax = fig.add_subplot()
+
+    cmap = ListedColormap([colore for _, colore, _ in LIVELLI_RASTER])
+    ax.imshow(codici, cmap=cmap, vmin=0, vmax=len(LIVELLI_RASTER) - 1, interpolation="nearest")
+    if fattore == 1 and max(rows, cols) <= MAX_CELLE_BORDI:
+        ax.hlines(np.arange(rows + 1) - 0.5, -0.5, cols - 0.5, colors="black", linewidth=0.5)
+        ax.vlines(np.arange(cols + 1) - 0.5, -0.5, rows - 0.5, colors="black", linewidth=0.5)
+    if sequenza_landmark:
+        percorso = [sequenza_landmark[0][0]]
+        for (origine, _), (arrivo, tipo) in zip(sequenza_landmark, sequenza_landmark[1:]):
+            percorso += path_logic.generate_path_coordinates(origine, arrivo, tipo == 1)[1:]
+        ax.plot(*_in_immagine(percorso, fattore), color=LIVELLI_RASTER[CODICI_RASTER["landmark"]][1], linewidth=1.5)
+    if max(rows, cols) > MAX_CELLE_BORDI:
+        # Sulle mappe grandi i livelli puntiformi occupano pochi pixel: li evidenzia un marcatore
+        for nome in ("landmark", "origine", "destinazione"):
+            celle = (livelli or {}).get(nome)
+            if celle is not None:
+                if isinstance(celle, np.ndarray):
+                    celle = np.argwhere(celle)
+                ax.scatter(*_in_immagine(celle, fattore), s=30, color=LIVELLI_RASTER[CODICI_RASTER[nome]][1],
+                           edgecolors="black", linewidths=0.5, zorder=3)
+
+    presenti = np.flatnonzero(np.bincount(codici.reshape(-1), minlength=len(LIVELLI_RASTER)))
+    legenda = [Patch(facecolor=LIVELLI_RASTER[codice][1], edgecolor="black", label=LIVELLI_RASTER[codice][2])
+               for codice in presenti]
+    ax.legend(handles=legenda, bbox_to_anchor=(1.02, 1), loc="upper left")
+    if fattore > 1:
+        titolo = f"{titolo} (1 pixel = {fattore}x{fattore} celle)".strip()
+    ax.set_title(titolo, fontsize=16)
+    ax.set_xticks([])
+    ax.set_yticks([])
+    fig.tight_layout()
+
+    if output_path is not None:
+        fig.savefig(output_path, dpi=max(100, math.ceil(rows / (altezza - 1))))
+    else:
+        plt.show()
+    return fig
+
 def print_grid(grid):
     """
     Stampa la mappa a griglia e le sue caratteristiche.